@@ -0,0 +1,216 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from classes.functions import Functions as f
+from classes.synthetic import SyntheticLedger
+import classes.logger as logger
+import classes.profiler as profiler
+
+# Columns of the results file, one row per command of a benchmark execution
+RESULT_COLUMNS = ["commit", "date", "legs", "tickers", "accounts", "seed", "variant", "step", "task", "wall_seconds",
+                  "cpu_seconds", "read_seconds", "compute_seconds", "write_seconds", "rows_in", "rows_out",
+                  "rows_per_second", "bytes_read", "bytes_written", "peak_rss_mb", "peak_traced_mb"]
+
+
+def get_benchmarkRuns(folder, inputs):
+    """
+    Returns the runs of a benchmark: every parser on the synthetic inputs, then every command on their merged ledger.
+
+    Parameters:
+    - folder (str): The folder of the synthetic inputs, the outputs are written to its "output" subfolder.
+    - inputs (dict): The synthetic inputs, see SyntheticLedger.generate.
+
+    Returns:
+    - list: (step name, run) tuples, in execution order.
+    """
+    def output(name):
+        return os.path.join(folder, "output", name)
+
+    parsers = [(f"parser_{source}", {"task": "parser", "type": source, "output": output(f"parser_{source}.csv")})
+               for source in ["IBKR", "n26", "wise"]]
+    parsers.append(("parser_yFinance", {"task": "parser", "type": "yFinance", "output": output("parser_yFinance.csv"),
+                                        "priceFiles": inputs["priceFiles"], "interval": "1d",
+                                        "Tickers": inputs["Tickers"], "date_min": inputs["date_min"],
+                                        "date_max": inputs["date_max"]}))
+    return parsers + [
+        ("merge", {"task": "merge", "output": output("merged.csv"),
+                   "inputs": [{"input": run["output"]} for _, run in parsers]}),
+        ("benchmark", {"task": "benchmark", "input": output("merged.csv"), "output": output("benchmark.csv"),
+                       "benchmark": "Assets:Transfers:IBKR", "maxDepth": 5,
+                       "benchmarkTicker": inputs["Tickers"][0]["Ticker"]}),
+        ("balance", {"task": "balance", "input": output("benchmark.csv"), "output": output("balance.csv"),
+                     "fairValueCurrency": "EUR", "groupTypes": False}),
+        ("runningTotal", {"task": "runningTotal", "input": output("benchmark.csv"), "output": output("runningTotal.csv"),
+                          "increment": "W", "fairValueCurrency": "EUR", "groupTypes": True}),
+        ("validate", {"task": "validate", "input": output("merged.csv"), "output": output("validate.csv")}),
+        ("compress", {"task": "compress", "input": output("merged.csv"), "output": output("compressed.csv"),
+                      "period": "year"}),
+        ("chart", {"task": "chart", "type": "lineChart", "input": output("runningTotal.csv"),
+                   "output": output("chart.png"), "index_Name": "Date", "column_Name": "Account",
+                   "value_Name": "RunningTotal_FairValue", "colormap": "tab10", "title": "Benchmark",
+                   "max_legend_entries": 10, "invert": False,
+                   "filters": [{"type": "Contains", "column": "Account", "value": "Assets"}]}),
+    ]
+
+
+def get_inputs(folder, legs, tickers, accounts, seed):
+    """
+    Returns the synthetic inputs of a scale, generating them only if the folder does not hold them yet.
+    """
+    parameters = {"legs": legs, "tickers": tickers, "accounts": accounts, "seed": seed}
+    generated_path = os.path.join(folder, "generated.json")
+    if os.path.exists(generated_path):
+        with open(generated_path, "r") as generated_file:
+            generated = json.load(generated_file)
+        if generated["parameters"] == parameters:
+            f.log(f"Using the synthetic inputs in {folder}.")
+            return generated["inputs"]
+
+    f.log(f"Generating synthetic inputs of {legs} legs in {folder}.")
+    inputs = SyntheticLedger(folder, legs, tickers, accounts, seed).generate()
+    f.log(f"Generated legs per source: {inputs['legs']}")
+    with open(generated_path, "w") as generated_file:
+        json.dump({"parameters": parameters, "inputs": inputs}, generated_file, indent=1)
+    return inputs
+
+
+def run_step(run, config):
+    """
+    Runs a command of the benchmark, in its own process so the peak memory is the one of this command alone.
+    """
+    from classes.commands import Commands as commands
+    return commands.run_command(run, config)
+
+
+def get_commit():
+    """
+    Returns the short hash of the checked out commit, or "" outside of a git repository.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_benchmark(arguments):
+    """
+    Generates the inputs of a scale, runs every command on them and appends the results to the results file.
+
+    Returns:
+    - pd.DataFrame: The results of this execution.
+    """
+    folder = os.path.abspath(os.path.join(arguments.folder, f"legs{arguments.legs}_tickers{arguments.tickers}_"
+                                                            f"accounts{arguments.accounts}_seed{arguments.seed}"))
+    os.makedirs(os.path.join(folder, "output"), exist_ok=True)
+
+    # This process and the commands log to the folder of the inputs, not to the current directory
+    log_settings = {"LogFile": os.path.join(folder, "log.txt"), "LogConsole": False}
+    logger.configure(log_settings)
+    inputs = get_inputs(folder, arguments.legs, arguments.tickers, arguments.accounts, arguments.seed)
+
+    config = {"CSV_Separator": ";", "RelativePaths": True, "Config_IBKR": inputs["Config_IBKR"],
+              "Config_n26": inputs["Config_n26"], "Config_wise": inputs["Config_wise"],
+              "Profile": os.path.join(folder, "profile.json"), "ProfileMemory": arguments.trace_memory,
+              **log_settings}
+    variant = ""
+    if arguments.config is not None:
+        config.update(f.import_json(arguments.config))
+        variant = os.path.splitext(os.path.basename(arguments.config))[0]
+        logger.configure(config)
+
+    started = datetime.datetime.now()
+    commit = get_commit()
+    records = []
+    results = []
+    for index, (step, run) in enumerate(get_benchmarkRuns(folder, inputs)):
+        if arguments.steps and step not in arguments.steps and run["task"] not in arguments.steps:
+            continue
+
+        # The fastest of the repeats is kept, with the highest peak memory of them
+        best = None
+        for _ in range(arguments.repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                record = pool.submit(run_step, run, config).result()
+            # Every command runs in a new process, so the peak memory of the process is the one of the command
+            record["peak_rss_mb"] = record["process_peak_rss_mb"]
+            if best is None or record["wall_seconds"] < best["wall_seconds"]:
+                peak = best["peak_rss_mb"] if best is not None else None
+                best = record
+                if peak is not None and best["peak_rss_mb"] is not None:
+                    best["peak_rss_mb"] = max(best["peak_rss_mb"], peak)
+        best["index"] = index
+        records.append(best)
+
+        rows = max(best["rows_in"], best["rows_out"])
+        results.append({**{column: best.get(column) for column in RESULT_COLUMNS},
+                        "commit": commit, "date": started.strftime("%Y-%m-%d %H:%M:%S"), "legs": arguments.legs,
+                        "tickers": arguments.tickers, "accounts": arguments.accounts, "seed": arguments.seed,
+                        "variant": variant, "step": step, "task": run["task"],
+                        "rows_per_second": round(rows / best["wall_seconds"]) if best["wall_seconds"] > 0 else None})
+        print(f"{step:16} {best['wall_seconds']:9.3f} s {rows:10} rows {results[-1]['rows_per_second'] or 0:10} rows/s "
+              f"{best['peak_rss_mb'] or 0:8.1f} MB")
+
+    profiler.write_profile(config, records, started)
+    results = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    results_path = os.path.abspath(arguments.results)
+    os.makedirs(os.path.dirname(results_path), exist_ok=True)
+    results.to_csv(results_path, sep=";", index=False, mode="a", header=not os.path.exists(results_path))
+    print(f"Results appended to {results_path}")
+    return results
+
+
+def compare_results(arguments):
+    """
+    Prints, for every step, the wall time, throughput and peak memory of the last two commits benchmarked at the same
+    scale and variant in the results file, and the ratio of their wall times.
+    """
+    results = pd.read_csv(arguments.results, sep=";", keep_default_na=False, dtype={"commit": str, "variant": str})
+    results = results.loc[(results["legs"] == arguments.legs) & (results["tickers"] == arguments.tickers) &
+                          (results["accounts"] == arguments.accounts) & (results["seed"] == arguments.seed) &
+                          (results["variant"] == (os.path.splitext(os.path.basename(arguments.config))[0]
+                                                  if arguments.config is not None else ""))]
+    commits = list(dict.fromkeys(results.sort_values("date")["commit"]))[-2:]
+    if len(commits) < 2:
+        print(f"Nothing to compare, {len(commits)} commits benchmarked at this scale.")
+        return
+
+    # The best result of each commit for each step
+    best = results.loc[results["commit"].isin(commits)].groupby(["step", "commit"], sort=False).agg(
+        wall_seconds=("wall_seconds", "min"), rows_per_second=("rows_per_second", "max"),
+        peak_rss_mb=("peak_rss_mb", "max")).unstack("commit")
+    best[("ratio", "")] = best[("wall_seconds", commits[1])] / best[("wall_seconds", commits[0])]
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(f"{commits[0]} -> {commits[1]}, ratio of the wall times (below 1 is faster):")
+        print(best)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description="Benchmarks every command on synthetic statements of a given scale.")
+    parser.add_argument("--legs", type=int, default=100000, help="ledger entries parsed from the inputs")
+    parser.add_argument("--tickers", type=int, default=20, help="securities traded and priced")
+    parser.add_argument("--accounts", type=int, default=50, help="IBKR accounts and bank payees")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic inputs")
+    parser.add_argument("--repeat", type=int, default=1, help="executions of every command, the fastest is kept")
+    parser.add_argument("--steps", nargs="*", help="steps or tasks to run, all by default")
+    parser.add_argument("--config", help="JSON file of config settings to benchmark, such as AmountStorage")
+    parser.add_argument("--trace-memory", action="store_true", help="also trace Python allocations (slower)")
+    parser.add_argument("--folder", default="Files/benchmark", help="folder of the synthetic inputs and outputs")
+    parser.add_argument("--results", default="Files/benchmark/results.csv", help="results file, appended to")
+    parser.add_argument("--compare", action="store_true", help="compare the last two commits in the results file")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    arguments = get_arguments()
+    if arguments.compare:
+        compare_results(arguments)
+    else:
+        run_benchmark(arguments)
@@ -0,0 +1,181 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.functions import Functions as f
+import classes.pandas as pandas
+import classes.profiler as profiler
+
+# Chart types of classes.charts, listed here so unknown types are rejected without importing matplotlib
+CHART_TYPES = ["stackedBar", "Bar", "pieChart", "stackedlineChart", "lineChart"]
+
+
+def get_chartParameters(run):
+    """
+    Returns the parameters of a chart run.
+    """
+    return {
+        "type": f.get_runParameter(run, "type"),
+        "index_Name": f.get_runParameter(run, "index_Name"),
+        "column_Name": f.get_runParameter(run, "column_Name"),
+        "value_Name": f.get_runParameter(run, "value_Name"),
+        "colormap": f.get_runParameter(run, "colormap"),
+        "title": f.get_runParameter(run, "title"),
+        "invert": f.get_runParameter(run, "invert"),
+        "max_legend_entries": f.get_runParameter(run, "max_legend_entries"),
+        "rounding": f.get_runParameter(run, "rounding")
+    }
+
+
+def get_chartData(data, run, chart_params):
+    """
+    Prepares the data a chart draws: the input filtered and inverted as the run requires, then pivoted for the bar
+    and line charts or reduced to its labels and values for the pie chart.
+
+    Parameters:
+    - data (pd.DataFrame): The input of the chart, not modified.
+    - run (dict): The chart run, with its filters.
+    - chart_params (dict): The parameters of the chart, see get_chartParameters.
+
+    Returns:
+    - pd.DataFrame or None: The data to render, or None when the chart type is unknown.
+    """
+    chart_type = chart_params["type"]
+    if chart_type not in CHART_TYPES:
+        return None
+
+    # Apply filters to the data
+    filters = f.get_runParameter(run, "filters")
+    data = f.run_filters(data, filters)
+    f.log(f"Applied filters: {filters}.")
+
+    # Invert values if required
+    value_Name = chart_params["value_Name"]
+    if chart_params["invert"]:
+        data = data.assign(**{value_Name: -data[value_Name]})
+        f.log(f"Inverted values in column {value_Name}.")
+
+    if chart_type == "pieChart":
+        return data[[chart_params["column_Name"], value_Name]]
+    import classes.charts as charts
+    return charts.get_pivot(data, chart_params["index_Name"], chart_params["column_Name"], value_Name)
+
+
+def render_chart(chart_data, chart_params, output):
+    """
+    Renders a chart to a file. Runs in the chart worker processes as well as in the main process.
+
+    Parameters:
+    - chart_data (pd.DataFrame): The data of the chart, see get_chartData.
+    - chart_params (dict): The parameters of the chart.
+    - output (str): The image file to write.
+
+    Returns:
+    - float: The render time in seconds.
+    """
+    import classes.charts as charts
+
+    start = time.perf_counter()
+    if chart_params["type"] == "pieChart":
+        charts.generate_pieChart(chart_data, chart_params["column_Name"], chart_params["value_Name"], output,
+                                 chart_params["title"], chart_params["colormap"])
+    else:
+        charts.generate_pivotChart(chart_data, chart_params["type"], chart_params["index_Name"],
+                                   chart_params["column_Name"], chart_params["value_Name"], output,
+                                   chart_params["title"], chart_params["colormap"], chart_params["max_legend_entries"],
+                                   chart_params["rounding"])
+    profiler.add_write(0, profiler.get_fileSize(output), 0)
+    return time.perf_counter() - start
+
+
+class ChartFarm:
+    """
+    Renders the charts of a pipeline together on a process pool.
+
+    Chart runs are added as the pipeline reaches them: their input is read (once for all the charts reading the same
+    file) and their data filtered and pivoted right away, so they see the input as it is at that point of the
+    pipeline. Rendering, which dominates the cost of a chart, happens in render for all of them at once, in
+    "ChartWorkers" processes that import matplotlib once each.
+    """
+
+    def __init__(self, config, workers):
+        """
+        Parameters:
+        - config (dict): The configuration, with CSV_Separator.
+        - workers (int): The number of rendering processes.
+        """
+        self.separator = config.get("CSV_Separator", ",")
+        self.workers = workers
+        self.frames = {}
+        self.jobs = []
+
+    def forget_inputs(self):
+        """
+        Drops the inputs read so far, as a run that is not a chart may rewrite them.
+        """
+        self.frames = {}
+
+    def add(self, run, tag=None):
+        """
+        Reads and prepares the data of a chart run and queues it for rendering.
+
+        Parameters:
+        - run (dict): The chart run.
+        - tag: Any value returned with the run by render, such as its index in the pipeline.
+        """
+        input = f.get_full_Path(run.get("input"))
+        output = f.get_full_Path(run.get("output"))
+        chart_params = get_chartParameters(run)
+
+        key = pandas.get_registryKey(input)
+        if key not in self.frames:
+            self.frames[key] = pandas.read_file(input, self.separator)
+            f.log(f"Input data loaded from {input}.")
+
+        chart_data = get_chartData(self.frames[key], run, chart_params)
+        if chart_data is None:
+            f.log(f"Invalid chart type specified: {chart_params['type']}")
+            return
+        self.jobs.append((run, tag, chart_data, chart_params, output))
+
+    def render(self):
+        """
+        Renders every queued chart and logs the render time of each.
+
+        Returns:
+        - list: The (run, tag, render seconds) of the charts rendered. Charts that failed are logged and left out.
+        """
+        if len(self.jobs) == 0:
+            return []
+
+        start = time.perf_counter()
+        workers = min(self.workers, len(self.jobs))
+        f.log(f"Rendering {len(self.jobs)} charts on {workers} processes.")
+
+        rendered = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(job, pool.submit(render_chart, job[2], job[3], job[4])) for job in self.jobs]
+            for (run, tag, chart_data, chart_params, output), future in futures:
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    f.log(f"Chart {output} failed: {e}")
+                    continue
+                f.log(f"Chart of type {chart_params['type']} rendered to {output} in {seconds:.2f} s.")
+                rendered.append((run, tag, seconds))
+
+        f.log(f"Rendered {len(rendered)} of {len(self.jobs)} charts in {time.perf_counter() - start:.2f} s.")
+        self.jobs = []
+        self.frames = {}
+        return rendered
+
+
+def get_chartWorkers(config):
+    """
+    Returns the number of processes rendering the charts of a pipeline: "ChartWorkers" from the config, 0 when charts
+    are rendered one by one as their run comes. "ChartWorkers": true uses every CPU.
+    """
+    workers = f.get_runParameter(config, "ChartWorkers")
+    if workers is True:
+        return os.cpu_count() or 1
+    return workers or 0
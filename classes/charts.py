@@ -1,5 +1,18 @@
+import matplotlib
+# Charts are only saved to files, the non-interactive backend needs no display and is the fastest to render
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
+
+# Chart types drawn from a pivot of the data: the kind of pandas plot, whether it is stacked and has a grid
+PIVOT_CHARTS = {
+     "stackedBar": ("bar", True, False),
+     "Bar": ("bar", False, False),
+     "stackedlineChart": ("line", True, True),
+     "lineChart": ("line", False, False),
+}
+
+
 def generate_pieChart(data, Columns_Name, Values_Name, SaveLocation, Title, colormap):
      # Sort the data by size so we have a progression
      data = data.sort_values(by=[Values_Name])
@@ -23,105 +36,29 @@ def generate_pieChart(data, Columns_Name, Values_Name, SaveLocation, Title, colo
 
      # Save the plot to a file
      fig.savefig(SaveLocation)
-
-
-def generate_stackedBarChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
-
-     # Pivot the dataframe
-     data_pivot = data.pivot_table(index=Index_Name, columns=Columns_Name, values=Values_Name, aggfunc="sum").fillna(0)
-
-     # Create a larger figure
-     fig, ax = plt.subplots(figsize=(20, 15))
-
-     # Create a stacked bar chart
-     data_pivot.plot(
-          kind='bar',
-          stacked=True,
-          ax=ax,
-          label='Inline label'
-     )
-
-     # Customize the plot
-     ax.set_title(Title )
-     ax.set_xlabel(Index_Name)
-     ax.set_ylabel(Values_Name)
-     ax = get_cappedHandlesandLabels(ax, data_pivot, max_legend_entries, Columns_Name)
-
-
-     for bar in ax.patches:
-          height = bar.get_height()
-          width = bar.get_width()
-          x = bar.get_x()
-          y = bar.get_y()
-          label_text = round(height, rounding )
-          label_x = round( x + width / 2 , rounding)
-          label_y = round(y + height / 2, rounding)
-          ax.text(label_x, label_y, label_text, ha='center',
-                  va='center')
-
-     data_pivot.plot(colormap=colormap)
-
-     # Save the plot to a file
-     fig.savefig(SaveLocation)
      plt.close(fig)
 
-def generate_BarChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
 
+def get_pivot(data, Index_Name, Columns_Name, Values_Name):
      # Pivot the dataframe
-     data_pivot = data.pivot_table(index=Index_Name, columns=Columns_Name, values=Values_Name, aggfunc="sum").fillna(0)
-
-     # Create a larger figure
-     fig, ax = plt.subplots(figsize=(20, 15))
+     return data.pivot_table(index=Index_Name, columns=Columns_Name, values=Values_Name, aggfunc="sum").fillna(0)
 
-     # Create a stacked bar chart
-     data_pivot.plot(
-          kind='bar',
-          stacked=False,
-          ax=ax,
-          label='Inline label'
-     )
 
-     # Customize the plot
-     ax.set_title(Title )
-     ax.set_xlabel(Index_Name)
-     ax.set_ylabel(Values_Name)
-     ax = get_cappedHandlesandLabels(ax, data_pivot, max_legend_entries, Columns_Name)
+def generate_pivotChart(data_pivot, chart_type, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap, max_legend_entries, rounding):
 
-
-     for bar in ax.patches:
-          height = bar.get_height()
-          width = bar.get_width()
-          x = bar.get_x()
-          y = bar.get_y()
-          label_text = round(height, rounding )
-          label_x = round( x + width / 2 , rounding)
-          label_y = round(y + height / 2, rounding)
-          ax.text(label_x, label_y, label_text, ha='center',
-                  va='center')
-
-     data_pivot.plot(colormap=colormap)
-
-     # Save the plot to a file
-     fig.savefig(SaveLocation)
-     plt.close(fig)
-
-
-
-def generate_stackedlineChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
-
-     # Pivot the dataframe
-     data_pivot = data.pivot_table(index=Index_Name, columns=Columns_Name, values=Values_Name, aggfunc="sum").fillna(0)
+     kind, stacked, grid = PIVOT_CHARTS[chart_type]
 
      # Create a larger figure
      fig, ax = plt.subplots(figsize=(20, 15))
 
-     # Create a stacked bar chart
+     # Create the bar or line chart
      data_pivot.plot(
-          kind='line',
-          stacked=True,
+          kind=kind,
+          stacked=stacked,
           ax=ax,
           label='Inline label',
-          grid=True
+          grid=grid,
+          colormap=colormap
      )
 
      # Customize the plot
@@ -129,49 +66,32 @@ def generate_stackedlineChart(data, Index_Name, Columns_Name, Values_Name, SaveL
      ax.set_xlabel(Index_Name)
      ax.set_ylabel(Values_Name)
      ax = get_cappedHandlesandLabels(ax, data_pivot, max_legend_entries, Columns_Name)
-
-
-     for bar in ax.patches:
-          height = bar.get_height()
-          width = bar.get_width()
-          x = bar.get_x()
-          y = bar.get_y()
-          label_text = round(height, rounding )
-          label_x = round( x + width / 2 , rounding)
-          label_y = round(y + height / 2, rounding)
-          ax.text(label_x, label_y, label_text, ha='center',
-                  va='center')
-
-     data_pivot.plot(colormap=colormap)
+     add_barLabels(ax, rounding)
 
      # Save the plot to a file
      fig.savefig(SaveLocation)
      plt.close(fig)
 
 
-def generate_lineChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
-
-     # Pivot the dataframe
-     data_pivot = data.pivot_table(index=Index_Name, columns=Columns_Name, values=Values_Name, aggfunc="sum").fillna(0)
+def generate_stackedBarChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
+     generate_pivotChart(get_pivot(data, Index_Name, Columns_Name, Values_Name), "stackedBar", Index_Name,
+                         Columns_Name, Values_Name, SaveLocation, Title, colormap, max_legend_entries, rounding)
 
-     # Create a larger figure
-     fig, ax = plt.subplots(figsize=(20, 15))
+def generate_BarChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
+     generate_pivotChart(get_pivot(data, Index_Name, Columns_Name, Values_Name), "Bar", Index_Name,
+                         Columns_Name, Values_Name, SaveLocation, Title, colormap, max_legend_entries, rounding)
 
-     # Create a stacked bar chart
-     data_pivot.plot(
-          kind='line',
-          stacked=False,
-          ax=ax,
-          label='Inline label'
-     )
+def generate_stackedlineChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
+     generate_pivotChart(get_pivot(data, Index_Name, Columns_Name, Values_Name), "stackedlineChart", Index_Name,
+                         Columns_Name, Values_Name, SaveLocation, Title, colormap, max_legend_entries, rounding)
 
-     # Customize the plot
-     ax.set_title(Title )
-     ax.set_xlabel(Index_Name)
-     ax.set_ylabel(Values_Name)
-     ax = get_cappedHandlesandLabels(ax, data_pivot, max_legend_entries, Columns_Name)
+def generate_lineChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation, Title, colormap,max_legend_entries, rounding):
+     generate_pivotChart(get_pivot(data, Index_Name, Columns_Name, Values_Name), "lineChart", Index_Name,
+                         Columns_Name, Values_Name, SaveLocation, Title, colormap, max_legend_entries, rounding)
 
 
+def add_barLabels(ax, rounding):
+     # Label every bar with its value in its middle
      for bar in ax.patches:
           height = bar.get_height()
           width = bar.get_width()
@@ -183,11 +103,6 @@ def generate_lineChart(data, Index_Name, Columns_Name, Values_Name, SaveLocation
           ax.text(label_x, label_y, label_text, ha='center',
                   va='center')
 
-     data_pivot.plot(colormap=colormap)
-
-     # Save the plot to a file
-     fig.savefig(SaveLocation)
-     plt.close(fig)
 
 def get_cappedHandlesandLabels(ax, data_pivot, max_legend_entries, Columns_Name ):
      # Customize the legend to show up to max_legend_entries entries
@@ -4,6 +4,8 @@ import pandas as pd
 from decimal import Decimal
 from classes.functions import Functions as f
 import classes.pandas as pandas
+import classes.logger as logger
+import classes.profiler as profiler
 import classes.data as d
 
 
@@ -15,6 +17,17 @@ import classes.data as d
 class Commands:
 
     def run_command(run, config):
+        """
+        Runs a run, measured when "Profile" or "ProfileRun" is set in the config (see profiler.profile_command).
+
+        Returns:
+        - dict or None: The measurements of the run, None when it is not profiled.
+        """
+        logger.configure(config)
+        pandas.configure(config)
+        return profiler.profile_command(run, config, lambda: Commands.execute_command(run, config))
+
+    def execute_command(run, config):
         if run["task"] == "parser":
             d.command_parser(run, config)
         elif run["task"] == "merge":
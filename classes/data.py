@@ -1,5 +1,3 @@
-import random
-
 import pandas as pd
 from decimal import Decimal
 from classes.functions import Functions as f
@@ -10,6 +8,10 @@ import classes.parser_IBKR as IBKR
 import classes.parser_n26 as n26
 import classes.parser_wise as wise
 import classes.parser_yahooFinance as yahooFinance
+from classes.prices import PriceIndex, to_nanoseconds
+import classes.merge as merge
+import classes.chartFarm as chartFarm
+import classes.filters as filter_engine
 
 def command_parser(run, config):
     """
@@ -55,11 +57,17 @@ def command_merge(run, config):
     This function performs the following steps:
     1. Retrieves the list of input file paths and the output file path from the provided parameters.
     2. Reads data from each input file and combines them into a single DataFrame.
-    3. Sorts the combined DataFrame by the 'Date' column in ascending order.
-    4. Writes the sorted DataFrame to an output file. If writing entries fails, attempts to write the balance data.
+    3. Reports or drops duplicate entries, per the "duplicates" parameter ("report" by default, "drop" or "keep").
+    4. Sorts the combined DataFrame by the 'Date' column in ascending order.
+    5. Writes the sorted DataFrame to an output file. If writing entries fails, attempts to write the balance data.
+
+    With "streaming": true the inputs, as written sorted by Date by the parsers, are merged chunk by chunk instead
+    (see merge.merge_sortedFiles), reading "chunkSize" rows at a time (100000 by default). When an input turns out
+    not to be sorted, the merge falls back to the steps above.
 
     Parameters:
-    - run (dict): Contains runtime parameters including input file paths and output file path.
+    - run (dict): Contains runtime parameters including input file paths, output file path, duplicates, streaming
+      and chunkSize.
     - config (dict): Contains configuration settings such as CSV separator.
 
     """
@@ -67,9 +75,20 @@ def command_merge(run, config):
     inputs = f.get_runParameter(run, "inputs")
     output = f.get_runParameter(run, "output")
     separator = config["CSV_Separator"]
-
-    # Initialize an empty list to hold DataFrames
-    entries = []
+    duplicates = f.get_runParameter(run, "duplicates") or "report"
+
+    # Stream the inputs when requested, unless frames are handed over in memory by the pipeline
+    if get_streaming(run):
+        f.log("Starting the streaming merge process.")
+        paths = [f.get_runParameter(input, "input") for input in inputs]
+        if merge.merge_sortedFiles(paths, output, separator, f.get_runParameter(run, "chunkSize") or pandas.CHUNK_SIZE,
+                                   duplicates):
+            f.log("Merge process completed.")
+            return
+        f.log("Falling back to merging with a full sort.")
+
+    # Collect the entries of every input as a frame
+    frames = []
     f.log("Starting the merge process.")
 
     for input in inputs:
@@ -81,15 +100,18 @@ def command_merge(run, config):
             f.log(f"Error reading data from {input}: {e}")
             continue  # Skip this file and continue with the next
 
-        # Combine the data from all input files
-        entries = f.combine_lists(entries, data)
+        frames.append(data)
 
-    # Convert the list of DataFrames to a single DataFrame
-    entries = pd.DataFrame(entries)
+    # Combine the data from all input files into a single DataFrame at once
+    frames = [frame for frame in frames if not frame.empty]
+    entries = pd.concat(frames, ignore_index=True) if len(frames) != 0 else pd.DataFrame(columns=pandas.LEDGER_COLUMNS)
     f.log("Combined all data entries into a single DataFrame.")
 
-    # Sort the DataFrame by the 'Date' column
-    entries = entries.sort_values(by="Date", ascending=True).reset_index(drop=True)
+    # Report or drop the rows imported more than once, such as from overlapping statement exports
+    entries = get_deduplicatedEntries(entries, duplicates)
+
+    # Sort the DataFrame by the 'Date' column, entries of the same date in input order
+    entries = entries.sort_values(by="Date", ascending=True, kind="stable").reset_index(drop=True)
     f.log("Sorted the DataFrame by 'Date' in ascending order.")
 
     # Write the sorted DataFrame to the output file
@@ -97,6 +119,41 @@ def command_merge(run, config):
     f.log("Merge process completed.")
 
 
+def get_deduplicatedEntries(entries, mode):
+    """
+    Finds the rows that duplicate an earlier row, with a single hash-based pass over the entries.
+
+    Entries get IDs derived from their content (see Functions.get_hashIDs), so a transaction imported twice yields
+    identical rows, ID included.
+
+    Parameters:
+    - entries (pd.DataFrame): The merged entries.
+    - mode (str): "report" logs the duplicates, "drop" also removes them, "keep" skips the check.
+
+    Returns:
+    - pd.DataFrame: The entries, without the duplicates when mode is "drop".
+    """
+    if mode == "keep" or entries.empty:
+        return entries
+
+    columns = [column for column in pandas.LEDGER_COLUMNS if column in entries.columns] or list(entries.columns)
+    duplicated = entries.duplicated(subset=columns, keep="first")
+    if not duplicated.any():
+        f.log("No duplicate entries found.")
+        return entries
+
+    if "ID" in entries.columns:
+        ids = entries.loc[duplicated, "ID"].unique()
+        f.log(f"Found {duplicated.sum()} duplicate entries in {len(ids)} transactions: {', '.join(map(str, ids[:20]))}")
+    else:
+        f.log(f"Found {duplicated.sum()} duplicate entries.")
+
+    if mode == "drop":
+        f.log("Dropping the duplicate entries.")
+        return entries.loc[~duplicated].reset_index(drop=True)
+    return entries
+
+
 def command_filter(run, config):
     """
     Filters data based on provided filter rules and writes the filtered data to an output file.
@@ -109,6 +166,7 @@ def command_filter(run, config):
 
     Parameters:
     - run (dict): Contains runtime parameters including input file path, output file path, and filter rules.
+      With "streaming": true the file is filtered "chunkSize" rows at a time, so it does not have to fit in memory.
     - config (dict): Contains configuration settings including CSV separator.
     """
     # Retrieve parameters from run and config
@@ -121,13 +179,23 @@ def command_filter(run, config):
     f.log(f"Output file: {output_path}")
     f.log(f"CSV Separator: {separator}")
 
+    # Retrieve the filter rules
+    filters = f.get_runParameter(run, "filters")
+    f.log(f"Applying filters: {filters}")
+
+    # Filter the file chunk by chunk when requested, unless frames are handed over in memory by the pipeline
+    if get_streaming(run):
+        if filter_chunks(input_path, output_path, separator, filters,
+                         f.get_runParameter(run, "chunkSize") or pandas.CHUNK_SIZE):
+            f.log("Data filtering and writing process completed.")
+            return
+        f.log("Falling back to filtering the whole file.")
+
     # Read the data from the input file
     f.log("Reading data from input file.")
     data = pandas.read_file(input_path, separator)
 
-    # Retrieve and apply filter rules to the data
-    filters = f.get_runParameter(run, "filters")
-    f.log(f"Applying filters: {filters}")
+    # Apply the filter rules to the data
     data = f.run_filters(data, filters)
 
     # Attempt to write the filtered data to the output file
@@ -135,6 +203,45 @@ def command_filter(run, config):
     f.log("Data filtering and writing process completed.")
 
 
+def get_streaming(run):
+    """
+    Returns whether a run reads its input chunk by chunk: when it sets "streaming": true and frames are not handed
+    over in memory by the pipeline, which keeps whole frames.
+    """
+    if f.get_runParameter(run, "streaming") != True:
+        return False
+    if pandas.frame_registry is not None:
+        f.log("The in-memory pipeline keeps whole frames, reading the input without streaming.")
+        return False
+    return True
+
+
+def filter_chunks(input_path, output_path, separator, filters, chunksize):
+    """
+    Filters a file chunk by chunk, appending the rows kept to the output as it goes.
+
+    Parameters:
+    - input_path (str): The file to filter.
+    - output_path (str): The output file.
+    - separator (str): The CSV separator.
+    - filters (list): The filter rules, see Functions.run_filters.
+    - chunksize (int): The number of rows read at a time.
+
+    Returns:
+    - bool: True when the file was filtered, False when it could not be streamed and has to be read whole instead.
+    """
+    first = True
+    compiled = filter_engine.compile_filters(filters)
+    try:
+        for chunk in pandas.read_chunks(input_path, separator, chunksize):
+            pandas.append_file(compiled.apply(chunk), output_path, separator, first)
+            first = False
+    except Exception as e:
+        f.log(f"Unable to stream {input_path}: {e}")
+        return False
+    return not first
+
+
 def command_validate(run, config):
     """
     Validates transactions to ensure they balance correctly and writes the results to an output file.
@@ -142,18 +249,19 @@ def command_validate(run, config):
     This function performs the following steps:
     1. Retrieves input and output file paths and separator from the `run` and `config` parameters.
     2. Reads data from the input file.
-    3. Filters the data to get transactions.
-    4. For each unique transaction ID, checks if the transaction is valid (i.e., it balances out).
-    5. Writes the validation results to the output file.
+    3. Validates every transaction at once (see pandas.get_transactionImbalances).
+    4. Writes the result of every transaction ID to the output file or, with "failuresOnly", only the transactions
+       that do not balance with the imbalance of each of their Quantity_Types.
 
     Parameters:
-    - run (dict): Contains runtime parameters including input file path and output file path.
+    - run (dict): Contains runtime parameters including input file path, output file path and failuresOnly.
     - config (dict): Contains configuration settings including CSV separator.
     """
     # Retrieve parameters from run and config
     input_path = f.get_runParameter(run, "input")
     output_path = f.get_runParameter(run, "output")
     separator = config["CSV_Separator"]
+    failures_only = f.get_runParameter(run, "failuresOnly") == True
 
     # Log the input parameters
     f.log(f"Input file: {input_path}")
@@ -162,32 +270,21 @@ def command_validate(run, config):
 
     # Read the data from the input file
     f.log("Reading data from input file.")
-    data = pandas.read_file(input_path, separator)
-
-    # Filter data to get only transactions
-    f.log("Filtering data to get transactions.")
-    data = f.filter_data(data, "Equals", "Type", "Transaction")
-
-    # Initialize lists to store results
-    ids = []
-    results = []
+    data = pandas.read_file(input_path, separator, f.get_amountStorage(run, config))
 
-    # Validate each unique transaction ID
+    # Validate all transactions in one grouped pass
     f.log("Validating transactions.")
-    for transaction_ID in data["ID"].unique():
-        # Filter data for the current transaction ID and validate
-        transaction_data = f.filter_data(data, "Equals", "ID", transaction_ID)
-        valid = pandas.validate_Transaction(transaction_data)
-
-        # Append results
-        ids.append(transaction_ID)
-        results.append(valid)
-
-    # Create a DataFrame to hold the validation results
-    results_df = pd.DataFrame({
-        "Transaction ID": ids,
-        "Result": results
-    })
+    results, imbalances = pandas.get_transactionImbalances(data)
+    f.log(f"{(~results).sum()} of {len(results)} transactions do not balance.")
+
+    if failures_only:
+        results_df = imbalances.rename("Imbalance").reset_index().rename(columns={"ID": "Transaction ID"})
+    else:
+        # Create a DataFrame to hold the validation results
+        results_df = pd.DataFrame({
+            "Transaction ID": results.index,
+            "Result": results.to_numpy()
+        })
 
     # Write the validation results to the output file
     f.log("Writing validation results to output file.")
@@ -197,18 +294,19 @@ def command_validate(run, config):
 
 def command_benchmark(run, config):
     """
-    Adds benchmark entries based on a given benchmark ticker. For each transaction in the input data
+    Adds benchmark entries based on one or more benchmark tickers. For each transaction in the input data
     that matches specific criteria, the function calculates the benchmark quantity using the latest
     price of the benchmark ticker and appends a new 'Benchmark' entry to the data.
 
     The function performs the following steps:
-    1. Reads input parameters (file paths, ticker, max depth, etc.).
+    1. Reads input parameters (file paths, tickers, max depth, etc.).
     2. Filters the data for relevant transactions.
-    3. For each matching transaction, calculates the benchmark quantity based on the ticker price.
-    4. Adds a new benchmark entry and writes the updated data to the output file.
+    3. Looks up the price of every ticker on the dates of all matching transactions in one batch.
+    4. Computes the benchmark quantities and appends all benchmark entries at once, then writes the data.
 
     Parameters:
-    - run (dict): Contains runtime parameters including input/output file paths, benchmarkTicker, and benchmark account.
+    - run (dict): Contains runtime parameters including input/output file paths, benchmarkTicker (a ticker or a list
+      of tickers), and benchmark account.
     - config (dict): Contains configuration settings such as the CSV separator.
     """
 
@@ -216,14 +314,16 @@ def command_benchmark(run, config):
     separator = config["CSV_Separator"]
     input_path = f.get_full_Path(run["input"])
     output_path = f.get_full_Path(run["output"])
-    benchmark_ticker = f.get_runParameter(run, "benchmarkTicker")
+    benchmark_tickers = f.get_runParameter(run, "benchmarkTicker")
+    if isinstance(benchmark_tickers, str):
+        benchmark_tickers = [benchmark_tickers]
     max_depth = f.get_runParameter(run, "maxDepth")
 
     # Log the retrieved parameters
     f.log(f"Input file: {input_path}")
     f.log(f"Output file: {output_path}")
     f.log(f"CSV Separator: {separator}")
-    f.log(f"Benchmark Ticker: {benchmark_ticker}")
+    f.log(f"Benchmark Tickers: {benchmark_tickers}")
     f.log(f"Max Depth: {max_depth}")
 
     # Step 2: Read the input file
@@ -238,41 +338,14 @@ def command_benchmark(run, config):
 
     f.log(f"Found {len(entries_filtered)} relevant transactions to process.")
 
-    # Step 4: Iterate over each filtered transaction and calculate benchmark entries
-    for index, row in entries_filtered.iterrows():
-        date = row["Date"]
-
-        # Get price updates and the latest price for the benchmark ticker
-        price_changes = f.get_priceUpdates(entries)
-        price = f.get_LatestPrice(price_changes, row["Date"], benchmark_ticker, row["Quantity_Type"], 0, max_depth)
-
-        # Calculate the benchmark quantity (if no price is found, set quantity to 0)
-        if price is None:
-            f.log(f"No price found for {benchmark_ticker} on {date}, setting quantity to 0.")
-            quantity = 0
-        else:
-            quantity = round(Decimal(row["Quantity"]) / Decimal(price))
-            f.log(f"Price found for {benchmark_ticker} on {date}: {price}, calculated quantity: {quantity}.")
-
-        # Step 5: Create the benchmark entry
-        benchmark_entry = pd.DataFrame([{
-            "Date": date,
-            "Type": "Benchmark",
-            "ID": "Benchmark_" + str(random.randrange(0, 99999999999999)),
-            "Name": benchmark_ticker,
-            "Account": "Benchmark",
-            "Quantity": Decimal(quantity).copy_negate(),  # Set the benchmark quantity as negative
-            "Quantity_Type": benchmark_ticker,
-            "Cost": Decimal(row["Quantity"]).copy_negate(),  # Set the cost as negative
-            "Cost_Type": row["Quantity_Type"],
-        }])
-
-        f.log(f"Generated benchmark entry for {benchmark_ticker} on {date}: {benchmark_entry.to_dict()}")
-
-        # Append the benchmark entry to the main entries data
-        entries = pd.concat([entries, benchmark_entry], ignore_index=True)
-
-    # Step 6: Write the updated entries to the output file
+    # Build the price index once, benchmark rows never add price updates
+    price_index = PriceIndex(f.get_priceUpdates(entries), max_depth)
+
+    # Step 4: Create the benchmark entries of every ticker and append them in one step
+    benchmark_entries = [get_benchmarkEntries(entries_filtered, price_index, ticker) for ticker in benchmark_tickers]
+    entries = pd.concat([entries] + benchmark_entries, ignore_index=True)
+
+    # Step 5: Write the updated entries to the output file
     f.log(f"Writing updated data to {output_path}.")
     pandas.write_file(entries, output_path, separator)
 
@@ -280,6 +353,51 @@ def command_benchmark(run, config):
     pass
 
 
+def get_benchmarkEntries(transactions, price_index, benchmark_ticker):
+    """
+    Creates the benchmark entries of a ticker for a set of transactions: the quantity of the ticker the amount of
+    each transaction would have bought on its date, with the price as of that date.
+
+    Parameters:
+    - transactions (pd.DataFrame): The transactions to mirror.
+    - price_index (PriceIndex): The prices of the ledger.
+    - benchmark_ticker (str): The ticker to buy.
+
+    Returns:
+    - pd.DataFrame: One Benchmark entry per transaction, in the same order.
+    """
+    amounts = transactions["Quantity"].map(Decimal)
+
+    # Price of the ticker in the currency of every transaction, one batched lookup per currency
+    prices = pd.Series(0, index=transactions.index, dtype=object)
+    for currency, group in transactions.groupby("Quantity_Type", sort=False):
+        prices.loc[group.index] = price_index.get_LatestPrices_Path(to_nanoseconds(group["Date"]), benchmark_ticker, currency)
+
+    # Without a price the quantity is 0
+    missing = prices == 0
+    if missing.any():
+        f.log(f"No price found for {benchmark_ticker} on {missing.sum()} dates, setting their quantity to 0.")
+    quantities = pd.Series(0, index=transactions.index, dtype=object)
+    quantities[~missing] = [round(amount / Decimal(price)) for amount, price in zip(amounts[~missing], prices[~missing])]
+    f.log(f"Generated {len(transactions)} benchmark entries for {benchmark_ticker}.")
+
+    # IDs derived from the transaction each benchmark entry mirrors, so running the benchmark again gives the same IDs
+    ids = f.get_hashIDs("Benchmark", zip([benchmark_ticker] * len(transactions), transactions["ID"],
+                                         transactions["Date"], transactions["Quantity"], transactions["Quantity_Type"]))
+
+    return pd.DataFrame({
+        "Date": transactions["Date"].to_numpy(),
+        "Type": "Benchmark",
+        "ID": ids,
+        "Name": benchmark_ticker,
+        "Account": "Benchmark",
+        "Quantity": [Decimal(quantity).copy_negate() for quantity in quantities],  # Set the benchmark quantity as negative
+        "Quantity_Type": benchmark_ticker,
+        "Cost": [amount.copy_negate() for amount in amounts],  # Set the cost as negative
+        "Cost_Type": transactions["Quantity_Type"].to_numpy(),
+    })
+
+
 def command_balance(run, config):
     """
     Calculates account balances and optionally computes fair value if a currency and date are provided.
@@ -292,7 +410,8 @@ def command_balance(run, config):
     5. Writes the results (balance or fair value) to an output file.
 
     Parameters:
-    - run (dict): Contains runtime parameters including input file path and output file path.
+    - run (dict): Contains runtime parameters including input file path and output file path. With "streaming": true
+      the ledger is read "chunkSize" rows at a time, so it does not have to fit in memory.
     - config (dict): Contains configuration settings such as the CSV separator.
     """
 
@@ -312,13 +431,26 @@ def command_balance(run, config):
     f.log(f"Fair Value Date: {fairValueDate}")
     f.log(f"Group Types: {groupTypes}")
 
-    # Step 2: Read the input data
-    f.log("Reading data from input file.")
-    data = pandas.read_file(input_path, separator)
-
-    # Step 3: Get price updates and filter by fair value date if provided
-    f.log("Fetching price updates.")
-    price_changes = f.get_priceUpdates(data)
+    # Step 2: Read the input data, chunk by chunk when streaming, keeping the price updates, the accounts and quantity
+    # types of the filtered entries and their summed quantities
+    filters = f.get_runParameter(run, "filters")
+    f.log(f"Applying filters: {filters}")
+    amounts = f.get_amountStorage(run, config)
+    balance_data = None
+    if get_streaming(run):
+        balance_data = get_balanceData_chunks(input_path, separator, amounts, filters,
+                                              f.get_runParameter(run, "chunkSize") or pandas.CHUNK_SIZE)
+        if balance_data is None:
+            f.log("Falling back to reading the whole file.")
+    if balance_data is None:
+        f.log("Reading data from input file.")
+        data = pandas.read_file(input_path, separator, amounts)
+        filtered_data = f.run_filters(data, filters)
+        balance_data = (pandas.to_decimalAmounts(f.get_priceUpdates(data)), filtered_data["Account"].unique(),
+                        filtered_data["Quantity_Type"].unique(), get_balanceChanges(filtered_data))
+    price_changes, accounts, quantity_types, changes = balance_data
+
+    # Step 3: Filter price updates by fair value date if provided
     if fairValueDate:
         try:
             price_changes = f.filter_data(price_changes, "Max", "Date", fairValueDate)
@@ -326,37 +458,29 @@ def command_balance(run, config):
         except Exception as e:
             f.log(f"No fair value date or error encountered: {str(e)}")
 
-    # Step 4: Filter transactions based on the rules
-    filters = f.get_runParameter(run, "filters")
-    f.log(f"Applying filters: {filters}")
-    filtered_data = f.run_filters(data, filters)
-
-    # Step 5: Cross join accounts and quantity types to create the balance frame
+    # Step 4: Cross join accounts and quantity types to create the balance frame
     f.log("Generating cross-joined frames for accounts and quantity types.")
     balance_frame = pandas.get_crossJoinedFrames(
-        pandas.get_uniqueFrame(filtered_data, "Account"),
-        pandas.get_uniqueFrame(filtered_data, "Quantity_Type")
+        pd.DataFrame({"Account": accounts}),
+        pd.DataFrame({"Quantity_Type": quantity_types})
     )
 
     # Remove rows with missing Account or Quantity_Type
     balance_frame = balance_frame.dropna(subset=["Account", "Quantity_Type"])
 
-    # Step 6: Group by Account and Quantity_Type to sum up the quantities
-    f.log("Calculating total quantities for each Account and Quantity_Type.")
-    changes = filtered_data.groupby(["Account", "Quantity_Type"])["Quantity"].sum()
-
     # Merge the sum into the balance frame and fill missing values with 0
     result = balance_frame.merge(changes, how="left", on=["Account", "Quantity_Type"]).fillna(0)
 
-    # Step 7: If fair value currency is provided, compute fair value
+    # Step 5: If fair value currency is provided, compute fair value
     if fairValueCurrency:
         f.log(f"Calculating fair value using currency {fairValueCurrency}.")
 
         # Fetch the latest prices and calculate fair value
-        result["Price"] = result.apply(
-            lambda x: f.get_LatestPrice(price_changes, fairValueDate, x["Quantity_Type"], fairValueCurrency, 0, 5),
-            axis=1
-        )
+        price_index = PriceIndex(price_changes, 5)
+        result["Price"] = [
+            price_index.get_LatestPrice(fairValueDate, quantity_type, fairValueCurrency)
+            for quantity_type in result["Quantity_Type"]
+        ]
         result["Change_FairValue"] = result["Quantity"] * result["Price"]
 
         # Prepare output data with fair value columns
@@ -366,12 +490,12 @@ def command_balance(run, config):
         # Round values to 4 decimal places for better readability
         output_list = output_list.round({'Change': 4, 'Change_FairValue': 4, 'Price': 4})
 
-        # Step 8: Group types into a single one if required
+        # Step 6: Group types into a single one if required
         if groupTypes:
             f.log("Grouping types into a single one.")
             output_list = output_list[["Account", "Change_FairValue"]].groupby("Account").sum().reset_index()
 
-    # Step 9: If no fair value is required, just return the balance
+    # Step 7: If no fair value is required, just return the balance
     else:
         f.log("No fair value currency provided, calculating raw balance.")
         output_list = result[["Account", "Quantity_Type", "Quantity"]].rename(columns={"Quantity": "Change"})
@@ -379,7 +503,7 @@ def command_balance(run, config):
         # Remove rows with zero balances
         output_list = output_list[output_list["Change"] != 0].round({'Change': 4})
 
-    # Step 10: Write the output to a file
+    # Step 8: Write the output to a file
     f.log(f"Writing the output to {output_path}.")
     pandas.write_file(output_list, output_path, separator)
 
@@ -387,6 +511,64 @@ def command_balance(run, config):
     pass
 
 
+def get_balanceChanges(filtered_data):
+    """
+    Sums the quantities of entries per Account and Quantity_Type.
+
+    Parameters:
+    - filtered_data (pd.DataFrame): The entries, with Decimal or fixed-point amounts.
+
+    Returns:
+    - pd.Series: The Decimal sums, indexed by Account and Quantity_Type.
+    """
+    f.log("Calculating total quantities for each Account and Quantity_Type.")
+    if "Quantity_Scale" in filtered_data.columns:
+        # Fixed-point amounts are summed as integers, every Quantity_Type has a single scale
+        changes = filtered_data.groupby(["Account", "Quantity_Type"]).agg({"Quantity": "sum", "Quantity_Scale": "first"})
+        return pandas.to_decimalAmounts(changes)["Quantity"]
+    return filtered_data.groupby(["Account", "Quantity_Type"])["Quantity"].sum()
+
+
+def get_balanceData_chunks(input_path, separator, amounts, filters, chunksize):
+    """
+    Reads a ledger chunk by chunk for command_balance, keeping only what a balance needs, so the ledger does not have
+    to fit in memory. The quantities are summed per chunk and the sums added up, which gives the same Decimal totals
+    as summing the whole file.
+
+    Parameters:
+    - input_path (str): The ledger file.
+    - separator (str): The CSV separator.
+    - amounts (str): The amount storage, see pandas.read_file.
+    - filters (list): The filter rules of the entries to sum.
+    - chunksize (int): The number of rows read at a time.
+
+    Returns:
+    - tuple or None: The price updates, the accounts and quantity types of the filtered entries in order of
+      appearance and the summed quantities (see get_balanceChanges), or None when the file could not be streamed.
+    """
+    price_changes = []
+    accounts = []
+    quantity_types = []
+    changes = []
+    compiled = filter_engine.compile_filters(filters)
+    try:
+        for chunk in pandas.read_chunks(input_path, separator, chunksize, amounts):
+            price_changes.append(pandas.to_decimalAmounts(f.get_priceUpdates(chunk)))
+            filtered_chunk = compiled.apply(chunk)
+            accounts.append(filtered_chunk["Account"])
+            quantity_types.append(filtered_chunk["Quantity_Type"])
+            changes.append(get_balanceChanges(filtered_chunk))
+    except Exception as e:
+        f.log(f"Unable to stream {input_path}: {e}")
+        return None
+    if len(changes) == 0:
+        return None
+
+    changes = pd.concat(changes)
+    return (pd.concat(price_changes, ignore_index=True), pd.concat(accounts).unique(),
+            pd.concat(quantity_types).unique(), changes.groupby(level=[0, 1]).sum())
+
+
 def command_runningTotal(run, config):
     """
     Generates a running total report based on transaction and benchmark data.
@@ -396,8 +578,8 @@ def command_runningTotal(run, config):
     2. Reads input data from a CSV file and extracts relevant transaction and benchmark data.
     3. Merges the transaction and benchmark data into a single DataFrame.
     4. Applies any specified filters to the data.
-    5. Constructs a DataFrame to hold running totals by performing a cross join of dates, accounts, and quantity types.
-    6. Calculates the quantity changes and running totals, then computes cumulative sums.
+    5. Calculates the quantity changes per period and their running totals for every Account and Quantity_Type.
+    6. Lays the changes and running totals out on the full grid of dates, accounts, and quantity types.
     7. Optionally, if a fair value currency is specified, calculates the fair value of the running totals and changes based on up-to-date prices.
     8. Produces a final output DataFrame, which may aggregate results based on the groupTypes parameter.
     9. Writes the resulting DataFrame to a CSV file.
@@ -443,24 +625,8 @@ def command_runningTotal(run, config):
     startDate = data_filtered["Date"].min()
     endDate = data_filtered["Date"].max()
 
-    # Generate the date, account, and quantity_type combinations for the running total
-    runningTotalFrame = pandas.get_crossJoinedFrames(
-        pandas.get_dateFrame(startDate, endDate, increment),
-        pandas.get_uniqueFrame(data_filtered, "Account")
-    )
-    runningTotalFrame = pandas.get_crossJoinedFrames(
-        runningTotalFrame,
-        pandas.get_uniqueFrame(data_filtered, "Quantity_Type")
-    )
-
-    # Drop rows with missing required information
-    runningTotalFrame = runningTotalFrame.dropna(subset=["Account", "Date", "Quantity_Type"])
-
-    # Calculate changes and cumulative sums
-    change = data_filtered.groupby(by=[pd.Grouper(key='Date', freq=increment), "Account", "Quantity_Type"])["Quantity"].sum()
-    result = runningTotalFrame.merge(change, how="left", on=["Date", "Account", "Quantity_Type"])
-    result = result.fillna(0)
-    result = pandas.get_cumulativesum(result)
+    # Calculate changes and running totals for every date, account and quantity_type combination
+    result = pandas.get_runningTotal(data_filtered, startDate, endDate, increment)
 
     # Check if fair value calculation is required
     if fairValueCurrency:  # fairValueCurrency should be either a string or None
@@ -469,10 +635,8 @@ def command_runningTotal(run, config):
             pandas.get_dateFrame(startDate, endDate, increment),
             pandas.get_uniqueFrame(result, "Quantity_Type")
         )
-        UniquePriceCombo["Price"] = UniquePriceCombo.apply(
-            lambda x: f.get_LatestPrice(PriceChanges, x["Date"], x["Quantity_Type"], fairValueCurrency, 0, 5),
-            axis=1
-        )
+        price_index = PriceIndex(PriceChanges, 5)
+        UniquePriceCombo["Price"] = price_index.get_LatestPrices(UniquePriceCombo, "Date", "Quantity_Type", fairValueCurrency)
 
         # Merge price table with the result and compute fair values
         result = result.merge(UniquePriceCombo, on=["Date", "Quantity_Type"], how="inner")
@@ -517,64 +681,34 @@ def command_chart(run, config):
     separator = config.get("CSV_Separator", ",")
     input = f.get_full_Path(run.get("input"))
     output = f.get_full_Path(run.get("output"))
-    chart_params = {
-        "type": f.get_runParameter(run, "type"),
-        "index_Name": f.get_runParameter(run, "index_Name"),
-        "column_Name": f.get_runParameter(run, "column_Name"),
-        "value_Name": f.get_runParameter(run, "value_Name"),
-        "colormap": f.get_runParameter(run, "colormap"),
-        "title": f.get_runParameter(run, "title"),
-        "invert": f.get_runParameter(run, "invert"),
-        "max_legend_entries": f.get_runParameter(run, "max_legend_entries"),
-        "rounding": f.get_runParameter(run, "rounding")
-    }
+    chart_params = chartFarm.get_chartParameters(run)
 
     # Read the input data
     data = pandas.read_file(input, separator)
     f.log(f"Input data loaded from {input}.")
 
-    # Apply filters to the data
-    filters = f.get_runParameter(run, "filters")
-    data = f.run_filters(data, filters)
-    f.log(f"Applied filters: {filters}.")
-
-    # Invert values if required
-    if chart_params["invert"]:
-        data[chart_params["value_Name"]] = -data[chart_params["value_Name"]]
-        f.log(f"Inverted values in column {chart_params['value_Name']}.")
-
-    # Import the charting class
-    import classes.charts as charts
-    f.log("Charting class imported.")
-
-    # Define chart type to function mapping
-    chart_functions = {
-        "stackedBar": charts.generate_stackedBarChart,
-        "Bar": charts.generate_BarChart,
-        "pieChart": charts.generate_pieChart,
-        "stackedlineChart": charts.generate_stackedlineChart,
-        "lineChart": charts.generate_lineChart
-    }
-
-    # Generate the chart based on the specified type
-    chart_func = chart_functions.get(chart_params["type"])
-    if chart_func:
-        chart_func(data, chart_params["index_Name"], chart_params["column_Name"], chart_params["value_Name"],
-                   output, chart_params["title"], chart_params["colormap"], chart_params["max_legend_entries"],
-                   chart_params["rounding"])
-        f.log(f"Chart of type {chart_params['type']} generated and saved to {output}.")
-    else:
+    # Filter, invert and pivot the data as the chart type requires
+    chart_data = chartFarm.get_chartData(data, run, chart_params)
+    if chart_data is None:
         f.log(f"Invalid chart type specified: {chart_params['type']}")
+        return
 
-    pass
+    # Generate the chart
+    seconds = chartFarm.render_chart(chart_data, chart_params, output)
+    f.log(f"Chart of type {chart_params['type']} generated and saved to {output} in {seconds:.2f} s.")
 
 
 def command_compress(run, config):
     """
     Compresses transaction data into a summary DataFrame and writes it to a file.
 
+    Optional parameters:
+    - cutoffDate: Only the entries up to this date are compressed, the entries after it are kept as they are.
+    - period: "year", "quarter" or "month" to write closing entries for every period instead of a single set. With
+      a cutoffDate, the period of the cutoff date closes on the cutoff date.
+
     Parameters:
-    run (dict): Contains 'input' and 'output' paths.
+    run (dict): Contains 'input' and 'output' paths, and optionally 'cutoffDate' and 'period'.
     config (dict): Configuration containing 'CSV_Separator'.
     """
 
@@ -582,57 +716,35 @@ def command_compress(run, config):
     separator = config["CSV_Separator"]
     input = f.get_full_Path(run["input"])
     output = f.get_full_Path(run["output"])
+    cutoff = f.get_runParameter(run, "cutoffDate")
+    period = f.get_runParameter(run, "period")
+    if period is not None and period not in COMPRESS_PERIODS:
+        f.log(f"Invalid compress period: {period}, expected one of {', '.join(COMPRESS_PERIODS)}. Nothing compressed.")
+        return
 
     # Read transaction files
-    input_data = pandas.read_file(input, separator)
-
-    # Extract different types of entries
-    transactions = f.get_transactions(input_data)
-
-    # Get unique values for multi-index creation
-    unique_Account = transactions["Account"].unique()
-    unique_Quantity_Type = transactions["Quantity_Type"].unique()
-    unique_Cost_Type = transactions["Cost_Type"].unique()
-
-    # Create MultiIndex DataFrame
-    keys = [unique_Account, unique_Quantity_Type, unique_Cost_Type]
-    output_Entries = pd.MultiIndex.from_product(keys, names=["Account", "Quantity_Type", "Cost_Type"]).to_frame()
-
-    # Initialize 'Quantity' and 'Cost' columns with Decimal values
-    output_Entries['Quantity'] = Decimal(0.0)
-    output_Entries['Cost'] = Decimal(0.0)
-
-    # Sort the DataFrame by MultiIndex to optimize performance
-    output_Entries = output_Entries.sort_index()
-    f.log("Initialized MultiIndex DataFrame and sorted by index.")
-
-    # Update the 'Quantity' and 'Cost' columns
-    for index, row in transactions.iterrows():
-        account = row["Account"]
-        quantity_type = row["Quantity_Type"]
-        cost_type = row["Cost_Type"]
-
-        new_quantity = row['Quantity'] if pd.notna(row['Quantity']) else Decimal(0.0)
-        new_cost = row['Cost'] if pd.notna(row['Cost']) else Decimal(0.0)
-
-        # Use .at for scalar updates which can be more efficient
-        loc_index = (account, quantity_type, cost_type)
-        if loc_index in output_Entries.index:
-            current_quantity = output_Entries.at[loc_index, 'Quantity']
-            current_cost = output_Entries.at[loc_index, 'Cost']
+    input_data = pandas.read_file(input, separator, f.get_amountStorage(run, config))
 
-            # Update values
-            output_Entries.at[loc_index, 'Quantity'] = current_quantity + new_quantity
-            output_Entries.at[loc_index, 'Cost'] = current_cost + new_cost
-        else:
-            # If the index is not present, you might need to handle this case
-            f.log(f"Index {loc_index} not found in output_Entries.")
+    # Entries after the cutoff date are kept as they are
+    kept = None
+    compressed_data = input_data
+    if cutoff is not None:
+        cutoff = pd.Timestamp(cutoff)
+        kept = pandas.to_decimalAmounts(input_data.loc[input_data["Date"] > cutoff])
+        compressed_data = input_data.loc[input_data["Date"] <= cutoff]
+        f.log(f"Compressing {len(compressed_data)} entries up to {cutoff.date()}, keeping {len(kept)} later entries.")
 
-    # Drop rows where both 'Quantity' and 'Cost' are NaN
-    output_Entries = output_Entries.dropna(subset=['Quantity', 'Cost'], how='all')
+    # Extract different types of entries
+    transactions = f.get_transactions(compressed_data)
 
-    # Reset index to convert MultiIndex to columns
-    output_Entries_reset = output_Entries.reset_index(drop=True)
+    # Closing entries are dated at the end of their period, at the cutoff date, or at the last date of the data. The
+    # period of the cutoff date closes on the cutoff date, not after the entries kept as they are
+    keys = ["Account", "Quantity_Type", "Cost_Type"]
+    if period is not None:
+        period_ends = transactions["Date"].dt.to_period(COMPRESS_PERIODS[period]).dt.end_time.dt.normalize()
+        transactions = transactions.assign(Date=period_ends.clip(upper=cutoff) if cutoff is not None else period_ends)
+        keys = ["Date"] + keys
+    output_Entries_reset = get_compressedAmounts(transactions, keys)
 
     # Drop rows where both 'Quantity' and 'Cost' are 0.0
     output_Entries_reset = output_Entries_reset[
@@ -640,11 +752,50 @@ def command_compress(run, config):
     ]
 
     # Add additional columns
-    output_Entries_reset["Date"] = max(input_data["Date"])
+    if period is None:
+        output_Entries_reset["Date"] = cutoff if cutoff is not None else max(input_data["Date"])
     output_Entries_reset["Type"] = "Transaction"
-    output_Entries_reset["ID"] = "Compress_" + str(random.randrange(0, 99999999999999))
+
+    # The ID of every set of closing entries is derived from its date and balances, so compressing the same data
+    # again gives the same IDs
+    output_Entries_reset["ID"] = None
+    for date, group in output_Entries_reset.groupby("Date", sort=False):
+        balances = group[["Account", "Quantity_Type", "Cost_Type", "Quantity", "Cost"]].values.tolist()
+        output_Entries_reset.loc[group.index, "ID"] = f.get_hashID("Compress", date, balances)
     output_Entries_reset["Name"] = "End of period compression"
 
+    if kept is not None:
+        output_Entries_reset = pd.concat([output_Entries_reset, kept], ignore_index=True)
+
     # Write the result to a file
     pandas.write_file(output_Entries_reset, output, separator)
-    f.log("Compression complete and data written to file.")
\ No newline at end of file
+    f.log("Compression complete and data written to file.")
+
+
+# Period of the closing entries of command_compress
+COMPRESS_PERIODS = {"year": "Y", "quarter": "Q", "month": "M"}
+
+
+def get_compressedAmounts(transactions, keys):
+    """
+    Sums the Quantity and Cost of transactions per key in one grouped aggregation, so only the combinations that
+    actually occur are built. Missing amounts count as 0.
+
+    Parameters:
+    transactions (pd.DataFrame): The transactions to compress, Decimal or fixed-point amounts.
+    keys (list): The columns to group by, such as Account, Quantity_Type and Cost_Type.
+
+    Returns:
+    pd.DataFrame: The key columns, sorted, and the Decimal Quantity and Cost columns.
+    """
+    if "Quantity_Scale" in transactions.columns:
+        # Fixed-point amounts are summed as integers, a commodity has a single scale
+        compressed = transactions.groupby(keys, dropna=False).agg(
+            {"Quantity": "sum", "Quantity_Scale": "first", "Cost": "sum", "Cost_Scale": "first"}).reset_index()
+        return pandas.to_decimalAmounts(compressed)
+
+    amounts = transactions[keys].assign(
+        Quantity=transactions["Quantity"].map(lambda amount: amount if pd.notna(amount) else Decimal(0.0)),
+        Cost=transactions["Cost"].map(lambda amount: amount if pd.notna(amount) else Decimal(0.0)))
+    f.log(f"Compressing {len(amounts)} transactions.")
+    return amounts.groupby(keys, dropna=False)[["Quantity", "Cost"]].sum().reset_index()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import classes.pandas as pandas
+
+
+class EntryBuilder:
+    """
+    Accumulates ledger entries column by column and returns them as a DataFrame in one step.
+
+    Every column is a preallocated buffer that doubles its capacity when it is full, so appending n entries costs
+    O(n) instead of the O(n²) of concatenating the lists of every entry into new lists. The buffers hold objects, as
+    the amounts are Decimals or strings; the column types are inferred once by to_frame, the same way
+    pd.DataFrame(dict_of_lists) does. Columns not known yet are added on the fly, earlier entries get None in them.
+    """
+
+    def __init__(self, columns=pandas.LEDGER_COLUMNS, capacity=1024):
+        """
+        Parameters:
+        - columns (list): The columns to start with, in order. The ledger columns by default.
+        - capacity (int): The number of entries to preallocate.
+        """
+        self.capacity = max(capacity, 1)
+        self.size = 0
+        self.buffers = {}
+        for column in columns:
+            self.add_column(column)
+
+    def __len__(self):
+        return self.size
+
+    def add_column(self, column):
+        """
+        Adds an empty column, None for every entry already added.
+        """
+        self.buffers[column] = np.full(self.capacity, None, dtype=object)
+
+    def reserve(self, count):
+        """
+        Makes room for count more entries, growing every buffer geometrically.
+        """
+        needed = self.size + count
+        if needed <= self.capacity:
+            return
+
+        capacity = max(self.capacity * 2, needed)
+        for column, buffer in self.buffers.items():
+            grown = np.full(capacity, None, dtype=object)
+            grown[:self.size] = buffer[:self.size]
+            self.buffers[column] = grown
+        self.capacity = capacity
+
+    def append(self, entry):
+        """
+        Adds a single entry.
+
+        Parameters:
+        - entry (dict): The value of every column of the entry.
+        """
+        self.reserve(1)
+        for column, value in entry.items():
+            if column not in self.buffers:
+                self.add_column(column)
+            self.buffers[column][self.size] = value
+        self.size += 1
+
+    def extend(self, entries):
+        """
+        Adds a block of entries.
+
+        Parameters:
+        - entries (dict or pd.DataFrame): A dict of equal-length lists, as built by the parsers, or a DataFrame.
+        """
+        if isinstance(entries, pd.DataFrame):
+            count = len(entries)
+            columns = {column: entries[column].to_numpy(dtype=object) for column in entries.columns}
+        else:
+            columns = entries
+            count = len(next(iter(columns.values()))) if len(columns) != 0 else 0
+
+        self.reserve(count)
+        for column, values in columns.items():
+            if column not in self.buffers:
+                self.add_column(column)
+            buffer = self.buffers[column]
+            if isinstance(values, np.ndarray):
+                buffer[self.size:self.size + count] = values
+            else:
+                # Element by element, so values that are sequences themselves are not broadcast
+                for position, value in enumerate(values, self.size):
+                    buffer[position] = value
+        self.size += count
+
+    def to_frame(self):
+        """
+        Returns the entries added so far.
+
+        Returns:
+        - pd.DataFrame: One row per entry, with the columns in the order they were added.
+        """
+        return pd.DataFrame({column: buffer[:self.size].tolist() for column, buffer in self.buffers.items()})
@@ -0,0 +1,271 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from classes.functions import Functions as f
+
+# Filter types comparing a column to a value, and the groups combining other filters
+CONDITION_TYPES = ["Min", "Max", "Equals", "Contains", "In", "NotIn", "StartsWith", "Between", "Regex"]
+GROUP_TYPES = ["And", "Or", "Not"]
+
+# Filter types comparing amounts by value, which compare fixed-point amounts in the minor units of every row
+SCALED_TYPES = ["Min", "Max", "Equals", "In", "NotIn", "Between"]
+
+
+class FilterCondition:
+    """
+    A filter comparing one column to a value.
+
+    The value is cast once per column type to the type of the column, instead of every row being compared to the
+    value as written in the JSON: dates as Timestamps for datetime columns, numbers as floats for numeric columns and
+    as Decimals for columns of Decimal amounts. Amounts stored as fixed-point integers (see
+    pandas.to_fixedAmounts) are compared to the value in the minor units of the scale of their row.
+    """
+
+    def __init__(self, type, column, value):
+        self.type = type
+        self.column = column
+        self.value = value
+        self.casts = {}
+        self.scaled = []
+
+    def get_value(self, values):
+        """
+        Returns the value of the filter cast to the type of a column, cast once per column type.
+        """
+        key = str(values.dtype)
+        if key not in self.casts:
+            if isinstance(self.value, list):
+                self.casts[key] = [cast_value(value, values) for value in self.value]
+            else:
+                self.casts[key] = cast_value(self.value, values)
+        return self.casts[key]
+
+    def get_scaledValues(self, scales):
+        """
+        Returns the values of the filter in the minor units of fixed-point amounts, scaled once per scale.
+
+        Parameters:
+        - scales (np.ndarray): The scale of every row.
+
+        Returns:
+        - np.ndarray: One row per value of the filter, holding the value in the minor units of every row.
+        """
+        top = int(scales.max(initial=0))
+        if len(self.scaled) <= top:
+            values = self.value if isinstance(self.value, list) else [self.value]
+            self.scaled = [[scale_value(value, scale) for value in values] for scale in range(top + 1)]
+        return np.array(self.scaled, dtype=float).reshape(top + 1, -1)[scales].T
+
+    def get_mask(self, data, rows=None):
+        """
+        Returns which rows of a frame the filter keeps.
+
+        Parameters:
+        - data (pd.DataFrame): The frame to filter.
+        - rows (np.ndarray): The positions of the rows to look at, all rows when None.
+
+        Returns:
+        - np.ndarray: True for the rows kept, one value per row looked at. Empty cells are never kept, except by NotIn.
+        """
+        values = data[self.column]
+        if rows is not None:
+            values = values.iloc[rows]
+        if self.type in SCALED_TYPES and self.column + "_Scale" in data.columns:
+            scales = data[self.column + "_Scale"].to_numpy()
+            return self.get_scaledMask(values, scales if rows is None else scales[rows])
+        value = self.get_value(values)
+
+        if self.type == "Min":
+            mask = values >= value
+        elif self.type == "Max":
+            mask = values <= value
+        elif self.type == "Between":
+            mask = (values >= value[0]) & (values <= value[1])
+        elif self.type == "Equals":
+            mask = values == value
+        elif self.type == "In":
+            mask = values.isin(value)
+        elif self.type == "NotIn":
+            mask = ~values.isin(value)
+        elif self.type == "Contains":
+            mask = values.str.contains(value, regex=False, na=False)
+        elif self.type == "StartsWith":
+            mask = values.str.startswith(tuple(value) if isinstance(value, list) else value, na=False)
+        else:
+            mask = values.str.contains(value, regex=True, na=False)
+        return to_mask(mask)
+
+    def get_scaledMask(self, values, scales):
+        """
+        Returns which fixed-point amounts the filter keeps, see get_mask.
+
+        Parameters:
+        - values (pd.Series): The amounts as integer minor units.
+        - scales (np.ndarray): The scale of every amount.
+        """
+        scaled = self.get_scaledValues(scales)
+        if self.type == "Min":
+            return to_mask(values >= scaled[0])
+        if self.type == "Max":
+            return to_mask(values <= scaled[0])
+        if self.type == "Between":
+            return to_mask((values >= scaled[0]) & (values <= scaled[1]))
+
+        # Equals, In and NotIn
+        mask = np.zeros(len(values), dtype=bool)
+        for value in scaled:
+            mask |= to_mask(values == value)
+        return ~mask if self.type == "NotIn" else mask
+
+
+class FilterGroup:
+    """
+    Filters combined into one: rows kept by every filter ("And"), by any filter ("Or"), or by not every filter
+    ("Not").
+    """
+
+    def __init__(self, type, filters):
+        self.type = type
+        self.filters = filters
+
+    def get_mask(self, data, rows=None):
+        """
+        Returns which rows of a frame the group keeps, see FilterCondition.get_mask.
+        """
+        size = len(data) if rows is None else len(rows)
+        if self.type == "Or":
+            mask = np.zeros(size, dtype=bool)
+            for filter in self.filters:
+                mask |= filter.get_mask(data, rows)
+            return mask
+
+        mask = np.ones(size, dtype=bool)
+        for filter in self.filters:
+            # Once most rows are dropped, the next filters only look at the rows still kept
+            kept = np.flatnonzero(mask)
+            if len(kept) < size // 2:
+                mask[kept] = filter.get_mask(data, kept if rows is None else rows[kept])
+            else:
+                mask &= filter.get_mask(data, rows)
+        return ~mask if self.type == "Not" else mask
+
+    def apply(self, data):
+        """
+        Returns the rows of a frame the filters keep, selected at once with the combined mask of every filter.
+
+        Parameters:
+        - data (pd.DataFrame): The frame to filter, not modified.
+
+        Returns:
+        - pd.DataFrame: The rows kept, or data itself when there is nothing to filter.
+        """
+        if len(self.filters) == 0:
+            return data
+        return data.loc[self.get_mask(data)]
+
+
+def compile_filters(filters):
+    """
+    Compiles the filters of a run once, so they can be applied to any number of frames or chunks.
+
+    Every filter has a "type". Min, Max, Equals, Contains, In, NotIn, StartsWith, Between and Regex compare a "column"
+    to a "value": Min and Max are inclusive bounds (no bound without a value), Between takes a [min, max] value, In
+    and NotIn a list of values, Contains a text found anywhere in the column (as written, not a regular expression),
+    StartsWith a prefix or a list of prefixes and Regex a regular expression searched in the column. And, Or and Not
+    combine the list of "filters" of the group: Not keeps the rows that the filters of its group together do not. A
+    group without filters filters nothing. The filters of the list are combined like an And group.
+
+    Parameters:
+    - filters (list): The filters, None for none.
+
+    Returns:
+    - FilterGroup: The compiled filters. Filters of an unknown type or without the required value are logged and
+      left out.
+    """
+    return FilterGroup("And", compile_list(filters or []))
+
+
+def compile_list(filters):
+    compiled = []
+    for filter in filters:
+        filter = compile_filter(filter)
+        if filter is not None:
+            compiled.append(filter)
+    return compiled
+
+
+def compile_filter(filter):
+    """
+    Compiles one filter, see compile_filters.
+
+    Returns:
+    - FilterCondition, FilterGroup or None: The compiled filter, None when it filters nothing.
+    """
+    type = f.get_runParameter(filter, "type")
+    if type in GROUP_TYPES:
+        # A group without filters, or whose filters were all left out, filters nothing
+        filters = compile_list(f.get_runParameter(filter, "filters") or [])
+        return FilterGroup(type, filters) if len(filters) > 0 else None
+    if type not in CONDITION_TYPES:
+        f.log(f"Unknown filter type {type}, ignoring filter {filter}.")
+        return None
+
+    column = f.get_runParameter(filter, "column")
+    value = filter.get("value")
+    if type in ["Min", "Max"] and value is None:
+        return None
+    if type == "Between" and not (isinstance(value, list) and len(value) == 2):
+        f.log(f"A Between filter needs a [min, max] value, ignoring filter {filter}.")
+        return None
+    if type in ["In", "NotIn"] and not isinstance(value, list):
+        value = [value]
+    return FilterCondition(type, column, value)
+
+
+def cast_value(value, values):
+    """
+    Casts a value from the JSON of a filter to the type of the column it is compared to.
+
+    Parameters:
+    - value: The value.
+    - values (pd.Series): The column.
+
+    Returns:
+    - The cast value, or the value as it is when it does not convert.
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    try:
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            return pd.Timestamp(value)
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            return float(value)
+        # Amounts are stored as Decimals, which only equal the Decimal of a number
+        if values.dtype == object and isinstance(value, (int, float)):
+            return Decimal(str(value))
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def scale_value(value, scale):
+    """
+    Returns a value from the JSON of a filter in minor units of a scale, exactly like pandas.to_fixedAmounts scales
+    an amount (0.5 at scale 2 is 50), or NaN, which equals nothing, when it is not a number.
+    """
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(Decimal(str(value)).scaleb(scale))
+    except (TypeError, ValueError, ArithmeticError):
+        return np.nan
+
+
+def to_mask(mask):
+    """
+    Returns a comparison result as a boolean array, empty results as False.
+    """
+    if isinstance(mask, pd.Series):
+        return mask.to_numpy(dtype=bool, na_value=False)
+    return np.asarray(mask, dtype=bool)
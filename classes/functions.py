@@ -1,4 +1,4 @@
-import datetime
+import hashlib
 import json
 import os
 import csv
@@ -7,10 +7,10 @@ import xml
 import xml.etree.ElementTree as ET
 import typing
 
-import itertools
-
 from decimal import Decimal
 
+import classes.logger as logger
+
 class Functions:
     def import_json(filename):
 
@@ -33,25 +33,31 @@ class Functions:
         """Return a list of files only (not folders) within the given directory"""
         return [os.path.join(folder, f) for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f))]
 
-    def read_XML(file):
-        tree = ET.parse(file)
-        root = tree.getroot()
-        return root
-    pass
-
-    def get_XML_Tag_All(XML):
-        return [{'tag': elem.tag, 'attrs': elem.attrib} for elem in XML.iter() ]
-    pass
-
-    def combine_lists(dict1, dict2):
-        combined = {}
-        if len(dict1)==0:
-            return dict2
-        if len(dict2)==0:
-            return dict1
-        for key in set(list(dict1.keys()) + list(dict2.keys())):
-            combined[key] = list(itertools.chain(dict1.get(key, []), dict2.get(key, [])))
-        return combined
+    def iter_XML_Tags(file, tags):
+        """
+        Streams the elements of an XML file with one of the given tags, in document order, without building the
+        whole tree: every element is cleared and detached from its parent once it ends, so memory stays flat
+        regardless of the file size.
+
+        Parameters:
+        - file (str): Path to the XML file.
+        - tags (set): The tags to yield.
+
+        Returns:
+        - generator: A {'tag', 'attrs'} dict for every matching element.
+        """
+        parents = []
+        for event, elem in ET.iterparse(file, events=("start", "end")):
+            if event == "start":
+                # Attributes are complete on the start event, which yields parents before their children
+                if elem.tag in tags:
+                    yield {'tag': elem.tag, 'attrs': dict(elem.attrib)}
+                parents.append(elem)
+            else:
+                parents.pop()
+                elem.clear()
+                if parents:
+                    parents[-1].remove(elem)
 
     def get_priceUpdates(entries):
         return entries.loc[(entries['Type'] == "PriceUpdate")  ]
@@ -62,39 +68,52 @@ class Functions:
     def get_benchmark(entries):
         return entries.loc[(entries['Type'] == "Benchmark")  ]
 
-    def get_LatestPrice(PriceChanges, date, Ticker, currency, depth, maxDepth):
-        if Ticker == currency:
-            return 1
-
-        priceOptions = PriceChanges.loc[(PriceChanges['Date'] <= date) & (PriceChanges['Quantity_Type'] == Ticker)][
-            "Cost_Type"].unique()
-        if len(priceOptions) == 0:
-            return 0
-
-        try:
-            price = PriceChanges.loc[(PriceChanges['Date'] <= date) & (PriceChanges['Quantity_Type'] == Ticker) & (
-                        PriceChanges['Cost_Type'] == currency)].sort_values(by="Date", ascending=False).iloc[0]['Cost']
-        except:
-            depth = depth + 1
-            if depth < maxDepth:
-
-                for option in priceOptions:
-                    price = Functions.get_LatestPrice(PriceChanges, date, option, currency, depth, maxDepth)
-                    if price != None:
-                        price = price * Functions.get_LatestPrice(PriceChanges, date, Ticker, option, depth, maxDepth)
-                        return price
-            return 0
-        return price
-
-
-
-
-    def log(logData):
-        with open("log.txt", "a") as myfile:
-            time = str(datetime.datetime.now())
-            log = time + ": " + str(logData) + "\n"
-            myfile.write(log)
-        print( log)
+    def get_hashID(prefix, *values):
+        """
+        Returns an ID derived from the content of an entry, so the same entry always gets the same ID.
+
+        Parameters:
+        - prefix (str): The source of the entry, such as "N26".
+        - values: The values identifying the entry.
+
+        Returns:
+        - str: "<prefix>_<first 16 hex digits of the SHA-256 of the values>".
+        """
+        content = "|".join(str(value) for value in (prefix,) + values)
+        return f"{prefix}_{hashlib.sha256(content.encode()).hexdigest()[:16]}"
+
+    def get_hashIDs(prefix, rows):
+        """
+        Returns content-derived IDs for a sequence of entries, numbering entries with identical values in order of
+        appearance, so two identical transactions on the same day get different IDs while re-importing the same
+        statement gives the same IDs again.
+
+        Parameters:
+        - prefix (str): The source of the entries.
+        - rows (iterable): A tuple of identifying values (date, amount, counterparty...) for every entry.
+
+        Returns:
+        - list: The IDs, in the order of rows.
+        """
+        sequence = {}
+        ids = []
+        for values in rows:
+            values = tuple(values)
+            sequence[values] = sequence.get(values, -1) + 1
+            ids.append(Functions.get_hashID(prefix, *values, sequence[values]))
+        return ids
+
+    def log(logData, *args, level="info"):
+        """
+        Writes a message to log.txt and the console through the buffered log (see classes.logger).
+
+        Parameters:
+        - logData: The message, a %-style format string for args, or a callable returning the message. It is only
+          formatted when level is enabled.
+        - args: The values of the format string.
+        - level (str): "debug", "info", "warning" or "error".
+        """
+        logger.log(logData, *args, level=level)
 
     def get_runParameter(run, parameter):
         try:
@@ -106,26 +125,25 @@ class Functions:
             output = None
         return output
 
+    def get_amountStorage(run, config):
+        """Return how a run stores amounts in memory: the run's "amountStorage", else the config's "AmountStorage", else "decimal" """
+        output = Functions.get_runParameter(run, "amountStorage")
+        if output == None:
+            output = Functions.get_runParameter(config, "AmountStorage")
+        if output == None:
+            output = "decimal"
+        return output
+
     def run_filters(data, filters):
+        """
+        Returns the rows of a frame kept by the filters of a run, selected at once (see filters.compile_filters for
+        the filter types). Runs filtering many chunks compile their filters once with filters.compile_filters instead.
+        """
         if filters == None:
             return  data
 
-        filtered_data = data
-        for filter in filters:
-            type = Functions.get_runParameter(filter, "type")
-            column = Functions.get_runParameter(filter, "column")
-            value = Functions.get_runParameter(filter, "value")
-            filtered_data = Functions.filter_data(filtered_data, type, column, value)
-        return filtered_data
+        import classes.filters as filter_engine
+        return filter_engine.compile_filters(filters).apply(data)
 
     def filter_data(data, type, column, value):
-        if type == "Min":
-            return data.loc[(data[column] >= value)]
-        elif type == "Max":
-            return data.loc[(data[column] <= value)]
-        elif type == "Contains":
-            return data.loc[(data[column].str.contains(value)==True)]
-        elif type == "Equals":
-            return data.loc[(data[column]==value)]
-        else:
-            return data
\ No newline at end of file
+        return Functions.run_filters(data, [{"type": type, "column": column, "value": value}])
@@ -0,0 +1,162 @@
+import datetime
+import hashlib
+import json
+import os
+
+from classes.functions import Functions as f
+import classes.scheduler as scheduler
+
+
+# Config entry of the parser configuration for every parser type reading local statement files
+PARSER_CONFIGS = {"IBKR": "Config_IBKR", "n26": "Config_n26", "wise": "Config_wise"}
+
+# Config entries that only change how runs are executed, not what they produce
+EXECUTION_SETTINGS = ["Incremental", "Manifest", "InMemoryPipeline", "Workers", "ChartWorkers", "LogLevel", "LogFile",
+                      "LogMaxBytes", "LogBackups", "LogConsole", "Profile", "ProfileRun", "ProfileMemory"]
+
+
+class Manifest:
+    """
+    Fingerprints of the runs of previous executions, used to skip runs whose inputs did not change.
+
+    The fingerprint of a run is a hash of its parameters, the config, the content of every file it reads and, for
+    parsers, the parser configuration, the statement files in its input folder and its rules table. Outputs of
+    earlier runs are inputs like any other file, so a change propagates down the runs DAG only as far as it changes
+    the files in between. File hashes are kept with the size and modification time of the file, so unchanged files
+    are not read again. Sources fetched from the internet (yFinance) are refreshed once per day.
+    """
+
+    def __init__(self, config, runs):
+        """
+        Parameters:
+        - config (dict): The configuration. "Manifest" is the path of the manifest file.
+        - runs (list): The runs from runs.json.
+        """
+        self.path = f.get_full_Path(f.get_runParameter(config, "Manifest") or "Files/output/manifest.json")
+        self.config = config
+        self.produced = {}
+
+        # A run is known by its output path, numbered when several runs write the same output
+        self.keys = []
+        for index, run in enumerate(runs):
+            outputs = scheduler.get_runPaths(run)[1]
+            name = outputs[0] if outputs else f"{f.get_runParameter(run, 'task')}_{index}"
+            self.keys.append(f"{name}#{sum(1 for key in self.keys if key.startswith(name + '#'))}")
+
+        try:
+            with open(self.path, "r") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            data = {}
+        self.files = data.get("files", {})
+        self.runs = data.get("runs", {})
+
+    def save(self):
+        """
+        Writes the manifest file.
+        """
+        with open(self.path, "w") as manifest_file:
+            json.dump({"files": self.files, "runs": self.runs}, manifest_file, indent=1, sort_keys=True)
+
+    def get_fileHash(self, path):
+        """
+        Returns the content hash of a file, reusing the stored hash while its size and modification time match.
+
+        Parameters:
+        - path (str): The full path of the file.
+
+        Returns:
+        - str or None: The SHA-256 of the file, or None if it does not exist.
+        """
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if known is not None and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            return known["hash"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        self.files[path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def get_sourceFiles(self, run):
+        """
+        Returns the files a parser run reads besides its run parameters: its parser configuration, the statements in
+        its input folder and its rules table.
+        """
+        config_key = PARSER_CONFIGS.get(f.get_runParameter(run, "type"))
+        if f.get_runParameter(run, "task") != "parser" or config_key is None:
+            return []
+
+        parser_path = f.get_full_Path(self.config[config_key])
+        files = [parser_path]
+        try:
+            parser_config = f.import_json(parser_path)
+            input_folder = f.get_full_Path(parser_config["input"])
+            if os.path.isdir(input_folder):
+                files += sorted(f.get_ListFilesInDir(input_folder))
+            if f.get_runParameter(parser_config, "RulesTable") is not None:
+                files.append(f.get_full_Path(parser_config["RulesTable"]))
+        except (OSError, ValueError, KeyError) as e:
+            f.log(f"Unable to list the source files of run {run}: {e}")
+        return files
+
+    def get_fingerprint(self, run):
+        """
+        Returns the fingerprint of a run as it would execute now.
+
+        Parameters:
+        - run (dict): The run from runs.json.
+
+        Returns:
+        - str: The SHA-256 of everything the run depends on.
+        """
+        inputs = scheduler.get_runPaths(run)[0]
+        content = {
+            "run": run,
+            "config": {key: value for key, value in self.config.items() if key not in EXECUTION_SETTINGS},
+            # Outputs only kept in memory have no file, their producing run stands in for them
+            "inputs": {path: self.get_fileHash(path) or self.produced.get(path) for path in inputs},
+            "sources": {path: self.get_fileHash(path) for path in self.get_sourceFiles(run)},
+        }
+        if f.get_runParameter(run, "type") == "yFinance":
+            content["day"] = str(datetime.date.today())
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_upToDate(self, index, run, fingerprint):
+        """
+        Returns whether a run can be skipped: it ran before with the same fingerprint and its output still exists.
+        """
+        outputs = scheduler.get_runPaths(run)[1]
+        if len(outputs) == 0 or not all(os.path.exists(path) for path in outputs):
+            return False
+        if self.runs.get(self.keys[index]) != fingerprint:
+            return False
+
+        for path in outputs:
+            self.produced[path] = fingerprint
+        return True
+
+    def record(self, index, run, fingerprint):
+        """
+        Stores the fingerprint of a run that completed and saves the manifest.
+        """
+        self.runs[self.keys[index]] = fingerprint
+        for path in scheduler.get_runPaths(run)[1]:
+            self.produced[path] = fingerprint
+        self.save()
+
+
+def get_manifest(config, runs):
+    """
+    Returns the manifest for an incremental execution, or None when "Incremental" is not enabled in the config.
+    """
+    if f.get_runParameter(config, "Incremental") == True:
+        manifest = Manifest(config, runs)
+        f.log(f"Incremental execution, manifest: {manifest.path}")
+        return manifest
+    return None
@@ -0,0 +1,180 @@
+import atexit
+import datetime
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+# Settings of the log in the config and their defaults, see configure()
+LOG_SETTINGS = {"LogLevel": "INFO", "LogFile": "log.txt", "LogMaxBytes": 10 * 1024 * 1024, "LogBackups": 3,
+                "LogConsole": True}
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class LogWriter:
+    """
+    Writes the lines of the log to the log file, rotating it, and to the console.
+
+    The file stays open and is flushed once the pending lines are written. Once the file reaches max_bytes it is
+    renamed to "<file>.1" (older files shift up to "<file>.<backups>") and a new file is started; only the main
+    process rotates, so worker processes appending to the same file never rename it under each other.
+    """
+
+    def __init__(self, path, max_bytes, backups, console, rotate):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.console = console
+        self.rotate = rotate
+        self.file = open(path, "a")
+
+    def write(self, created, message):
+        """
+        Writes a line, "<date and time>: <message>" as the lines of log.txt always looked.
+        """
+        line = f"{datetime.datetime.fromtimestamp(created)}: {message}\n"
+        if self.rotate and self.max_bytes > 0 and self.file.tell() + len(line) > self.max_bytes and self.file.tell() > 0:
+            self.do_rotation()
+        self.file.write(line)
+        if self.console:
+            print(line, end="")
+
+    def do_rotation(self):
+        """
+        Renames the log file to the first backup and starts a new file.
+        """
+        self.file.close()
+        if self.backups > 0:
+            for number in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{number}"):
+                    os.replace(f"{self.path}.{number}", f"{self.path}.{number + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "a")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BufferedLog:
+    """
+    The log of a process. In the main process the lines are queued and written by a background thread, so logging
+    costs the caller a queue put instead of opening and writing the file. Worker processes exit without waiting for
+    such a thread, so they write their lines directly.
+    """
+
+    def __init__(self, settings):
+        self.level = LEVELS.get(str(settings["LogLevel"]).lower(), LEVELS["info"])
+        main = multiprocessing.parent_process() is None
+        self.writer = LogWriter(settings["LogFile"], settings["LogMaxBytes"], settings["LogBackups"],
+                                settings["LogConsole"], main)
+        self.pid = os.getpid()
+        self.lines = None
+        self.thread = None
+        if main:
+            self.lines = queue.SimpleQueue()
+            self.thread = threading.Thread(target=self.run, name="log writer", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        """
+        Writes the queued lines until the None sent by close, flushing whenever the queue is empty.
+        """
+        while True:
+            line = self.lines.get()
+            while line is not None:
+                self.writer.write(*line)
+                try:
+                    line = self.lines.get_nowait()
+                except queue.Empty:
+                    break
+            self.writer.flush()
+            if line is None:
+                return
+
+    def write(self, message):
+        if self.lines is not None:
+            self.lines.put((time.time(), message))
+        else:
+            self.writer.write(time.time(), message)
+            self.writer.flush()
+
+    def close(self):
+        """
+        Writes the pending lines and closes the log file.
+        """
+        if self.thread is not None:
+            self.lines.put(None)
+            self.thread.join()
+        self.writer.close()
+
+
+# The settings in use and the log of the current process, started on first use
+settings = dict(LOG_SETTINGS)
+current = None
+
+
+def get_log():
+    """
+    Returns the log of the current process, starting it if needed: a forked worker process inherits the log of its
+    parent but not the thread writing it.
+    """
+    global current
+    if current is None or current.pid != os.getpid():
+        current = BufferedLog(settings)
+    return current
+
+
+def configure(config):
+    """
+    Applies the log settings of the config ("LogLevel", "LogFile", "LogMaxBytes", "LogBackups", "LogConsole"),
+    restarting the log only when they changed.
+
+    Parameters:
+    - config (dict): The configuration.
+    """
+    global settings
+    new_settings = {key: config.get(key, default) if config.get(key, "") != "" else default
+                    for key, default in LOG_SETTINGS.items()}
+    if new_settings != settings:
+        stop()
+        settings = new_settings
+
+
+def stop():
+    """
+    Writes the pending lines and closes the log, the next message starts it again.
+    """
+    global current
+    if current is not None and current.pid == os.getpid():
+        current.close()
+    current = None
+
+
+def log(message, *args, level="info"):
+    """
+    Logs a message if its level is enabled.
+
+    The message is only built when its level is enabled: it is either a %-style format string with args, or a
+    callable returning the message, so messages that are costly to build cost nothing otherwise.
+
+    Parameters:
+    - message: The message, a format string for args, or a callable returning the message.
+    - args: The values of the format string.
+    - level (str): "debug", "info", "warning" or "error".
+    """
+    log = get_log()
+    if LEVELS.get(level, LEVELS["info"]) < log.level:
+        return
+    if callable(message):
+        message = message()
+    log.write(str(message) % args if args else str(message))
+
+
+atexit.register(stop)
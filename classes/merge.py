@@ -0,0 +1,134 @@
+import os
+
+import pandas as pd
+from classes.functions import Functions as f
+import classes.pandas as pandas
+
+
+class SortedInput:
+    """
+    One input of the streaming merge: the chunks of a ledger file sorted by Date, and the rows read but not merged
+    yet. Every chunk is checked to continue the order of the previous ones.
+    """
+
+    def __init__(self, path, separator, chunksize):
+        """
+        Parameters:
+        - path (str): Path to the ledger file.
+        - separator (str): The CSV separator.
+        - chunksize (int): The number of rows read at a time.
+        """
+        self.path = path
+        self.chunks = pandas.read_chunks(path, separator, chunksize)
+        self.buffer = pd.DataFrame(columns=pandas.LEDGER_COLUMNS)
+        self.last = None
+        self.done = False
+
+    def read(self):
+        """
+        Appends the next chunk of the file to the buffered rows.
+
+        Returns:
+        - bool: False when the chunk is not a ledger sorted by Date after the chunks read before, True otherwise.
+        """
+        chunk = next(self.chunks, None)
+        while chunk is not None and chunk.empty:
+            chunk = next(self.chunks, None)
+        if chunk is None:
+            self.done = True
+            return True
+
+        if not set(pandas.LEDGER_COLUMNS).issubset(chunk.columns):
+            f.log(f"{self.path} is missing ledger columns.")
+            return False
+        dates = chunk["Date"]
+        if dates.isna().any() or not dates.is_monotonic_increasing or (self.last is not None and dates.iloc[0] < self.last):
+            f.log(f"{self.path} is not sorted by Date.")
+            return False
+
+        self.last = dates.iloc[-1]
+        chunk = chunk[pandas.LEDGER_COLUMNS]
+        self.buffer = chunk if self.buffer.empty else pd.concat([self.buffer, chunk], ignore_index=True)
+        return True
+
+    def take(self, bound):
+        """
+        Removes the buffered rows dated before bound, or all of them when bound is None, and returns them.
+        """
+        if bound is None:
+            rows, self.buffer = self.buffer, self.buffer.iloc[0:0]
+            return rows
+        before = (self.buffer["Date"] < bound).to_numpy()
+        rows, self.buffer = self.buffer.loc[before], self.buffer.loc[~before]
+        return rows
+
+
+def merge_sortedFiles(paths, output, separator, chunksize, duplicates):
+    """
+    Merges ledger files that are each sorted by Date into one sorted file with a k-way merge, writing the output as it
+    goes: memory is bounded by the chunks held per input instead of the whole ledger, and there is no global sort.
+
+    Each step merges every buffered row dated before the earliest last-read date of the inputs that still have rows,
+    as no row read later can come before it, and reads the next chunk of the inputs that reached that date. Rows with
+    the same date keep the order of the inputs and of the files, like a stable sort of all inputs concatenated. Equal
+    rows share their date and are therefore merged in the same step, so duplicates are found step by step.
+
+    Parameters:
+    - paths (list): The ledger files, in merge order.
+    - output (str): The output file.
+    - separator (str): The CSV separator.
+    - chunksize (int): The number of rows read at a time from each input.
+    - duplicates (str): "report" logs the duplicate rows, "drop" also removes them, "keep" skips the check.
+
+    Returns:
+    - bool: True when the files were merged, False when an existing input could not be streamed (unreadable, not a
+      ledger or not sorted by Date). The output is then incomplete and the inputs need a full sort instead.
+    """
+    duplicate_count = 0
+    duplicate_ids = []
+    try:
+        # Missing inputs are skipped, like the merge without streaming skips files it cannot read
+        sources = []
+        for path in paths:
+            if os.path.isfile(path):
+                sources.append(SortedInput(path, separator, chunksize))
+            else:
+                f.log(f"Error reading data from {path}: file not found.")
+        if not all(source.read() for source in sources):
+            return False
+        pandas.append_file(pd.DataFrame(columns=pandas.LEDGER_COLUMNS), output, separator, True)
+
+        while True:
+            active = [source for source in sources if not source.done]
+            bound = min(source.last for source in active) if active else None
+
+            rows = pd.concat([source.take(bound) for source in sources], ignore_index=True)
+            if not rows.empty:
+                rows = rows.sort_values(by="Date", kind="stable")
+                if duplicates != "keep":
+                    duplicated = rows.duplicated(subset=pandas.LEDGER_COLUMNS, keep="first")
+                    duplicate_count += int(duplicated.sum())
+                    duplicate_ids.extend(rows.loc[duplicated, "ID"].unique())
+                    if duplicates == "drop":
+                        rows = rows.loc[~duplicated]
+                pandas.append_file(rows, output, separator, False)
+
+            if not active:
+                break
+            for source in active:
+                if source.last == bound and not source.read():
+                    return False
+    except Exception as e:
+        f.log(f"Unable to stream the merge inputs: {e}")
+        return False
+
+    if duplicates == "keep":
+        pass
+    elif duplicate_count == 0:
+        f.log("No duplicate entries found.")
+    else:
+        ids = list(dict.fromkeys(duplicate_ids))
+        f.log(f"Found {duplicate_count} duplicate entries in {len(ids)} transactions: {', '.join(map(str, ids[:20]))}")
+        if duplicates == "drop":
+            f.log("Dropped the duplicate entries.")
+    return True
@@ -1,33 +1,118 @@
+import importlib.util
+import os
+import time
 from decimal import Decimal
 
+import numpy as np
 import pandas as pd
 from classes.functions import Functions as f
+import classes.profiler as profiler
 
+# Columns of a ledger file, in the order they are written
+LEDGER_COLUMNS = ["Date", "Type", "ID", "Name", "Account", "Quantity", "Quantity_Type", "Cost", "Cost_Type"]
 
-def read_file(filepath: str, separator: str) -> pd.DataFrame:
+# Format of the Date column
+DATE_FORMAT = "%Y-%m-%d"
+
+# Rows per chunk when a file is read chunk by chunk, see read_chunks
+CHUNK_SIZE = 100000
+
+# Binary ledger cache written next to every ledger CSV ("parquet", "arrow", "npz" or None), see configure()
+ledger_cache = None
+
+# Frames written in an in-memory pipeline, keyed by full output path (None when the pipeline mode is off), and the
+# outputs that are only kept in memory, see set_frameRegistry()
+frame_registry = None
+memory_only_outputs = set()
+
+
+def configure(config):
+    """
+    Applies the file handling settings of the config.
+
+    Parameters:
+    - config (dict): The configuration. "LedgerCache" selects the binary ledger cache format.
+    """
+    global ledger_cache
+    ledger_cache = f.get_runParameter(config, "LedgerCache")
+    if ledger_cache in ["parquet", "arrow"] and importlib.util.find_spec("pyarrow") is None:
+        f.log(f"pyarrow is not installed, using the npz ledger cache instead of {ledger_cache}.")
+        ledger_cache = "npz"
+
+
+def read_file(filepath: str, separator: str, amounts: str = "decimal") -> pd.DataFrame:
     """
     Reads a CSV file into a DataFrame with optional date parsing and type conversion.
 
     Parameters:
     - filepath: The path to the CSV file.
     - separator: The separator used in the CSV file (e.g., ',' or ';').
+    - amounts: How to store the Quantity and Cost columns: "decimal" for Decimal objects or "fixed" for integer
+      minor units (see to_fixedAmounts).
 
     Returns:
     - A pandas DataFrame containing the parsed file, or an empty DataFrame if an error occurs.
     """
-    try:
-        # Attempt to read the file with date parsing
-        entries = pd.read_csv(filepath_or_buffer=filepath, sep=separator, parse_dates=["Date"], date_format="%Y-%m-%d")
-    except Exception as e:
-        f.log(f"Failed to parse dates from file {filepath}: {e}")
-
-        # Retry without date parsing if the first attempt fails
+    start = time.perf_counter()
+
+    # Prefer a frame handed over by an earlier run of the pipeline, then the binary ledger cache when it is at least
+    # as recent as the CSV
+    source = None
+    entries = get_registeredFrame(filepath)
+    if entries is None:
+        entries = read_ledgerCache(filepath)
+        source = get_ledgerCachePath(filepath)
+
+    if entries is None:
+        source = filepath
         try:
-            entries = pd.read_csv(filepath_or_buffer=filepath, sep=separator)
+            # Read the header once to know whether there is a Date column to parse, instead of retrying the whole file
+            # without date parsing when there is none
+            columns = pd.read_csv(filepath_or_buffer=filepath, sep=separator, nrows=0).columns
+            dates = {"parse_dates": ["Date"], "date_format": DATE_FORMAT} if "Date" in columns else {}
+            entries = pd.read_csv(filepath_or_buffer=filepath, sep=separator, **dates)
         except Exception as e:
             f.log(f"Failed to read file {filepath}: {e}")
-            return pd.DataFrame()  # Return an empty DataFrame if both attempts fail
+            return pd.DataFrame()  # Return an empty DataFrame if the file cannot be read
+
+    entries = to_storedAmounts(entries, filepath, amounts)
+    profiler.add_read(len(entries), profiler.get_fileSize(source), time.perf_counter() - start)
+    return entries
+
+
+def to_storedAmounts(entries, filepath, amounts):
+    """
+    Converts the Quantity and Cost columns of a DataFrame read from a file to the requested amount storage.
+
+    Parameters:
+    - entries: The DataFrame as read from the file.
+    - filepath: The path of the file, for the log.
+    - amounts: "decimal" or "fixed", see read_file.
+
+    Returns:
+    - The DataFrame with converted amounts.
+    """
+    # Keep the amounts as integer minor units if requested, falling back to Decimal when they do not fit
+    if amounts == "fixed" and not entries.empty:
+        fixed = to_fixedAmounts(entries)
+        if fixed is not None:
+            return fixed
+        f.log(f"Amounts in file {filepath} do not fit in fixed-point integers, using Decimal.")
+
+    return to_decimalColumns(entries, filepath)
+
+
+def to_decimalColumns(entries, filepath):
+    """
+    Converts the Quantity and Cost columns of a DataFrame read from a file to Decimal, empty cells to None.
 
+    Parameters:
+    - entries: The DataFrame as read from the file.
+    - filepath: The path of the file, for the log.
+
+    Returns:
+    - The DataFrame with Decimal amounts.
+    """
     # Check if the DataFrame is not empty
     if not entries.empty:
         # Convert "Quantity" and "Cost" columns to Decimal if they exist
@@ -41,6 +126,81 @@ def read_file(filepath: str, separator: str) -> pd.DataFrame:
     return entries
 
 
+def read_chunks(filepath: str, separator: str, chunksize: int, amounts: str = "decimal"):
+    """
+    Reads a CSV file in chunks, so a file larger than memory can be processed one chunk at a time.
+
+    Every chunk is converted like read_file converts a whole file. The schema is settled once, on the first chunk:
+    the ledger columns get fixed types instead of types inferred per chunk (amounts as floats, text as text), and
+    Date is parsed in every chunk when it parses in the first one, otherwise kept as text.
+
+    Parameters:
+    - filepath: The path to the CSV file.
+    - separator: The separator used in the CSV file.
+    - chunksize: The maximum number of rows of a chunk.
+    - amounts: "decimal" or "fixed", see read_file. Fixed-point scales are chosen per chunk.
+
+    Returns:
+    - A generator of DataFrames. Reading errors, and dates of later chunks that do not parse, are raised.
+    """
+    dtypes = {column: str for column in ["Type", "ID", "Name", "Account", "Quantity_Type", "Cost_Type"]}
+    dtypes.update({"Quantity": float, "Cost": float})
+    parse_dates = None
+    with pd.read_csv(filepath_or_buffer=filepath, sep=separator, chunksize=chunksize, dtype=dtypes) as reader:
+        # Only the time spent reading counts as reading, not the time the caller spends on a chunk
+        start = time.perf_counter()
+        for chunk in reader:
+            if parse_dates is None:
+                parse_dates = "Date" in chunk.columns and is_dateColumn(chunk["Date"])
+                if "Date" in chunk.columns and not parse_dates:
+                    f.log(f"Dates in file {filepath} do not parse, keeping them as text.")
+            if parse_dates:
+                chunk["Date"] = pd.to_datetime(chunk["Date"], format=DATE_FORMAT)
+            chunk = to_storedAmounts(chunk, filepath, amounts)
+            profiler.add_read(len(chunk), 0, time.perf_counter() - start)
+            yield chunk
+            start = time.perf_counter()
+    profiler.add_read(0, profiler.get_fileSize(filepath), 0)
+
+
+def is_dateColumn(values):
+    """
+    Returns whether every value of a column parses as a date, empty values aside.
+    """
+    try:
+        pd.to_datetime(values, format=DATE_FORMAT)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def append_file(data, output, separator, first):
+    """
+    Writes a chunk of a frame to a CSV file, so a file can be written incrementally. The chunks are formatted like
+    write_file formats a whole frame: the ledger columns in order when they are all present, otherwise every column.
+
+    Parameters:
+    - data: The chunk.
+    - output: The output file path for the CSV file.
+    - separator: The separator to use in the CSV file.
+    - first (bool): Whether this is the first chunk, which replaces the file and writes the header.
+    """
+    start = time.perf_counter()
+    data = to_decimalAmounts(data)
+    outputfile = f.get_full_Path(output)
+    size = 0 if first else profiler.get_fileSize(outputfile)
+    if first:
+        # The binary ledger cache of the previous file no longer matches, it is written for whole ledgers only
+        cache_path = get_ledgerCachePath(outputfile)
+        if cache_path is not None and os.path.exists(cache_path):
+            os.remove(cache_path)
+        f.log(f"Writing file incrementally to: {outputfile}")
+
+    columns = LEDGER_COLUMNS if set(LEDGER_COLUMNS).issubset(data.columns) else list(data.columns)
+    data.to_csv(outputfile, sep=separator, index=False, mode="w" if first else "a", header=first, columns=columns)
+    profiler.add_write(len(data), profiler.get_fileSize(outputfile) - size, time.perf_counter() - start)
+
+
 def write_file(data, output, separator):
     """
     Writes a DataFrame to a CSV file with specified columns if they exist.
@@ -50,6 +210,10 @@ def write_file(data, output, separator):
     - output: The output file path for the CSV file.
     - separator: The separator to use in the CSV file (e.g., ',' or ';').
     """
+    start = time.perf_counter()
+
+    # Amounts stored as fixed-point integers are written as Decimals
+    data = to_decimalAmounts(data)
 
     # Get the full path for the output file
     outputfile = f.get_full_Path(output)
@@ -58,20 +222,212 @@ def write_file(data, output, separator):
     # Set of columns to check before writing
     columns_to_check = {"Date", "Type", "ID", "Name", "Account", "Quantity", "Quantity_Type", "Cost", "Cost_Type"}
 
+    # Hand the frame to later runs of an in-memory pipeline, possibly without writing it at all
+    if frame_registry is not None:
+        columns = LEDGER_COLUMNS if columns_to_check.issubset(data.columns) else list(data.columns)
+        frame_registry[get_registryKey(outputfile)] = get_typedFrame(data[columns])
+        if get_registryKey(outputfile) in memory_only_outputs:
+            f.log(f"Output kept in memory only: {outputfile}")
+            profiler.add_write(len(data), 0, time.perf_counter() - start)
+            return
+
     # Check if all the specified columns exist in the DataFrame
     if columns_exist(data, columns_to_check):
         # If columns exist, write the CSV with only these columns in the specified order
-        f.log(f"All required columns found. Writing file with specified columns: {columns_to_check}")
+        f.log("All required columns found. Writing file with specified columns: %s", columns_to_check, level="debug")
         data.to_csv(outputfile, sep=separator, index=False, mode="w", header=True,
                     columns=["Date", "Type", "ID", "Name", "Account", "Quantity", "Quantity_Type", "Cost", "Cost_Type"])
+
+        # Keep a typed binary copy next to the CSV for the next read_file
+        write_ledgerCache(data, outputfile)
+        size = profiler.get_fileSize(outputfile) + profiler.get_fileSize(get_ledgerCachePath(outputfile))
     else:
         # If columns don't exist, write the entire DataFrame as-is
         f.log("Not all required columns are present. Writing entire DataFrame.")
         data.to_csv(outputfile, sep=separator, index=False, mode="w", header=True)
+        size = profiler.get_fileSize(outputfile)
 
+    profiler.add_write(len(data), size, time.perf_counter() - start)
     f.log(f"File written successfully to: {outputfile}")
 
 
+def get_typedFrame(data):
+    """
+    Returns a copy of a DataFrame with the column types read_csv produces when reading it back from a CSV: datetime
+    Date, numbers (including Decimals) as int64 or float64 and text with NaN for empty cells.
+
+    Parameters:
+    - data: The DataFrame as it is written.
+
+    Returns:
+    - pd.DataFrame: The typed copy.
+    """
+    frame = pd.DataFrame(index=range(len(data)))
+    for column in data.columns:
+        values = data[column].reset_index(drop=True)
+        if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            # Empty text is read back as an empty cell
+            values = values.astype(object)
+            values = values.where(values.notna() & (values != ""), None)
+            numbers = pd.to_numeric(values, errors="coerce")
+            if numbers.notna().sum() == values.notna().sum() and values.notna().any():
+                # Decimals become floats, unless every value is a whole number
+                whole = values.dropna().map(is_wholeNumber)
+                values = numbers.astype(np.int64) if whole.all() and numbers.notna().all() else numbers.astype(float)
+            else:
+                values = values.map(lambda x: np.nan if x is None else x if isinstance(x, float) else str(x))
+        frame[column] = values.to_numpy()
+
+    if "Date" in frame.columns:
+        try:
+            frame["Date"] = pd.to_datetime(frame["Date"], format=DATE_FORMAT)
+        except (ValueError, TypeError):
+            pass
+    return frame
+
+
+def is_wholeNumber(value):
+    """
+    Returns whether read_csv reads a value back as an integer: an int, or text of digits such as "001".
+    """
+    if isinstance(value, str):
+        return value.strip().lstrip("+-").isdigit()
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def get_registryKey(filepath):
+    """
+    Returns the key of a file in the in-memory frame registry, its normalized full path.
+    """
+    return os.path.normcase(os.path.normpath(f.get_full_Path(filepath)))
+
+
+def set_frameRegistry(enabled, memory_only=()):
+    """
+    Turns the in-memory pipeline mode on or off.
+
+    Parameters:
+    - enabled (bool): Whether write_file should hand frames to read_file through the registry.
+    - memory_only (iterable): Output paths that are only kept in memory and never written to disk.
+    """
+    global frame_registry, memory_only_outputs
+    frame_registry = {} if enabled else None
+    memory_only_outputs = {get_registryKey(path) for path in memory_only} if enabled else set()
+
+
+def release_frame(filepath):
+    """
+    Drops a frame from the in-memory registry once no later run reads it.
+    """
+    if frame_registry is not None:
+        frame_registry.pop(get_registryKey(filepath), None)
+
+
+def get_registeredFrame(filepath):
+    """
+    Returns a copy of the frame an earlier run of the pipeline wrote to filepath, or None if there is none.
+    """
+    if frame_registry is None:
+        return None
+    frame = frame_registry.get(get_registryKey(filepath))
+    if frame is None:
+        return None
+    f.log(f"Using in-memory frame for {filepath}")
+    return frame.copy()
+
+
+def get_ledgerCachePath(filepath):
+    """
+    Returns the path of the binary ledger cache of a CSV file, or None when the cache is disabled.
+    """
+    if ledger_cache is None:
+        return None
+    return f"{filepath}.{ledger_cache}"
+
+
+def write_ledgerCache(data, filepath):
+    """
+    Writes the ledger columns of a DataFrame to the binary ledger cache of a CSV file.
+
+    The cache holds the same types read_csv produces from the CSV (datetime Date, float Quantity and Cost, text with
+    NaN for empty cells), so read_file applies the same amount conversion to either.
+
+    Parameters:
+    - data: The DataFrame that was written to the CSV file.
+    - filepath: The path of the CSV file.
+    """
+    cache_path = get_ledgerCachePath(filepath)
+    if cache_path is None:
+        return
+
+    try:
+        frame = get_typedFrame(data[LEDGER_COLUMNS])
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        for column in ["Quantity", "Cost"]:
+            frame[column] = pd.to_numeric(frame[column], errors="raise").astype(float)
+        for column in ["Type", "ID", "Name", "Account", "Quantity_Type", "Cost_Type"]:
+            frame[column] = frame[column].astype(object).map(lambda x: x if isinstance(x, (str, float)) else str(x))
+
+        if ledger_cache == "parquet":
+            frame.to_parquet(cache_path, index=False)
+        elif ledger_cache == "arrow":
+            frame.to_feather(cache_path)
+        else:
+            # Text is stored as fixed width unicode plus a missing-value mask, so no pickling is needed
+            arrays = {"Date": frame["Date"].to_numpy(dtype="datetime64[ns]")}
+            for column in LEDGER_COLUMNS[1:]:
+                if column in ["Quantity", "Cost"]:
+                    arrays[column] = frame[column].to_numpy()
+                else:
+                    missing = frame[column].isna().to_numpy()
+                    arrays[column] = frame[column].fillna("").to_numpy(dtype=str)
+                    arrays[column + "_missing"] = missing
+            with open(cache_path, "wb") as cache_file:
+                np.savez(cache_file, **arrays)
+        f.log(f"Ledger cache written to: {cache_path}")
+    except Exception as e:
+        f.log(f"Unable to write ledger cache {cache_path}: {e}")
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+
+def read_ledgerCache(filepath):
+    """
+    Reads the binary ledger cache of a CSV file.
+
+    Parameters:
+    - filepath: The path of the CSV file.
+
+    Returns:
+    - pd.DataFrame or None: The cached ledger, or None when there is no cache at least as recent as the CSV.
+    """
+    cache_path = get_ledgerCachePath(filepath)
+    if cache_path is None or not os.path.exists(cache_path):
+        return None
+    if os.path.exists(filepath) and os.path.getmtime(cache_path) < os.path.getmtime(filepath):
+        f.log(f"Ledger cache {cache_path} is older than {filepath}, reading the CSV.")
+        return None
+
+    try:
+        if ledger_cache == "parquet":
+            entries = pd.read_parquet(cache_path)
+        elif ledger_cache == "arrow":
+            entries = pd.read_feather(cache_path)
+        else:
+            with np.load(cache_path, allow_pickle=False) as arrays:
+                entries = pd.DataFrame({"Date": arrays["Date"]})
+                for column in LEDGER_COLUMNS[1:]:
+                    if column in ["Quantity", "Cost"]:
+                        entries[column] = arrays[column]
+                    else:
+                        entries[column] = pd.Series(arrays[column], dtype=object).mask(arrays[column + "_missing"])
+        f.log(f"Read ledger cache: {cache_path}")
+        return entries
+    except Exception as e:
+        f.log(f"Unable to read ledger cache {cache_path}: {e}")
+        return None
+
+
 def columns_exist(data, columns_to_check):
     """
     Checks if all columns in 'columns_to_check' exist in the DataFrame.
@@ -85,36 +441,236 @@ def columns_exist(data, columns_to_check):
     """
 
     # Log the columns being checked and the columns available in the DataFrame
-    f.log(f"Checking if the following columns exist: {columns_to_check}")
-    f.log(f"Available columns in the DataFrame: {set(data.columns)}")
+    f.log("Checking if the following columns exist: %s", columns_to_check, level="debug")
+    f.log("Available columns in the DataFrame: %s", data.columns, level="debug")
 
     # Check if the columns_to_check are a subset of the DataFrame's columns
     if columns_to_check.issubset(data.columns):
-        f.log("All required columns exist.")
+        f.log("All required columns exist.", level="debug")
         return True
 
     # Log if some columns are missing
-    f.log("Some required columns are missing.")
+    f.log("Some required columns are missing.", level="debug")
     return False
 
 
+# Largest number of decimal places kept as fixed-point integers before falling back to Decimal objects
+MAX_FIXEDPOINT_SCALE = 12
+
+
+def get_decimalPlaces(floats):
+    """
+    Returns the number of decimal places every value needs to be represented exactly.
+
+    Parameters:
+    - floats (np.ndarray): The values as floats. Missing values need 0 places.
+
+    Returns:
+    - np.ndarray: The decimal places per value, or -1 where more than MAX_FIXEDPOINT_SCALE places are needed.
+    """
+    places = np.full(len(floats), -1)
+    places[~np.isfinite(floats)] = 0
+    for scale in range(MAX_FIXEDPOINT_SCALE + 1):
+        pending = np.flatnonzero(places < 0)
+        if len(pending) == 0:
+            break
+        exact = np.round(floats[pending] * 10 ** scale) / 10 ** scale == floats[pending]
+        places[pending[exact]] = scale
+    return places
+
+
+def get_fixedPoint(values):
+    """
+    Converts amounts into integers scaled by the smallest power of ten that keeps every value exact.
+
+    Parameters:
+    - values: A Series or array of numbers or Decimals. Missing values count as 0.
+
+    Returns:
+    - (np.ndarray, int): The int64 amounts and their scale (number of decimal places), or None if the amounts need
+      more than MAX_FIXEDPOINT_SCALE decimals or would not fit exactly.
+    """
+    floats = pd.Series(values, dtype=object).fillna(0).astype(float).to_numpy()
+    if len(floats) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    places = get_decimalPlaces(floats)
+    if (places < 0).any():
+        return None
+    scale = int(places.max())
+    scaled = np.round(floats * 10 ** scale)
+
+    # Floats only hold integers exactly up to 2**53
+    if np.abs(scaled).max() >= 2 ** 53:
+        return None
+    return scaled.astype(np.int64), scale
 
-def get_cumulativesum(entries):
-    # Convert 'Quantity' to float for computation
-    entries['Quantity_float'] = entries['Quantity'].apply(lambda x: float(x) if isinstance(x, Decimal) else x)
 
-    # Calculate cumulative sum with float values
-    entries['RunningTotal_float'] = entries.groupby(by=["Account", "Quantity_Type"])['Quantity_float'].cumsum()
+def to_fixedAmounts(entries):
+    """
+    Converts the Quantity and Cost columns into integer minor units with one scale per commodity.
 
-    # Optionally convert the RunningTotal back to Decimal if required
-    entries['RunningTotal'] = entries['RunningTotal_float'].apply(lambda x: Decimal(str(x)))
+    The scale of a commodity is the largest number of decimal places of any Quantity of that Quantity_Type or Cost of
+    that Cost_Type, so amounts in the same commodity can be added directly, whichever column they are in. Amounts
+    are stored as nullable Int64 and their scales in Quantity_Scale and Cost_Scale columns, which travel with the
+    rows through concatenations and groupbys. Filters on Quantity or Cost scale their value by the scale of every row
+    (see filters.FilterCondition), so they keep the same rows as with Decimal amounts. to_decimalAmounts converts
+    them back.
 
-    # Drop temporary columns
-    entries = entries.drop(columns=['Quantity_float', 'RunningTotal_float'])
+    Parameters:
+    - entries (pd.DataFrame): Entries with Quantity and Cost as floats or Decimals.
 
+    Returns:
+    - pd.DataFrame or None: The converted entries, or None if an amount does not fit exactly.
+    """
+    columns = [(column, column + "_Type") for column in ["Quantity", "Cost"] if column in entries.columns]
+    floats = {column: pd.to_numeric(entries[column].astype(object), errors="coerce").astype(float).to_numpy()
+              for column, _ in columns}
+    places = {column: get_decimalPlaces(floats[column]) for column, _ in columns}
+    if any((places[column] < 0).any() for column, _ in columns):
+        return None
+
+    # Largest number of decimal places per commodity across both columns
+    commodity_places = pd.concat([pd.Series(places[column], index=entries[commodity].to_numpy())
+                                  for column, commodity in columns if commodity in entries.columns])
+    commodity_scales = commodity_places.groupby(level=0).max()
+
+    entries = entries.copy()
+    for column, commodity in columns:
+        if commodity in entries.columns:
+            scales = entries[commodity].map(commodity_scales).to_numpy(dtype=float)
+        else:
+            scales = np.full(len(entries), np.nan)
+        scales = np.where(np.isnan(scales), places[column], scales).astype(np.int8)
+        scaled = np.round(floats[column] * 10.0 ** scales)
+        if np.nanmax(np.abs(scaled), initial=0) >= 2 ** 53:
+            return None
+        missing = np.isnan(scaled)
+        entries[column] = pd.arrays.IntegerArray(np.where(missing, 0, scaled).astype(np.int64), missing)
+        entries[column + "_Scale"] = scales
     return entries
 
 
+def from_fixedPoint(values, scales):
+    """
+    Converts integer minor units back into Decimals, formatted like the float based parsing of read_file
+    (no trailing zeros, but at least one decimal place).
+
+    Parameters:
+    - values: The integer amounts. Missing values stay None.
+    - scales: The scale of every amount.
+
+    Returns:
+    - np.ndarray: The Decimals (object dtype).
+    """
+    one_place = Decimal("0.1")
+    decimals = []
+    for value, scale in zip(values, scales):
+        if pd.isna(value):
+            decimals.append(None)
+            continue
+        decimal = Decimal(int(value)).scaleb(-int(scale)).normalize()
+        if decimal.as_tuple().exponent >= 0:
+            decimal = decimal.quantize(one_place)
+        decimals.append(decimal)
+    return np.array(decimals, dtype=object)
+
+
+def to_decimalAmounts(entries):
+    """
+    Converts Quantity and Cost columns stored by to_fixedAmounts back into Decimals and drops their scale columns.
+    Entries without scale columns are returned unchanged.
+
+    Parameters:
+    - entries (pd.DataFrame): The entries to convert.
+
+    Returns:
+    - pd.DataFrame: The entries with Decimal amounts.
+    """
+    scaled = [column for column in ["Quantity", "Cost"] if column + "_Scale" in entries.columns]
+    if len(scaled) == 0:
+        return entries
+
+    entries = entries.copy()
+    for column in scaled:
+        entries[column] = from_fixedPoint(entries[column], entries[column + "_Scale"])
+    return entries.drop(columns=[column + "_Scale" for column in scaled])
+
+
+def get_runningTotal(entries, startDate, endDate, increment):
+    """
+    Calculates the change and running total of every Account and Quantity_Type on a date grid.
+
+    Only the (Account, Quantity_Type) pairs that actually have entries are accumulated, with a NumPy cumulative sum
+    over fixed-point integers. The full Date x Account x Quantity_Type grid is only filled in at the end, in the
+    same order as the cross join used previously, with 0 for changes and 0.0 for running totals of empty pairs.
+
+    Parameters:
+    - entries (pd.DataFrame): The entries to accumulate, with Date, Account, Quantity_Type and Quantity columns.
+    - startDate: The first date of the grid.
+    - endDate: The last date of the grid.
+    - increment (str): The pandas frequency of the grid, e.g. "W".
+
+    Returns:
+    - pd.DataFrame: Date, Account, Quantity_Type, Quantity (the change in the period) and RunningTotal columns.
+    """
+    dates = pd.date_range(startDate, endDate, freq=increment)
+    accounts = pd.Index(entries["Account"].dropna().unique())
+    quantity_types = pd.Index(entries["Quantity_Type"].dropna().unique())
+    n_dates, n_accounts, n_types = len(dates), len(accounts), len(quantity_types)
+
+    # Bucket the entries into periods, the change keeps its Decimal sums as written before
+    grouping = [pd.Grouper(key="Date", freq=increment), "Account", "Quantity_Type"]
+    change = entries.groupby(by=grouping)["Quantity"].sum()
+
+    # Running totals are summed as fixed-point integers, or exact Decimals when that is not possible
+    fixed = get_fixedPoint(entries["Quantity"])
+    if fixed is None:
+        amounts, scale = entries["Quantity"].fillna(0).to_numpy(dtype=object), 0
+    else:
+        amounts, scale = fixed
+    totals = entries.assign(Amount=amounts).groupby(by=grouping)["Amount"].sum()
+
+    # Position of every populated bucket on the grid, buckets outside of the date range are dropped
+    date_pos = dates.get_indexer(change.index.get_level_values(0))
+    pair_pos = (accounts.get_indexer(change.index.get_level_values(1)) * n_types
+                + quantity_types.get_indexer(change.index.get_level_values(2)))
+    on_grid = date_pos >= 0
+    date_pos, pair_pos = date_pos[on_grid], pair_pos[on_grid]
+    change_values = change.to_numpy(dtype=object)[on_grid]
+    total_values = totals.to_numpy()[on_grid]
+
+    # Accumulate a dense (populated pair x date) matrix only
+    pairs, pair_row = np.unique(pair_pos, return_inverse=True)
+    matrix = np.zeros((len(pairs), n_dates), dtype=total_values.dtype)
+    matrix[pair_row, date_pos] = total_values
+    matrix = np.cumsum(matrix, axis=1)
+
+    # Fixed-point totals are converted back to Decimals straight from the integers, each distinct value once. Decimal
+    # totals are kept as they are, only the dates before the first entry of a pair still hold an integer 0
+    if fixed is not None:
+        rendered, inverse = np.unique(matrix, return_inverse=True)
+        rendered = from_fixedPoint(rendered, np.full(len(rendered), scale))
+        matrix = rendered[inverse.reshape(matrix.shape)]
+    else:
+        matrix = np.where(matrix == 0, Decimal("0.0"), matrix)
+
+    # Fill in the full grid, dates first, then accounts, then quantity types
+    grid_size = n_dates * n_accounts * n_types
+    quantity = np.zeros(grid_size, dtype=object)
+    quantity[date_pos * n_accounts * n_types + pair_pos] = change_values
+    running_total = np.full(grid_size, Decimal("0.0"), dtype=object)
+    grid = running_total.reshape(n_dates, n_accounts * n_types)
+    grid[:, pairs] = matrix.T
+
+    return pd.DataFrame({
+        "Date": np.repeat(dates, n_accounts * n_types),
+        "Account": np.tile(np.repeat(accounts.to_numpy(), n_types), n_dates),
+        "Quantity_Type": np.tile(quantity_types.to_numpy(), n_dates * n_accounts),
+        "Quantity": quantity,
+        "RunningTotal": running_total,
+    })
+
 
 def get_crossJoinedFrames(frame_1, frame_2):
     frame_1["key"] = 0
@@ -130,34 +686,61 @@ def get_uniqueFrame(entries, column):
     return pd.DataFrame({column: unique})
 
 
-def validate_Transaction(data: pd.DataFrame) -> bool:
-    data = f.filter_data(data, "Equals", "Type", "Transaction")
+def get_transactionImbalances(data):
+    """
+    Validates every transaction of a ledger at once: a transaction passes when its legs balance.
 
-    if len(data["Quantity_Type"].unique()) == 1:
-        if round(data["Quantity"].sum(), 5) == 0.0:
-            return True
-        else:
-            return False
-    else:
-        qt_val = {}
-        invalid = {}
-        for quantity_type in data["Quantity_Type"].unique():
-            qt_data = f.filter_data(data, "Equals", "Quantity_Type", quantity_type)
-            qt_val[quantity_type] = qt_data["Quantity"].sum()
-            if qt_val[quantity_type] != 0.00:
-                invalid.update({quantity_type: qt_val[quantity_type]})
-
-        for q_t in invalid:
-            qt_data = f.filter_data(data, "Equals", "Cost_Type", q_t)
-            for index, row in qt_data.iterrows():
-                invalid[q_t] = invalid[q_t] + row["Cost"]
-                invalid[row["Quantity_Type"]] = invalid[row["Quantity_Type"]] - row["Quantity"]
-
-        out = True
-
-        for q_t in invalid:
-            invalid[q_t] = round(invalid[q_t], 5)
-            if invalid[q_t] != 0.0:
-                out = False
-
-    return out
\ No newline at end of file
+    The legs are grouped by (ID, Quantity_Type) once. A transaction with a single Quantity_Type must sum to zero.
+    Otherwise every Quantity_Type that does not sum to zero is cross-checked against the legs paid in it (Cost_Type):
+    their Cost is added to it and their Quantity taken from their own Quantity_Type, and every balance involved must
+    then round to zero at 5 decimal places. Fixed-point balances are converted back to Decimals before rounding, so
+    both amount storages give the same results.
+
+    Parameters:
+    - data (pd.DataFrame): The entries, Decimal or fixed-point amounts.
+
+    Returns:
+    - (pd.Series, pd.Series): The result of every transaction ID in order of appearance, and the Decimal imbalance of
+      every (ID, Quantity_Type) that does not balance.
+    """
+    scales = None
+    if "Quantity_Scale" in data.columns:
+        # Every commodity has a single scale, in the Quantity and the Cost columns alike
+        scales = [data.groupby("Quantity_Type")["Quantity_Scale"].first()]
+        if "Cost_Scale" in data.columns:
+            scales.append(data.groupby("Cost_Type")["Cost_Scale"].first())
+        scales = pd.concat(scales).groupby(level=0).first()
+
+    data = data.loc[data["Type"] == "Transaction", ["ID", "Quantity", "Quantity_Type", "Cost", "Cost_Type"]]
+    ids = data["ID"].unique()
+
+    # Legs without an ID never match an ID, so that transaction is empty and valid
+    data = data.loc[data["ID"].notna()]
+    levels = ["ID", "Quantity_Type"]
+
+    # Balance of every (ID, Quantity_Type)
+    sums = data["Quantity"].groupby([data["ID"], data["Quantity_Type"]], sort=False, dropna=False).sum()
+    sums.index = sums.index.set_names(levels)
+    types = sums.groupby(level="ID", sort=False).size()
+    single = sums.index.get_level_values("ID").isin(types.index[types == 1])
+
+    # Transactions with several Quantity_Types: the unbalanced ones are cross-checked against the legs paid in them
+    invalid = sums[~single & sums.index.get_level_values("Quantity_Type").notna()]
+    invalid = invalid[invalid != 0]
+    paid_in = pd.MultiIndex.from_arrays([data["ID"], data["Cost_Type"]]).isin(invalid.index)
+    cross = data.loc[paid_in]
+    costs = cross["Cost"].fillna(0).groupby([cross["ID"], cross["Cost_Type"]], sort=False).sum()
+    quantities = cross["Quantity"].fillna(0).groupby([cross["ID"], cross["Quantity_Type"]], sort=False).sum()
+    for balance in (costs, quantities):
+        balance.index = balance.index.set_names(levels)
+    balances = pd.concat([invalid, costs, -quantities]).groupby(level=levels, sort=False).sum()
+
+    imbalances = pd.concat([sums[single], balances])
+    if scales is not None:
+        commodities = imbalances.index.get_level_values("Quantity_Type")
+        imbalances = pd.Series(from_fixedPoint(imbalances, scales.reindex(commodities).fillna(0).to_numpy()),
+                               index=imbalances.index, dtype=object)
+    imbalances = imbalances[imbalances.map(lambda amount: round(amount, 5)) != 0]
+
+    results = pd.Series(~pd.Index(ids).isin(imbalances.index.get_level_values("ID")), index=ids)
+    return results, imbalances
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+from classes.functions import Functions as f
+
+
+# Bumped whenever the parsers change the entries they produce, so caches written by older code are not reused
+PARSE_CACHE_VERSION = 2
+
+
+class ParseCache:
+    """
+    Cache of the entries parsed from every statement file of a parser.
+
+    Historical statements never change, so the entries parsed from each file are stored in the "Cache" folder of the
+    parser configuration as a pickled DataFrame (binary, and keeps the Decimal, string and Timestamp cells exactly as
+    the parser produced them). A cached frame is keyed by the path, size and modification time of the statement, and
+    by a hash of the parser configuration and of the files the parsing depends on (such as the rules table), so only
+    new or changed statements are parsed again. Without a "Cache" folder every file is parsed, as before.
+
+    Cache files are named "<parser>_<configuration hash>_<statement hash>.pkl", so parsers and configurations can
+    share a folder: a run only ever removes the files of its own parser and configuration.
+    """
+
+    def __init__(self, parser, parser_config, dependencies=()):
+        """
+        Parameters:
+        - parser (str): The type of the parser, such as "IBKR".
+        - parser_config (dict): The parser configuration.
+        - dependencies (iterable): Paths of other files the parsed entries depend on, such as the rules table.
+        """
+        folder = f.get_runParameter(parser_config, "Cache")
+        self.folder = f.get_full_Path(folder) if folder is not None else None
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+        content = {"version": PARSE_CACHE_VERSION, "config": parser_config, "dependencies": {}}
+        for path in dependencies:
+            content["dependencies"][path] = get_fileHash(f.get_full_Path(path))
+        self.config_hash = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+        self.prefix = f"{parser}_{self.config_hash[:16]}_"
+
+        if self.folder is not None:
+            os.makedirs(self.folder, exist_ok=True)
+
+    def get_cachePath(self, inputFile):
+        """
+        Returns the path of the cached entries of a statement file as it is now.
+        """
+        stat = os.stat(inputFile)
+        key = f"{self.config_hash}|{os.path.abspath(inputFile)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return os.path.join(self.folder, self.prefix + hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+    def get_entries(self, inputFile, parse):
+        """
+        Returns the entries of a statement file, from the cache when it is up to date, otherwise by parsing it.
+
+        Parameters:
+        - inputFile (str): Path to the statement file.
+        - parse (callable): Parses the file, receiving its path and returning the entries as a DataFrame.
+
+        Returns:
+        - pd.DataFrame: The entries of the file.
+        """
+        if self.folder is None:
+            return parse(inputFile)
+
+        cache_path = self.get_cachePath(inputFile)
+        self.used.add(os.path.basename(cache_path))
+        if os.path.isfile(cache_path):
+            try:
+                entries = pd.read_pickle(cache_path)
+                self.hits += 1
+                return entries
+            except Exception as e:
+                f.log(f"Unable to read the cached entries of {inputFile}, parsing it again: {e}")
+
+        entries = parse(inputFile)
+        self.misses += 1
+        try:
+            entries.to_pickle(cache_path)
+        except Exception as e:
+            f.log(f"Unable to cache the entries of {inputFile}: {e}")
+        return entries
+
+    def clean(self):
+        """
+        Removes the cached entries of this parser and configuration for statements that were not read in this run
+        (changed, moved or deleted files) and logs how many files came from the cache. The files of other parsers
+        and configurations in the folder are left alone.
+        """
+        if self.folder is None:
+            return
+
+        for name in os.listdir(self.folder):
+            if name.startswith(self.prefix) and name.endswith(".pkl") and name not in self.used:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError as e:
+                    f.log(f"Unable to remove stale cache file {name}: {e}")
+        f.log(f"Parse cache {self.folder}: {self.hits} files read from the cache, {self.misses} parsed.")
+
+
+def get_fileHash(path):
+    """
+    Returns the SHA-256 of a file, or None if it does not exist.
+    """
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def concat_entries(frames):
+    """
+    Concatenates the entries of every statement file into one frame.
+
+    Parameters:
+    - frames (list): The entries of each file, as DataFrames.
+
+    Returns:
+    - pd.DataFrame: All entries, with a fresh index.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) == 0:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -2,6 +2,8 @@ from classes.functions import Functions as functions
 from decimal import Decimal
 import pandas as pd
 import classes.pandas as pandas
+from classes.parseCache import ParseCache, concat_entries
+from classes.entries import EntryBuilder
 
 
 ## This function receives an output file path (relative path) and writes the entries for that parser in the location
@@ -20,82 +22,81 @@ def import_Entries(parserLocation):
     inputFolder = functions.get_full_Path(inputfiles)
     inputFiles = functions.get_ListFilesInDir(inputFolder)
 
-    entries = []
+    ## Statements that did not change since the last run are read from the parse cache
+    cache = ParseCache("IBKR", parser_config)
+    frames = []
     for inputFile in inputFiles:
-        entries = functions.combine_lists(entries, get_entriesFromFile(inputFile, parser_config))
+        frames.append(cache.get_entries(inputFile, lambda file: get_entriesFromFile(file, parser_config)))
+    cache.clean()
 
-    entries = pd.DataFrame(entries)
+    entries = concat_entries(frames)
     try:
         entries = entries.sort_values(by="Date", ascending=True).reset_index(drop=True)
     except:
         functions.log("Unable to sort values for Wise entries")
     return entries
 
-## This function reads the IBKR XML file and returns a list of every XML object
+## XML objects that parse_transactions handles, every other element (Orders, Lots, summaries...) is skipped
+TRANSACTION_TAGS = {"Trade", "Transfer", "CorporateAction", "CashTransaction"}
+
+
+## This function streams the IBKR XML file and returns a DataFrame with the entries of every transaction object in it
 def get_entriesFromFile(inputFile, parser_config):
-    entries = []
-    XML = functions.read_XML(inputFile)
-    xmlEntries = functions.get_XML_Tag_All(XML)
-    for object in xmlEntries:
-        entryList = parse_transactions(object, parser_config)
-        if len(entryList) != 0:
-            entries = functions.combine_lists(entries,entryList)
+    entries = EntryBuilder()
+    for object in functions.iter_XML_Tags(inputFile, TRANSACTION_TAGS):
+        parse_transactions(object, parser_config, entries)
 
-    return entries
+    return entries.to_frame()
 
 
-## This function selects which type of XML object it is, and picks the appropriate function to parse it
-def parse_transactions(object, parser_config):
-    entries = []
+## This function selects which type of XML object it is, and appends the entries of the appropriate function to entries
+def parse_transactions(object, parser_config, entries):
 
     if object["tag"] == "Trade":
         if object['attrs']["assetCategory"] == "CASH":
-            entries = functions.combine_lists(entries, get_CASH(object['attrs'], parser_config))
+            entries.extend(get_CASH(object['attrs'], parser_config))
             pass
         elif (object['attrs']["assetCategory"] == "OPT") or (object['attrs']["assetCategory"] == "STK"):
-            entries = functions.combine_lists(entries, get_STK(object['attrs'], parser_config))
+            entries.extend(get_STK(object['attrs'], parser_config))
 
             pass
 
     if object["tag"] == "Transfer":
-            entries = functions.combine_lists(entries, get_Transfer(object['attrs'], parser_config))
+            entries.extend(get_Transfer(object['attrs'], parser_config))
 
 
     if object["tag"] == "CorporateAction":
-            entries = functions.combine_lists(entries, get_CorporateAction(object['attrs'], parser_config))
+            entries.extend(get_CorporateAction(object['attrs'], parser_config))
             # entries = entries +   get_CorporateAction(object['attrs'], parser_config)
 
     if object["tag"] == "CashTransaction" and object['attrs']["levelOfDetail"] == "DETAIL":
         if object['attrs']["type"] == "Broker Interest Paid":
-            entries = functions.combine_lists(entries, get_Interest(object['attrs'], parser_config))
+            entries.extend(get_Interest(object['attrs'], parser_config))
 
             #entries = entries +   get_Interest(object['attrs'], parser_config)
             pass
         elif (object['attrs']["type"] == "Other Fees") or (object['attrs']["type"] == "Commission Adjustments"):
-            entries = functions.combine_lists(entries, get_Fees(object['attrs'], parser_config))
+            entries.extend(get_Fees(object['attrs'], parser_config))
 
             #entries = entries +   get_Fees(object['attrs'], parser_config)
             pass
         elif (object['attrs']["type"] == "Payment In Lieu Of Dividends") or (object['attrs']["type"] == "Dividends"):
-            entries = functions.combine_lists(entries, get_Dividends(object['attrs'], parser_config))
+            entries.extend(get_Dividends(object['attrs'], parser_config))
 
             #entries = entries +   get_Dividends(object['attrs'], parser_config)
             pass
         elif (object['attrs']["type"] == "Withholding Tax") :
-            entries = functions.combine_lists(entries, get_WithholdingTax(object['attrs'], parser_config))
+            entries.extend(get_WithholdingTax(object['attrs'], parser_config))
 
             #entries = entries +    get_WithholdingTax(object['attrs'], parser_config)
             pass
         elif (object['attrs']["type"] == "Deposits/Withdrawals") :
-            entries = functions.combine_lists(entries, get_Deposits(object['attrs'], parser_config))
+            entries.extend(get_Deposits(object['attrs'], parser_config))
 
             #entries = entries +    get_Deposits(object['attrs'], parser_config)
             pass
 
 
-    return entries
-
-
 ## Everything below this handles the parsing of individual XML objects, which represent purchases/sales of securities, dividend payments, etc....
 def get_STK(object ,parser_config):
 
@@ -1,10 +1,12 @@
 import math
-import random
 import numpy as np
 from classes.functions import Functions as functions
 from decimal import Decimal
 import pandas as pd
 import classes.pandas as pandas
+from classes.parseCache import ParseCache, concat_entries
+from classes.entries import EntryBuilder
+import classes.rules as rules_engine
 
 
 def write_Entries(run, config):
@@ -46,18 +48,21 @@ def import_Entries(parserLocation):
 
     # Try to read the rules table, if available
     try:
-        rules = pd.read_csv(filepath_or_buffer=parser_config['RulesTable'], sep=parser_config['RulesTable_Separator'])
+        rules = rules_engine.load_Rules(parser_config)
         functions.log("Rules table successfully loaded.")
     except:
         functions.log(f"No rules available at {parser_config['RulesTable']}. Returning empty DataFrame.")
         return pd.DataFrame()
 
-    # Process each input file and combine entries
-    entries = []
+    # Process each input file, reading the statements that did not change from the parse cache, and combine entries
+    # with the last file first
+    cache = ParseCache("n26", parser_config, [parser_config['RulesTable']])
+    frames = []
     for input_file in input_files:
-        entries = functions.combine_lists(get_entriesFromFile(input_file, parser_config, rules), entries)
+        frames.insert(0, cache.get_entries(input_file, lambda file: get_entriesFromFile(file, parser_config, rules)))
+    cache.clean()
 
-    entries = pd.DataFrame(entries)
+    entries = concat_entries(frames)
 
     # Sort entries by date
     try:
@@ -76,13 +81,12 @@ def get_entriesFromFile(inputFile, parser_config, rules):
     Parameters:
     - inputFile (str): Path to the input file.
     - parser_config (dict): Configuration for parsing the file.
-    - rules (pd.DataFrame): DataFrame containing account mapping rules.
+    - rules (RulesEngine): The compiled account mapping rules.
 
     Returns:
-    - list: A list of entries extracted from the file.
+    - pd.DataFrame: The entries extracted from the file, the last transaction first.
     """
     functions.log(f"Processing entries from file {inputFile}.")
-    entries = []
 
     # Determine file format (1 or 2)
     file_format = get_File_Format(inputFile)
@@ -91,151 +95,118 @@ def get_entriesFromFile(inputFile, parser_config, rules):
         functions.log(f"File format 1 detected for {inputFile}.")
         n26 = pd.read_csv(filepath_or_buffer=inputFile, sep=parser_config["separator"], parse_dates=["Date"],
                           date_format=parser_config["DateFormat"])
-        for _, row in n26.iterrows():
-            entries = functions.combine_lists(convert_transaction_format_1(row, parser_config, rules), entries)
+        return convert_transactions(n26, FORMAT_COLUMNS[1], get_Spaces_format_1(n26), parser_config, rules)
     elif file_format == 2:
         functions.log(f"File format 2 detected for {inputFile}.")
         n26 = pd.read_csv(filepath_or_buffer=inputFile, sep=parser_config["separator"], parse_dates=["Booking Date"],
                           date_format=parser_config["DateFormat"])
-        for _, row in n26.iterrows():
-            entry = convert_transaction_format_2(row, parser_config, rules)
-            if entry is not None:
-                entries = functions.combine_lists(entry, entries)
 
-    return entries
+        # Ignore rows that are not part of the main account
+        n26 = n26.loc[n26["Account Name"] == "Main Account"]
+        return convert_transactions(n26, FORMAT_COLUMNS[2], get_Spaces_format_2(n26), parser_config, rules)
+
+    return EntryBuilder().to_frame()
+
+
+# Date, payee, IBAN and payment reference columns of each file format
+FORMAT_COLUMNS = {
+    1: ("Date", "Payee", "Account number", "Payment reference"),
+    2: ("Booking Date", "Partner Name", "Partner Iban", "Payment Reference"),
+}
 
 
-def convert_transaction_format_1(row, parser_config, rules):
+def get_Spaces_format_1(n26):
     """
-    Converts a row of N26 data from format 1 into a structured entry.
+    Returns which rows of a format 1 statement are transfers from or to N26 Spaces: outgoing transfers and income
+    without an account number, other than from N26 itself.
 
     Parameters:
-    - row (pd.Series): A row of transaction data.
-    - parser_config (dict): Configuration for parsing.
-    - rules (pd.DataFrame): Account mapping rules.
+    - n26 (pd.DataFrame): The statement.
 
     Returns:
-    - dict: A dictionary representing the structured transaction entry.
+    - pd.Series: True for the rows booked against the Spaces account.
     """
-    Date, Type, ID, Name, Account, Quantity, Quantity_Type, Cost, Cost_Type = ([] for i in range(9))
-
-    account_subAccount = parser_config["SubAccounts"]
-    name = str(str(row["Payee"]) + "_" + str(row["Account number"]) + str(row["Payment reference"])).replace(" ","").replace(",","").upper()
-
-    # Determine account based on transaction type
-    if row["Transaction type"] == "Outgoing Transfer" and str(row["Account number"]) == "nan" and row[
-        "Payee"] != "N26 Bank":
-        account = "Assets:Banks:n26:Spaces"
-    elif row["Transaction type"] == "Income" and str(row["Account number"]) == "nan":
-        account = "Assets:Banks:n26:Spaces"
-    else:
-        account = get_Account(name, parser_config, rules)
-
-    id = f"N26_{random.randrange(0, 99999999999999)}"
-
-    # Append two entries for the transaction
-    Date.extend([row["Date"], row["Date"]])
-    Type.extend(["Transaction", "Transaction"])
-    ID.extend([id, id])
-    Name.extend([name, name])
-    Account.extend([account_subAccount, account])
-    Quantity.extend([row["Amount (EUR)"], Decimal(row["Amount (EUR)"]).copy_negate()])
-    Quantity_Type.extend([parser_config['DefaultCurrency'], parser_config['DefaultCurrency']])
-    Cost.extend([None, None])
-    Cost_Type.extend([None, None])
-
-    # Combine data into a dictionary
-    return {
-        "Date": Date,
-        "Type": Type,
-        "ID": ID,
-        "Name": Name,
-        "Account": Account,
-        "Quantity": Quantity,
-        "Quantity_Type": Quantity_Type,
-        "Cost": Cost,
-        "Cost_Type": Cost_Type,
-    }
-
-
-def convert_transaction_format_2(row, parser_config, rules):
+    no_account = n26["Account number"].map(str) == "nan"
+    outgoing = (n26["Transaction type"] == "Outgoing Transfer") & (n26["Payee"] != "N26 Bank")
+    return no_account & (outgoing | (n26["Transaction type"] == "Income"))
+
+
+def get_Spaces_format_2(n26):
     """
-    Converts a row of N26 data from format 2 into a structured entry.
+    Returns which rows of a format 2 statement are transfers from or to N26 Spaces: credit and debit transfers
+    without a partner IBAN.
 
     Parameters:
-    - row (pd.Series): A row of transaction data.
-    - parser_config (dict): Configuration for parsing.
-    - rules (pd.DataFrame): Account mapping rules.
+    - n26 (pd.DataFrame): The main account rows of the statement.
 
     Returns:
-    - dict or None: A dictionary representing the structured transaction entry or None if invalid.
+    - pd.Series: True for the rows booked against the Spaces account.
     """
-    Date, Type, ID, Name, Account, Quantity, Quantity_Type, Cost, Cost_Type = ([] for i in range(9))
-
-    account_subAccount = parser_config["SubAccounts"]
-    name = str(str(row["Partner Name"]) + "_" + str(row["Partner Iban"]) + str(row["Payment Reference"])).replace(" ","").replace(",","").upper()
-
-    # Ignore rows that are not part of the main account
-    if row["Account Name"] != "Main Account":
-        return None
-
-    # Determine account based on transaction type
-    if row["Account Name"] == "Main Account" and str(row["Partner Iban"]) == "nan" and (
-            str(row["Type"]) in ["Credit Transfer", "Debit Transfer"]):
-        account = "Assets:Banks:n26:Spaces"
-    else:
-        account = get_Account(name, parser_config, rules)
-
-    id = f"N26_{random.randrange(0, 99999999999999)}"
-
-    # Append two entries for the transaction
-    Date.extend([row["Booking Date"], row["Booking Date"]])
-    Type.extend(["Transaction", "Transaction"])
-    ID.extend([id, id])
-    Name.extend([name, name])
-    Account.extend([account_subAccount, account])
-    Quantity.extend([row["Amount (EUR)"], Decimal(row["Amount (EUR)"]).copy_negate()])
-    Quantity_Type.extend([parser_config['DefaultCurrency'], parser_config['DefaultCurrency']])
-    Cost.extend([None, None])
-    Cost_Type.extend([None, None])
-
-    # Combine data into a dictionary
-    return {
-        "Date": Date,
-        "Type": Type,
-        "ID": ID,
-        "Name": Name,
-        "Account": Account,
-        "Quantity": Quantity,
-        "Quantity_Type": Quantity_Type,
-        "Cost": Cost,
-        "Cost_Type": Cost_Type,
-    }
-
-
-def get_Account(name, parser_config, rules):
+    no_iban = n26["Partner Iban"].map(str) == "nan"
+    return no_iban & n26["Type"].map(str).isin(["Credit Transfer", "Debit Transfer"])
+
+
+def convert_transactions(n26, columns, spaces, parser_config, rules):
     """
-    Maps the name to an account using the rules table.
+    Converts every row of an N26 statement into its two balancing entries, working on whole columns.
 
     Parameters:
-    - name (str): The concatenated name used to search for the account.
+    - n26 (pd.DataFrame): The statement rows to convert.
+    - columns (tuple): The date, payee, IBAN and payment reference columns of the file format.
+    - spaces (pd.Series): True for the rows booked against the Spaces account instead of a rules table account.
     - parser_config (dict): Configuration for parsing.
-    - rules (pd.DataFrame): Account mapping rules.
+    - rules (RulesEngine): The compiled account mapping rules.
 
     Returns:
-    - str: The account name.
+    - pd.DataFrame: The entries, two per row, the last row first.
+    """
+    date_column, payee_column, iban_column, reference_column = columns
+    entries = EntryBuilder(capacity=2 * len(n26))
+    if len(n26) == 0:
+        return entries.to_frame()
+
+    names = n26[payee_column].map(str) + "_" + n26[iban_column].map(str) + n26[reference_column].map(str)
+    names = names.str.replace(" ", "", regex=False).str.replace(",", "", regex=False).str.upper()
+
+    accounts = np.where(spaces.to_numpy(dtype=bool), "Assets:Banks:n26:Spaces", rules.get_Accounts(names).to_numpy(dtype=object))
+
+    amounts = n26["Amount (EUR)"].tolist()
+    # IDs derived from the date, amount and counterparty, so overlapping exports give the same IDs
+    ids = functions.get_hashIDs("N26", zip(n26[date_column].tolist(), amounts, names.tolist()))
+    currency = parser_config['DefaultCurrency']
+
+    # The two legs of every row, interleaved with the last row first
+    dates = n26[date_column].tolist()
+    names = names.tolist()
+    entries.extend({
+        "Date": interleave_legs(dates, dates),
+        "Type": ["Transaction"] * (2 * len(n26)),
+        "ID": interleave_legs(ids, ids),
+        "Name": interleave_legs(names, names),
+        "Account": interleave_legs([parser_config["SubAccounts"]] * len(n26), accounts.tolist()),
+        "Quantity": interleave_legs(amounts, [Decimal(amount).copy_negate() for amount in amounts]),
+        "Quantity_Type": [currency] * (2 * len(n26)),
+        "Cost": [None] * (2 * len(n26)),
+        "Cost_Type": [None] * (2 * len(n26)),
+    })
+    return entries.to_frame()
+
+
+def interleave_legs(first, second):
     """
-    default_account = parser_config['UndefinedAccount']
+    Interleaves the first and second leg of every transaction into one column, the last transaction first.
 
-    for _, row in rules.iterrows():
-        if row["Source"].upper() in name:
-            if row["Exact"] == True:
-                if row["Source"].upper() == name:
-                    return row["Account"]
-            elif not row["Exact"]:
-                return row["Account"]
+    Parameters:
+    - first (list): The value of the first leg of every transaction.
+    - second (list): The value of the second leg of every transaction.
 
-    return default_account
+    Returns:
+    - list: The values in entry order.
+    """
+    values = [None] * (2 * len(first))
+    values[0::2] = first[::-1]
+    values[1::2] = second[::-1]
+    return values
 
 
 def get_File_Format(inputFile):
@@ -2,6 +2,9 @@ from classes.functions import Functions as functions
 from decimal import Decimal
 import pandas as pd
 import classes.pandas as pandas
+from classes.parseCache import ParseCache, concat_entries
+from classes.entries import EntryBuilder
+import classes.rules as rules_engine
 
 def write_Entries(run, config):
     """
@@ -32,20 +35,22 @@ def import_Entries(parserLocation):
 
     # Load rules table
     try:
-        rules = pd.read_csv(filepath_or_buffer=parser_config['RulesTable'], sep=parser_config['RulesTable_Separator'])
+        rules = rules_engine.load_Rules(parser_config, truthy_exact=True)
     except Exception as e:
         functions.log(f"Error loading rules table: {e}")
         return pd.DataFrame()
 
-    entries = []
+    # Statements that did not change since the last run are read from the parse cache
+    cache = ParseCache("wise", parser_config, [parser_config['RulesTable']])
+    frames = []
     for inputFile in inputFiles:
         try:
-            file_entries = get_entriesFromFile(inputFile, parser_config, rules)
-            entries.extend(file_entries)
+            frames.append(cache.get_entries(inputFile, lambda file: get_entriesFromFile(file, parser_config, rules)))
         except Exception as e:
             functions.log(f"Error processing file {inputFile}: {e}")
+    cache.clean()
 
-    entries_df = pd.DataFrame(entries)
+    entries_df = concat_entries(frames)
     try:
         entries_df = entries_df.sort_values(by="Date", ascending=True).reset_index(drop=True)
     except Exception as e:
@@ -60,12 +65,12 @@ def get_entriesFromFile(inputFile, parser_config, rules):
     Parameters:
     - inputFile: Path to the input file.
     - parser_config: Configuration settings.
-    - rules: Rules DataFrame for account mapping.
+    - rules: The compiled account mapping rules (RulesEngine).
 
     Returns:
-    - A list of entries parsed from the file.
+    - A DataFrame of the entries parsed from the file.
     """
-    entries = []
+    entries = EntryBuilder()
     try:
         data = pd.read_csv(
             filepath_or_buffer=inputFile,
@@ -75,16 +80,16 @@ def get_entriesFromFile(inputFile, parser_config, rules):
         )
     except Exception as e:
         functions.log(f"Error reading file {inputFile}: {e}")
-        return entries
+        return entries.to_frame()
 
     for index, row in data.iterrows():
         try:
-            row_entries = convert_transaction(row, parser_config, rules)
-            entries.extend(row_entries)
+            for entry in convert_transaction(row, parser_config, rules):
+                entries.append(entry)
         except Exception as e:
             functions.log(f"Error processing row {index} in file {inputFile}: {e}")
 
-    return entries
+    return entries.to_frame()
 
 def convert_transaction(row, parser_config, rules):
     """
@@ -93,7 +98,7 @@ def convert_transaction(row, parser_config, rules):
     Parameters:
     - row: The row of data to convert.
     - parser_config: Configuration settings.
-    - rules: Rules DataFrame for account mapping.
+    - rules: The compiled account mapping rules (RulesEngine).
 
     Returns:
     - A list of transaction entries derived from the row.
@@ -111,7 +116,7 @@ def convert_transaction(row, parser_config, rules):
     account_subAccount = parser_config["SubAccounts"]
     name = str(row["Description"]).replace(" ", "").replace(",", "").upper()
 
-    account = get_Account(name, parser_config, rules)
+    account = rules.get_Account(name)
     transaction_id = "Wise_" + str(row["TransferWise ID"])
 
     # Entry 1: Direct transaction
@@ -161,25 +166,3 @@ def convert_transaction(row, parser_config, rules):
     } for i in range(len(Date))]
 
     return entries
-
-def get_Account(name, parser_config, rules):
-    """
-    Determines the appropriate account based on the transaction name and rules.
-
-    Parameters:
-    - name: The transaction name.
-    - parser_config: Configuration settings.
-    - rules: Rules DataFrame for account mapping.
-
-    Returns:
-    - The determined account as a string.
-    """
-    default_account = parser_config.get('UndefinedAccount', 'Undefined')
-    for _, row in rules.iterrows():
-        if row["Source"].upper() in name:
-            if row.get("Exact", False):
-                if row["Source"].upper() == name:
-                    return row["Account"]
-            else:
-                return row["Account"]
-    return default_account
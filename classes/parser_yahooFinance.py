@@ -1,20 +1,18 @@
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+
 from classes.functions import Functions as f
+from classes.priceSource import YahooFetcher, FileFetcher, PriceStore, NoStore
 import classes.pandas as pandas
 import pandas as pd
 
-def get_tickerData(ticker, yticker, interval, date_min, date_max):
+def get_tickerData(ticker, yticker, interval, date_min, date_max, store, fetcher):
     if yticker == None:
         yticker = ticker
 
-
-    t = yf.Ticker(yticker)
-
-    data = t.history(period="max", interval=interval)
-
-    data =  pd.DataFrame(data).reset_index()
-    data["Date"] = data["Date"].dt.date
-    data["Date"] = pd.to_datetime(data["Date"])
+    # Only the dates between date_min and date_max are needed, date_max included
+    start = pd.Timestamp(date_min) if date_min is not None else None
+    end = pd.Timestamp(date_max) + pd.Timedelta(days=1) if date_max is not None else None
+    data, currency = store.get_prices(fetcher, yticker, interval, start, end)
 
     data = f.filter_data(data, "Min", "Date", date_min)
     data = f.filter_data(data, "Max", "Date", date_max)
@@ -30,27 +28,58 @@ def get_tickerData(ticker, yticker, interval, date_min, date_max):
         "Quantity": "",
         "Quantity_Type": ticker,
         "Cost": data["Close"],
-        "Cost_Type": t.info["currency"],
+        "Cost_Type": currency,
     }
 
     return entries
 
-def get_PriceUpdates(run):
-
+def get_fetcher(run):
+    """
+    Returns the fetcher of the prices of a run: the price files of the "priceFiles" folder when it is set (see
+    FileFetcher), otherwise Yahoo Finance.
+    """
+    folder = f.get_runParameter(run, "priceFiles")
+    if folder is not None:
+        f.log(f"Reading prices from the files in {folder}.")
+        return FileFetcher(folder)
+    return YahooFetcher()
+
+def get_PriceUpdates(run, fetcher=None):
+    """
+    Returns the price updates of every ticker of a run.
+
+    The tickers are fetched concurrently by up to "threads" threads (4 by default). With a "Cache" folder the price
+    histories are kept in a PriceStore, so only the prices since the last run are fetched.
+
+    Parameters:
+    - run (dict): The run, with Tickers, interval, date_min, date_max and optionally Cache, threads and priceFiles.
+    - fetcher: The fetcher of the prices, by default the one of get_fetcher.
+
+    Returns:
+    - pd.DataFrame: The price updates, ticker by ticker in the order of the run.
+    """
     interval = f.get_runParameter(run ,"interval")
     date_min = f.get_runParameter(run ,"date_min")
     date_max = f.get_runParameter(run ,"date_max")
-    entries = pd.DataFrame()
+    threads = f.get_runParameter(run, "threads") or 4
+    cache = f.get_runParameter(run, "Cache")
+    store = PriceStore(cache) if cache is not None else NoStore()
+    if fetcher is None:
+        fetcher = get_fetcher(run)
 
-    for update in run["Tickers"]:
+    def get_updates(update):
         Ticker = f.get_runParameter(update, "Ticker")
         yTicker = f.get_runParameter(update, "yTicker")
+        return pd.DataFrame(get_tickerData(Ticker, yTicker, interval, date_min, date_max, store, fetcher))
+
+    # Fetching waits on the network, so the tickers are fetched in threads; map keeps the order of the tickers
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        updates = list(executor.map(get_updates, run["Tickers"]))
 
-        updatedata = pd.DataFrame(get_tickerData(Ticker, yTicker, interval, date_min, date_max))
-        if len(updatedata) > 0:
-            entries = pd.concat([entries, updatedata], ignore_index=True)
-    entries.reset_index()
-    entries = entries[entries.Date != ""]
+    updates = [updatedata for updatedata in updates if len(updatedata) > 0]
+    entries = pd.concat(updates, ignore_index=True) if len(updates) > 0 else pd.DataFrame()
+    if not entries.empty:
+        entries = entries[entries.Date != ""]
 
     return entries
 
@@ -69,4 +98,4 @@ def write_Entries(run, config):
         f.log(AttributeError.name)
         f.log(AttributeError.args)
 
-    pass
\ No newline at end of file
+    pass
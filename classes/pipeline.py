@@ -0,0 +1,139 @@
+from classes.functions import Functions as f
+from classes.commands import Commands as commands
+import classes.pandas as pandas
+import classes.scheduler as scheduler
+import classes.incremental as incremental
+import classes.chartFarm as chartFarm
+import classes.logger as logger
+import classes.profiler as profiler
+import datetime
+
+
+def get_memoryOnlyOutputs(runs):
+    """
+    Returns the outputs that are only kept in memory: outputs of runs marked "intermediate" that no other run writes
+    to disk.
+
+    Parameters:
+    - runs (list): The runs from runs.json.
+
+    Returns:
+    - set: The output paths, normalized with pandas.get_registryKey.
+    """
+    intermediate = set()
+    written = set()
+    for run in runs:
+        output = f.get_runParameter(run, "output")
+        if output is None:
+            continue
+        if f.get_runParameter(run, "intermediate"):
+            intermediate.add(pandas.get_registryKey(output))
+        else:
+            written.add(pandas.get_registryKey(output))
+    return intermediate - written
+
+
+def run_pipeline(runs, config):
+    """
+    Runs every run from runs.json in order, or concurrently on "Workers" processes as their dependencies allow (see
+    scheduler.run_scheduled).
+
+    With "InMemoryPipeline" enabled in the config, every frame written by a run is kept in memory keyed by its output
+    path, and a later run whose input matches that path gets the frame directly instead of parsing the file again.
+    Outputs of runs marked "intermediate": true are then not written to disk at all. A frame is released after the
+    last run that reads it.
+
+    With "Incremental" enabled, runs whose fingerprint did not change since the last execution are skipped (see
+    incremental.Manifest).
+
+    With "ChartWorkers" set, the charts are rendered together on that many processes after the other runs (see
+    chartFarm.ChartFarm).
+
+    With "Profile" set, the measurements of every run are written to that file at the end (see
+    profiler.write_profile).
+
+    Parameters:
+    - runs (list): The runs from runs.json.
+    - config (dict): The configuration from config.json.
+    """
+    logger.configure(config)
+    in_memory = f.get_runParameter(config, "InMemoryPipeline") == True
+    workers = f.get_runParameter(config, "Workers") or 1
+    manifest = incremental.get_manifest(config, runs)
+    started = datetime.datetime.now()
+    records = []
+
+    # Independent runs execute concurrently in worker processes, which cannot share in-memory frames
+    if workers > 1 and in_memory:
+        f.log("The in-memory pipeline shares frames within one process, running sequentially instead of on workers.")
+    elif workers > 1:
+        try:
+            scheduler.run_scheduled(runs, config, workers, manifest, records)
+        finally:
+            profiler.write_profile(config, records, started)
+        return
+
+    if in_memory:
+        memory_only = get_memoryOnlyOutputs(runs)
+        pandas.set_frameRegistry(True, memory_only)
+        f.log(f"In-memory pipeline enabled, {len(memory_only)} outputs kept in memory only.")
+
+        # Index of the last run reading each path, so frames can be released as soon as possible
+        last_reads = {}
+        for index, run in enumerate(runs):
+            for path in scheduler.get_runPaths(run)[0]:
+                last_reads[path] = index
+
+    # With "ChartWorkers", chart runs are prepared as they come and rendered together at the end
+    chart_workers = chartFarm.get_chartWorkers(config)
+    farm = chartFarm.ChartFarm(config, chart_workers) if chart_workers > 0 else None
+    chart_records = {}
+
+    try:
+        for index, run in enumerate(runs):
+            fingerprint = None
+            if manifest is not None:
+                fingerprint = manifest.get_fingerprint(run)
+                if manifest.is_upToDate(index, run, fingerprint):
+                    f.log(f"Skipping unchanged run: {run}")
+                    continue
+
+            f.log(run)
+            if farm is not None and f.get_runParameter(run, "task") == "chart":
+                pandas.configure(config)
+                # The chart is measured as it is prepared, its render time is added once rendered
+                record = profiler.profile_command(run, config, lambda: farm.add(run, (index, fingerprint)))
+                if record is not None:
+                    record["index"] = index
+                    records.append(record)
+                    chart_records[index] = record
+            else:
+                if farm is not None:
+                    farm.forget_inputs()
+                record = commands.run_command(run, config)
+                if record is not None:
+                    record["index"] = index
+                    records.append(record)
+
+                if manifest is not None:
+                    manifest.record(index, run, fingerprint)
+
+            if in_memory:
+                for path, last_read in last_reads.items():
+                    if last_read == index:
+                        pandas.release_frame(path)
+
+        if farm is not None:
+            queued = len(farm.jobs)
+            rendered = farm.render()
+            for run, (index, fingerprint), seconds in rendered:
+                if manifest is not None:
+                    manifest.record(index, run, fingerprint)
+                if index in chart_records:
+                    profiler.add_render(chart_records[index], seconds)
+            if len(rendered) < queued:
+                raise RuntimeError(f"{queued - len(rendered)} of {queued} charts failed.")
+    finally:
+        if in_memory:
+            pandas.set_frameRegistry(False)
+        profiler.write_profile(config, records, started)
@@ -0,0 +1,174 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+import yfinance as yf
+from classes.functions import Functions as f
+
+
+class YahooFetcher:
+    """
+    Fetches price histories from Yahoo Finance.
+    """
+
+    def fetch(self, yticker, interval, start, end):
+        """
+        Fetches the closing prices of a ticker.
+
+        Parameters:
+        - yticker (str): The Yahoo Finance ticker.
+        - interval (str): The interval of the prices, such as "1d" or "1wk".
+        - start (pd.Timestamp): The first date to fetch, or None for the whole history.
+        - end (pd.Timestamp): The day after the last date to fetch, or None for up to today.
+
+        Returns:
+        - tuple: The prices as a DataFrame with Date and Close columns, and the currency of the ticker.
+        """
+        t = yf.Ticker(yticker)
+        if start is None:
+            data = t.history(period="max", interval=interval)
+        else:
+            data = t.history(start=start, end=end, interval=interval)
+        data = pd.DataFrame(data).reset_index()
+
+        # The currency comes with the history, which saves the separate request of t.info
+        currency = t.get_history_metadata().get("currency")
+        if currency is None:
+            currency = t.info["currency"]
+
+        if data.empty:
+            return pd.DataFrame(columns=["Date", "Close"]), currency
+        data["Date"] = pd.to_datetime(data["Date"].dt.date)
+        return data[["Date", "Close"]], currency
+
+
+class FileFetcher:
+    """
+    Fetches price histories from files instead of Yahoo Finance, so price updates can be produced offline: a
+    "<yticker>.csv" file with Date and Close columns and a "<yticker>.json" file with the "currency" per ticker.
+    """
+
+    def __init__(self, folder, separator=";"):
+        """
+        Parameters:
+        - folder (str): The folder with the price files.
+        - separator (str): The separator of the CSV files.
+        """
+        self.folder = f.get_full_Path(folder)
+        self.separator = separator
+
+    def fetch(self, yticker, interval, start, end):
+        """
+        Returns the prices of a ticker between start and end, like YahooFetcher.fetch. The interval is the one of the
+        files.
+        """
+        data = pd.read_csv(os.path.join(self.folder, yticker + ".csv"), sep=self.separator, parse_dates=["Date"],
+                           date_format="%Y-%m-%d")
+        if start is not None:
+            data = data.loc[data["Date"] >= start]
+        if end is not None:
+            data = data.loc[data["Date"] < end]
+        with open(os.path.join(self.folder, yticker + ".json"), "r") as metadata_file:
+            currency = json.load(metadata_file)["currency"]
+        return data[["Date", "Close"]].reset_index(drop=True), currency
+
+
+class PriceStore:
+    """
+    Local store of the price history of every ticker, so only the prices since the last stored date are fetched.
+
+    Every ticker and interval has a CSV file of its prices and a JSON file of its metadata: the currency, the first
+    date the history covers and the day it was last fetched. The last stored price is fetched again, as the latest
+    bar of an interval can change until the interval ends. A ticker already fetched today is not fetched again.
+    """
+
+    def __init__(self, folder):
+        """
+        Parameters:
+        - folder (str): The folder of the store, created if needed.
+        """
+        self.folder = f.get_full_Path(folder)
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get_paths(self, yticker, interval):
+        """
+        Returns the paths of the prices and of the metadata of a ticker.
+        """
+        name = os.path.join(self.folder, f"{yticker}_{interval}")
+        return name + ".csv", name + ".json"
+
+    def read(self, yticker, interval):
+        """
+        Returns the stored prices and metadata of a ticker, or None and an empty dict when it is not stored.
+        """
+        prices_path, metadata_path = self.get_paths(yticker, interval)
+        if not os.path.isfile(prices_path) or not os.path.isfile(metadata_path):
+            return None, {}
+        try:
+            with open(metadata_path, "r") as metadata_file:
+                metadata = json.load(metadata_file)
+            prices = pd.read_csv(prices_path, sep=";", parse_dates=["Date"], date_format="%Y-%m-%d")
+            return prices, metadata
+        except Exception as e:
+            f.log(f"Unable to read the stored prices of {yticker}, fetching them again: {e}")
+            return None, {}
+
+    def write(self, yticker, interval, prices, metadata):
+        """
+        Stores the prices and metadata of a ticker.
+        """
+        prices_path, metadata_path = self.get_paths(yticker, interval)
+        prices.to_csv(prices_path, sep=";", index=False, date_format="%Y-%m-%d")
+        with open(metadata_path, "w") as metadata_file:
+            json.dump(metadata, metadata_file, indent=1)
+
+    def get_prices(self, fetcher, yticker, interval, start, end):
+        """
+        Returns the prices of a ticker from start on, fetching only what the store does not have yet.
+
+        Parameters:
+        - fetcher: The fetcher of the prices, such as YahooFetcher or FileFetcher.
+        - yticker (str): The ticker to fetch.
+        - interval (str): The interval of the prices.
+        - start (pd.Timestamp): The first date needed, or None for the whole history.
+        - end (pd.Timestamp): The day after the last date needed, or None for up to today.
+
+        Returns:
+        - tuple: The prices as a DataFrame with Date and Close columns, and the currency of the ticker.
+        """
+        prices, metadata = self.read(yticker, interval)
+        today = str(datetime.date.today())
+
+        # The stored history is used when it starts early enough, extended by the prices since its last date
+        covered = prices is not None and (metadata.get("start") is None or
+                                          (start is not None and pd.Timestamp(metadata["start"]) <= start))
+        if covered and (metadata.get("fetched") == today or (end is not None and len(prices) > 0 and
+                                                             prices["Date"].max() >= end)):
+            return prices, metadata["currency"]
+
+        if covered and len(prices) > 0:
+            fetch_start = prices["Date"].max()
+            new_prices, currency = fetcher.fetch(yticker, interval, fetch_start, None)
+            prices = pd.concat([prices.loc[prices["Date"] < fetch_start], new_prices], ignore_index=True)
+            f.log(f"Fetched {len(new_prices)} prices of {yticker} since {fetch_start.date()}.")
+        else:
+            prices, currency = fetcher.fetch(yticker, interval, start, None)
+            metadata = {"start": None if start is None else str(start.date())}
+            f.log(f"Fetched {len(prices)} prices of {yticker}.")
+
+        metadata.update({"currency": currency, "fetched": today})
+        self.write(yticker, interval, prices, metadata)
+        return prices, currency
+
+
+class NoStore:
+    """
+    Fetches the prices every time, for runs without a price store.
+    """
+
+    def get_prices(self, fetcher, yticker, interval, start, end):
+        """
+        Returns the prices of a ticker between start and end, like PriceStore.get_prices.
+        """
+        return fetcher.fetch(yticker, interval, start, end)
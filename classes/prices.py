@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from classes.functions import Functions as f
+
+
+def to_nanoseconds(values):
+    """
+    Converts a date, or a sequence of dates, into int64 nanoseconds so it can be binary searched.
+
+    Parameters:
+    - values: A single date (string, Timestamp, datetime) or a list/Series of dates. None means "latest".
+
+    Returns:
+    - int or np.ndarray: The date(s) as int64 nanoseconds since epoch.
+    """
+    if values is None:
+        return np.iinfo(np.int64).max
+    if isinstance(values, (list, tuple, np.ndarray, pd.Series, pd.Index)):
+        return pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return pd.Timestamp(values).as_unit("ns").value
+
+
+class ConversionGraph:
+    """
+    Ticker/currency graph built once from the PriceUpdate rows of a ledger.
+
+    Every (Quantity_Type, Cost_Type) pair with at least one price is an edge, usable from the date of its first price
+    on. The best conversion path between two nodes on a date is the one with the fewest edges usable on that date
+    (ties go to the edges that appear first in the file), is limited to maxDepth edges and is memoized. The usable
+    edges only change on the first date of an edge, so a path is searched for once per (from, to) pair and such
+    date instead of once per lookup.
+    """
+
+    def __init__(self, pairs, maxDepth=5, starts=None):
+        """
+        Parameters:
+        - pairs (iterable): The (Quantity_Type, Cost_Type) pairs that have prices, in file order.
+        - maxDepth (int): Maximum number of edges in a conversion path.
+        - starts (dict): The date of the first price of every pair as int64 nanoseconds, every pair is usable on
+          any date when None.
+        """
+        self.maxDepth = maxDepth if maxDepth is not None else 5
+        self.edges = {}
+        self.paths = {}
+        for ticker, currency in pairs:
+            self.edges.setdefault(ticker, []).append(currency)
+
+        # Edges become usable one epoch after another, the epoch of a date is the number of first dates up to it
+        starts = starts or {}
+        self.epochs = np.unique(np.array(list(starts.values()), dtype=np.int64))
+        self.edge_epochs = {pair: int(np.searchsorted(self.epochs, start, side="right"))
+                            for pair, start in starts.items()}
+
+    def get_Epochs(self, dates):
+        """
+        Returns the epoch of dates (int64 nanoseconds): the dates of an epoch have the same usable edges.
+        """
+        return np.searchsorted(self.epochs, dates, side="right")
+
+    def get_Path(self, ticker, currency, date=None):
+        """
+        Returns the conversion path from ticker to currency as a list of (from, to) edges.
+
+        Parameters:
+        - ticker (str): The node to convert from.
+        - currency (str): The node to convert to.
+        - date (int): The as-of date as int64 nanoseconds, only edges with a price on or before it are used. None
+          uses every edge.
+
+        Returns:
+        - list or None: The edges along the path, an empty list for same-currency pairs, or None when unreachable.
+        """
+        epoch = len(self.epochs) if date is None else int(self.get_Epochs(date))
+        key = (ticker, currency, epoch)
+        if key in self.paths:
+            return self.paths[key]
+
+        path = None
+        if ticker == currency:
+            path = []
+        else:
+            # Breadth first search, so the first path found has the fewest edges
+            previous = {ticker: None}
+            frontier = [ticker]
+            for depth in range(self.maxDepth):
+                next_frontier = []
+                for node in frontier:
+                    for neighbour in self.edges.get(node, []):
+                        if neighbour not in previous and self.edge_epochs.get((node, neighbour), 0) <= epoch:
+                            previous[neighbour] = node
+                            next_frontier.append(neighbour)
+                if currency in previous:
+                    path = []
+                    node = currency
+                    while previous[node] is not None:
+                        path.insert(0, (previous[node], node))
+                        node = previous[node]
+                    break
+                frontier = next_frontier
+
+        self.paths[key] = path
+        if path is None:
+            f.log(f"No conversion path from {ticker} to {currency} within {self.maxDepth} steps.")
+        else:
+            f.log(f"Conversion path from {ticker} to {currency}: {' > '.join([ticker] + [edge[1] for edge in path])}")
+        return path
+
+
+class PriceIndex:
+    """
+    As-of price lookup built once from the PriceUpdate rows of a ledger.
+
+    Prices are grouped per (Quantity_Type, Cost_Type) pair into date-sorted arrays, so every lookup is a binary
+    search instead of a filter and sort over the whole PriceUpdate frame. Pairs without a direct price are converted
+    along the path a ConversionGraph chooses among the pairs priced by the date, multiplying the as-of rate of every
+    edge. Same-currency pairs are 1
+    and anything without a price on the date is 0.
+    """
+
+    def __init__(self, PriceChanges, maxDepth=5):
+        """
+        Parameters:
+        - PriceChanges (pd.DataFrame): The PriceUpdate rows, as returned by Functions.get_priceUpdates.
+        - maxDepth (int): Maximum number of edges when converting through intermediate currencies.
+        """
+        self.pairs = {}
+        self.cache = {}
+
+        prices = PriceChanges.reset_index(drop=True)
+        if not prices.empty:
+            dates = to_nanoseconds(prices["Date"])
+            costs = prices["Cost"].to_numpy(dtype=object)
+
+            # Each pair keeps its dates sorted ascending (stable, so on a tied date the row last in the file wins)
+            # and the matching costs
+            for pair, positions in prices.groupby(["Quantity_Type", "Cost_Type"], sort=False).indices.items():
+                positions = positions[np.argsort(dates[positions], kind="stable")]
+                self.pairs[pair] = (dates[positions], costs[positions])
+
+            f.log(f"Price index built for {len(self.pairs)} pairs from {len(prices)} price updates.")
+
+        self.graph = ConversionGraph(self.pairs.keys(), maxDepth,
+                                     {pair: pair_dates[0] for pair, (pair_dates, _) in self.pairs.items()})
+
+    def get_DirectPrice(self, date, ticker, currency):
+        """
+        Returns the latest price of ticker in currency on or before date, or None if there is none.
+        """
+        pair = self.pairs.get((ticker, currency))
+        if pair is None:
+            return None
+        position = np.searchsorted(pair[0], date, side="right") - 1
+        if position < 0:
+            return None
+        return pair[1][position]
+
+    def get_LatestPrice(self, date, ticker, currency):
+        """
+        Returns the price of ticker in currency as of date.
+
+        Parameters:
+        - date: The as-of date. None uses the latest available price.
+        - ticker (str): The Quantity_Type to price.
+        - currency (str): The Cost_Type to express the price in.
+
+        Returns:
+        - The price (Decimal), 1 for same-currency pairs or 0 when no price is found.
+        """
+        if ticker == currency:
+            return 1
+        if not isinstance(date, (int, np.integer)):
+            date = to_nanoseconds(date)
+
+        key = (date, ticker, currency)
+        if key not in self.cache:
+            self.cache[key] = self.get_LatestPrices_Path(np.array([date]), ticker, currency)[0]
+        return self.cache[key]
+
+    def get_LatestPrices_Path(self, dates, ticker, currency):
+        """
+        Returns the prices of ticker in currency for an array of dates, as the product of the edge rates along
+        the conversion path of every date.
+
+        Parameters:
+        - dates (np.ndarray): The as-of dates as int64 nanoseconds.
+        - ticker (str): The Quantity_Type to price.
+        - currency (str): The Cost_Type to express the prices in.
+
+        Returns:
+        - np.ndarray: The prices (object dtype), 0 where an edge has no price yet.
+        """
+        prices = np.zeros(len(dates), dtype=object)
+        epochs = self.graph.get_Epochs(dates)
+        for epoch in np.unique(epochs):
+            # The dates of an epoch share a path, whose edges all have a price on or before them
+            rows = np.flatnonzero(epochs == epoch)
+            path = self.graph.get_Path(ticker, currency, dates[rows[0]])
+            if path is None:
+                continue
+
+            epoch_prices = np.ones(len(rows), dtype=object)
+            found = np.ones(len(rows), dtype=bool)
+            for edge in path:
+                edge_dates, edge_costs = self.pairs[edge]
+                positions = np.searchsorted(edge_dates, dates[rows], side="right") - 1
+                found &= positions >= 0
+                epoch_prices[found] = epoch_prices[found] * edge_costs[positions[found]]
+            epoch_prices[~found] = 0
+            prices[rows] = epoch_prices
+        return prices
+
+    def get_LatestPrices(self, frame, date_column, ticker_column, currency):
+        """
+        Looks up the as-of price for every row of a frame in one batch, with one vectorized binary search per
+        ticker and path edge.
+
+        Parameters:
+        - frame (pd.DataFrame): The rows to price.
+        - date_column (str): The column holding the as-of dates.
+        - ticker_column (str): The column holding the tickers.
+        - currency (str): The currency to express the prices in.
+
+        Returns:
+        - pd.Series: The prices, aligned with the index of frame.
+        """
+        keys = frame[[date_column, ticker_column]]
+        unique = keys.drop_duplicates()
+        prices = pd.Series(0, index=unique.index, dtype=object)
+
+        for ticker, group in unique.groupby(ticker_column, sort=False):
+            prices.loc[group.index] = self.get_LatestPrices_Path(to_nanoseconds(group[date_column]), ticker, currency)
+
+        unique = unique.assign(Price=prices)
+        return keys.merge(unique, how="left", on=[date_column, ticker_column])["Price"].set_axis(frame.index)
@@ -0,0 +1,188 @@
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from classes.functions import Functions as f
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the peak RSS columns are then left empty
+    resource = None
+
+# Columns of the profile of a run, in the order they are written
+PROFILE_COLUMNS = ["index", "task", "type", "output", "wall_seconds", "cpu_seconds", "read_seconds", "compute_seconds",
+                   "write_seconds", "rows_in", "rows_out", "bytes_read", "bytes_written", "process_peak_rss_mb",
+                   "peak_rss_increase_mb", "peak_traced_mb"]
+
+# Measurements of the run executing in this process, None when it is not profiled
+current = None
+
+
+def add_read(rows, size, seconds):
+    """
+    Adds a read of rows, size bytes, that took seconds, to the run being profiled.
+    """
+    if current is not None:
+        current["rows_in"] += rows
+        current["bytes_read"] += size
+        current["read_seconds"] += seconds
+
+
+def add_write(rows, size, seconds):
+    """
+    Adds a write of rows, size bytes, that took seconds, to the run being profiled.
+    """
+    if current is not None:
+        current["rows_out"] += rows
+        current["bytes_written"] += size
+        current["write_seconds"] += seconds
+
+
+def add_render(record, seconds):
+    """
+    Adds the render time and the image of a chart rendered by chartFarm.ChartFarm, after its run was measured, to its
+    measurements.
+    """
+    record["wall_seconds"] += seconds
+    record["compute_seconds"] += seconds
+    record["bytes_written"] += get_fileSize(f.get_full_Path(record["output"]))
+
+
+def get_fileSize(path):
+    """
+    Returns the size of a file in bytes, 0 when there is no such file.
+    """
+    if path is None or not os.path.isfile(path):
+        return 0
+    return os.path.getsize(path)
+
+
+def get_peakRSS():
+    """
+    Returns the peak resident memory of the process so far in MB, or None where it is not available (Windows). It
+    never goes down, so it covers every run executed in the process before.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def profile_command(run, config, execute):
+    """
+    Executes a run, measuring it when "Profile" is set in the config.
+
+    The measurements are the wall and CPU time of the run, how much of the wall time went to pandas.read_file and
+    pandas.write_file (the rest is compute), the rows and bytes they read and wrote, the peak resident memory of the
+    process so far (process_peak_rss_mb, including earlier runs in the same process) and how much the run raised it
+    (peak_rss_increase_mb, 0 when the run stayed below an earlier peak), both empty on Windows, and, with
+    "ProfileMemory", the peak of the memory allocated by Python during the run (tracemalloc, which slows the run
+    down). With "ProfileRun" set to the output of a run, that run is also profiled with cProfile: the
+    statistics are written next to its output as "<output>.prof" and the slowest functions logged.
+
+    Parameters:
+    - run (dict): The run.
+    - config (dict): The configuration.
+    - execute (callable): Executes the run.
+
+    Returns:
+    - dict or None: The measurements of the run (see PROFILE_COLUMNS), None when it is not profiled.
+    """
+    global current
+    profile_path = f.get_runParameter(config, "Profile")
+    profile_run = f.get_runParameter(config, "ProfileRun")
+    output = f.get_runParameter(run, "output")
+    profiling = profile_run is not None and output is not None and \
+        os.path.normpath(f.get_full_Path(profile_run)) == os.path.normpath(f.get_full_Path(output))
+
+    if profile_path is None and not profiling:
+        execute()
+        return None
+
+    trace_memory = f.get_runParameter(config, "ProfileMemory") == True
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    current = {column: 0 for column in PROFILE_COLUMNS}
+    current.update({"index": None, "task": f.get_runParameter(run, "task"), "type": f.get_runParameter(run, "type"),
+                    "output": output, "process_peak_rss_mb": None, "peak_rss_increase_mb": None,
+                    "peak_traced_mb": None})
+    profile = cProfile.Profile() if profiling else None
+    start_rss = get_peakRSS()
+
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        if profile is not None:
+            profile.runcall(execute)
+        else:
+            execute()
+    finally:
+        record, current = current, None
+
+    record["wall_seconds"] = time.perf_counter() - start
+    record["cpu_seconds"] = time.process_time() - start_cpu
+    record["compute_seconds"] = max(record["wall_seconds"] - record["read_seconds"] - record["write_seconds"], 0)
+    record["process_peak_rss_mb"] = get_peakRSS()
+    if start_rss is not None:
+        record["peak_rss_increase_mb"] = round(record["process_peak_rss_mb"] - start_rss, 1)
+    if trace_memory:
+        record["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+
+    if profile is not None:
+        write_stats(profile, f.get_full_Path(output) + ".prof")
+
+    f.log(f"Run {record['task']} {output or ''} took {record['wall_seconds']:.3f} s "
+          f"(read {record['read_seconds']:.3f} s, compute {record['compute_seconds']:.3f} s, "
+          f"write {record['write_seconds']:.3f} s), {record['rows_in']} rows in, {record['rows_out']} rows out.")
+    return record
+
+
+def write_stats(profile, path):
+    """
+    Writes the cProfile statistics of a run to a file, for pstats or a viewer such as snakeviz, and logs the
+    functions with the highest cumulative time.
+    """
+    profile.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(20)
+    f.log(f"cProfile statistics written to {path}:\n{summary.getvalue()}")
+
+
+def write_profile(config, records, started):
+    """
+    Writes the measurements of the runs of a pipeline execution to the "Profile" file of the config: CSV when the
+    path ends with .csv, JSON otherwise. "{timestamp}" in the path is replaced by the start of the execution, to
+    keep a file per execution.
+
+    Parameters:
+    - config (dict): The configuration.
+    - records (list): The measurements of the runs, see profile_command.
+    - started (datetime.datetime): The start of the pipeline execution.
+    """
+    profile_path = f.get_runParameter(config, "Profile")
+    if profile_path is None:
+        return
+
+    profile_path = f.get_full_Path(profile_path.replace("{timestamp}", started.strftime("%Y%m%d_%H%M%S")))
+    records = sorted([record for record in records if record is not None], key=lambda record: record["index"])
+    if profile_path.lower().endswith(".csv"):
+        pd.DataFrame(records, columns=PROFILE_COLUMNS).to_csv(profile_path, sep=config.get("CSV_Separator", ","),
+                                                               index=False)
+    else:
+        with open(profile_path, "w") as profile_file:
+            json.dump({"started": str(started),
+                       "wall_seconds": (datetime.datetime.now() - started).total_seconds(),
+                       "runs": records}, profile_file, indent=1)
+    f.log(f"Profile of {len(records)} runs written to {profile_path}")
@@ -0,0 +1,145 @@
+import pandas as pd
+from classes.functions import Functions as f
+
+
+class RulesEngine:
+    """
+    Account classification compiled once from a rules table (Source, Account, Exact columns).
+
+    A name gets the Account of the first rule, in table order, that matches it: rules with Exact match the whole
+    name, the other rules match anywhere in the name. Sources are upper-cased, like the names built by the parsers.
+    Exact rules are a dictionary lookup and the substring rules are an Aho-Corasick automaton, so classifying a name
+    costs one pass over its characters however many rules the table has, instead of one substring test per rule.
+    """
+
+    def __init__(self, rules, default_account, truthy_exact=False):
+        """
+        Parameters:
+        - rules (pd.DataFrame): The rules table, in priority order.
+        - default_account (str): The account of names no rule matches.
+        - truthy_exact (bool): How the Exact column is read. By default a rule is exact when Exact == True, a
+          substring rule when Exact is falsy and ignored otherwise (such as an empty Exact). With truthy_exact, any
+          truthy value (an empty Exact included) makes the rule exact.
+        """
+        self.default_account = default_account
+        self.exact = {}
+        self.substrings = 0
+        self.accounts = []
+        self.cache = {}
+
+        # Trie of the substring rules: goto transitions, failure links and the first rule ending at every state
+        self.goto = [{}]
+        self.fail = [0]
+        self.first = [None]
+
+        has_exact = "Exact" in rules.columns
+        for index, (source, account, exact) in enumerate(zip(rules["Source"], rules["Account"],
+                                                              rules["Exact"] if has_exact else [False] * len(rules))):
+            self.accounts.append(account)
+            if not isinstance(source, str):
+                f.log(f"Ignoring rule {index} without a Source: {account}")
+                continue
+
+            pattern = source.upper()
+            if (exact if truthy_exact else exact == True):
+                self.exact.setdefault(pattern, index)
+            elif not exact:
+                self.add_pattern(pattern, index)
+                self.substrings += 1
+
+        self.build_failureLinks()
+        f.log(f"Rules compiled: {len(self.exact)} exact and {self.substrings} substring rules.")
+
+    def add_pattern(self, pattern, index):
+        """
+        Adds a substring rule to the trie, keeping the first rule when several have the same pattern.
+        """
+        state = 0
+        for character in pattern:
+            if character not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.first.append(None)
+                self.goto[state][character] = len(self.goto) - 1
+            state = self.goto[state][character]
+        if self.first[state] is None or index < self.first[state]:
+            self.first[state] = index
+
+    def build_failureLinks(self):
+        """
+        Computes the failure links of the trie breadth first, and for every state the first rule matching at it,
+        including the rules of the shorter patterns it ends with.
+        """
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for character, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and character not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(character, 0)
+
+                inherited = self.first[self.fail[next_state]]
+                if inherited is not None and (self.first[next_state] is None or inherited < self.first[next_state]):
+                    self.first[next_state] = inherited
+
+    def get_FirstSubstringRule(self, name):
+        """
+        Returns the index of the first substring rule found in name, or None.
+        """
+        best = self.first[0]
+        state = 0
+        for character in name:
+            while state and character not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(character, 0)
+            found = self.first[state]
+            if found is not None and (best is None or found < best):
+                best = found
+        return best
+
+    def get_Account(self, name):
+        """
+        Returns the account of a transaction name.
+
+        Parameters:
+        - name (str): The normalized (upper case) transaction name.
+
+        Returns:
+        - str: The account of the first matching rule, or the default account.
+        """
+        if name in self.cache:
+            return self.cache[name]
+
+        matches = [index for index in (self.exact.get(name), self.get_FirstSubstringRule(name)) if index is not None]
+        account = self.accounts[min(matches)] if matches else self.default_account
+        self.cache[name] = account
+        return account
+
+    def get_Accounts(self, names):
+        """
+        Classifies a whole column of names, each distinct name once.
+
+        Parameters:
+        - names (pd.Series): The normalized transaction names.
+
+        Returns:
+        - pd.Series: The accounts, aligned with names.
+        """
+        unique = names.unique()
+        return names.map(dict(zip(unique, [self.get_Account(name) for name in unique])))
+
+
+def load_Rules(parser_config, truthy_exact=False):
+    """
+    Reads the rules table of a parser configuration and compiles it.
+
+    Parameters:
+    - parser_config (dict): The parser configuration, with RulesTable, RulesTable_Separator and UndefinedAccount.
+    - truthy_exact (bool): How the Exact column is read, see RulesEngine.
+
+    Returns:
+    - RulesEngine: The compiled rules.
+    """
+    rules = pd.read_csv(filepath_or_buffer=parser_config['RulesTable'], sep=parser_config['RulesTable_Separator'])
+    return RulesEngine(rules, parser_config.get('UndefinedAccount', 'Undefined'), truthy_exact)
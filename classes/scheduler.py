@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from classes.functions import Functions as f
+from classes.commands import Commands as commands
+import classes.pandas as pandas
+
+
+def get_runPaths(run):
+    """
+    Returns the normalized paths a run reads and writes.
+
+    Parameters:
+    - run (dict): The run from runs.json.
+
+    Returns:
+    - (list, list): The paths from its "input"/"inputs" parameters and from its "output" parameter.
+    """
+    inputs = []
+    if f.get_runParameter(run, "input") is not None:
+        inputs.append(run["input"])
+    for input in f.get_runParameter(run, "inputs") or []:
+        if f.get_runParameter(input, "input") is not None:
+            inputs.append(input["input"])
+
+    outputs = []
+    if f.get_runParameter(run, "output") is not None:
+        outputs.append(run["output"])
+
+    return [pandas.get_registryKey(path) for path in inputs], [pandas.get_registryKey(path) for path in outputs]
+
+
+def get_runDependencies(runs):
+    """
+    Infers which runs have to finish before each run can start, keeping the result of running them in file order.
+
+    A run depends on the last earlier run writing one of its inputs, on the earlier runs reading one of its outputs
+    since that output was last written (so they do not read the new version), and on the last earlier run writing
+    the same output (so the last writer wins, as when running sequentially).
+
+    Parameters:
+    - runs (list): The runs from runs.json.
+
+    Returns:
+    - list: For every run, the set of indexes of the runs it depends on.
+    """
+    dependencies = []
+    last_writer = {}
+    readers = {}
+
+    for index, run in enumerate(runs):
+        inputs, outputs = get_runPaths(run)
+        depends_on = set()
+
+        for path in inputs:
+            if path in last_writer:
+                depends_on.add(last_writer[path])
+
+        for path in outputs:
+            if path in last_writer:
+                f.log(f"Runs {last_writer[path]} and {index} both write {path}, running them in order.")
+                depends_on.add(last_writer[path])
+            depends_on.update(readers.get(path, set()))
+
+        for path in inputs:
+            readers.setdefault(path, set()).add(index)
+        for path in outputs:
+            last_writer[path] = index
+            readers[path] = set()
+
+        depends_on.discard(index)
+        dependencies.append(depends_on)
+
+    return dependencies
+
+
+def execute_run(run, config):
+    """
+    Runs a single run in a worker process, returning its measurements when it is profiled.
+    """
+    f.log(run)
+    return commands.run_command(run, config)
+
+
+def run_scheduled(runs, config, workers, manifest=None, records=None):
+    """
+    Runs the runs from runs.json in a process pool, starting every run as soon as the runs it depends on finished.
+
+    Independent runs, such as the parsers or the charts of a report, run concurrently. When a run fails, the runs
+    depending on it are skipped, the others still run, and an error is raised at the end.
+
+    Parameters:
+    - runs (list): The runs from runs.json.
+    - config (dict): The configuration from config.json.
+    - workers (int): Maximum number of runs executed at the same time.
+    - manifest (incremental.Manifest): When given, runs whose fingerprint did not change are skipped.
+    - records (list): When given, the measurements of the profiled runs are appended to it, with their index.
+    """
+    dependencies = get_runDependencies(runs)
+    f.log(f"Scheduling {len(runs)} runs on {workers} workers.")
+
+    waiting = {index: set(depends_on) for index, depends_on in enumerate(dependencies)}
+    running = {}
+    failed = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            # Skip the runs depending on a failed run, start the runs whose dependencies all finished
+            for index in sorted(waiting):
+                if waiting[index] & failed:
+                    f.log(f"Skipping run {index}, a run it depends on failed: {runs[index]}")
+                    failed.add(index)
+                    del waiting[index]
+                elif not waiting[index]:
+                    del waiting[index]
+                    fingerprint = None
+                    if manifest is not None:
+                        fingerprint = manifest.get_fingerprint(runs[index])
+                        if manifest.is_upToDate(index, runs[index], fingerprint):
+                            f.log(f"Skipping unchanged run: {runs[index]}")
+                            for depends_on in waiting.values():
+                                depends_on.discard(index)
+                            continue
+                    running[pool.submit(execute_run, runs[index], config)] = (index, fingerprint)
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, fingerprint = running.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    f.log(f"Run {index} failed: {e}")
+                    failed.add(index)
+                    continue
+                if record is not None and records is not None:
+                    record["index"] = index
+                    records.append(record)
+                if manifest is not None:
+                    manifest.record(index, runs[index], fingerprint)
+                for depends_on in waiting.values():
+                    depends_on.discard(index)
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} runs failed or were skipped: {sorted(failed)}")
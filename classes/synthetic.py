@@ -0,0 +1,282 @@
+import csv
+import json
+import os
+import random
+
+import pandas as pd
+
+# Share of the legs of a synthetic ledger generated by each source
+SOURCE_SHARES = {"IBKR": 0.4, "n26": 0.3, "wise": 0.15, "prices": 0.15}
+
+# IBKR statement objects: tag, type (assetCategory of a trade, type of a cash transaction), legs the parser makes of
+# it and how often it occurs
+IBKR_OBJECTS = [
+    ("CashTransaction", "Deposits/Withdrawals", 2, 10),
+    ("Trade", "STK", 6, 45),
+    ("Trade", "CASH", 7, 5),
+    ("CashTransaction", "Dividends", 2, 18),
+    ("CashTransaction", "Withholding Tax", 2, 12),
+    ("CashTransaction", "Other Fees", 2, 5),
+    ("CashTransaction", "Broker Interest Paid", 2, 3),
+    ("Transfer", "ACATS", 2, 1),
+    ("CorporateAction", "SO", 2, 1),
+]
+
+N26_HEADERS = {
+    2023: '"Date","Payee","Account number","Transaction type","Payment reference","Amount (EUR)",'
+          '"Amount (Foreign Currency)","Type Foreign Currency","Exchange Rate"\n',
+    2024: '"Booking Date","Value Date","Partner Name","Partner Iban",Type,"Payment Reference","Account Name",'
+          '"Amount (EUR)","Original Amount","Original Currency","Exchange Rate"\n',
+}
+
+WISE_COLUMNS = ["TransferWise ID", "Date", "Amount", "Currency", "Description", "Exchange From", "Exchange To",
+                "Exchange To Amount"]
+
+
+class SyntheticLedger:
+    """
+    Generates statements in the formats the parsers read, at any scale, to benchmark the commands on realistic inputs:
+    IBKR Flex XML, n26 CSV exports in the 2023 and 2024 formats, Wise CSV exports and price histories read by the
+    yFinance parser from price files (see priceSource.FileFetcher). The rules tables and parser configurations
+    pointing to them are written too.
+
+    The same seed and sizes always generate the same files, so results of different commits can be compared.
+    """
+
+    def __init__(self, folder, legs, tickers=20, accounts=50, seed=0, date_min="2015-01-01", date_max="2024-12-31"):
+        """
+        Parameters:
+        - folder (str): The folder the inputs are generated in, with "input" and "config" subfolders.
+        - legs (int): The approximate number of ledger entries the parsers make of all the inputs.
+        - tickers (int): The number of securities traded and priced.
+        - accounts (int): The number of IBKR accounts, and of payees of the bank accounts.
+        - seed (int): The seed of the random generator.
+        - date_min, date_max (str): The period the statements cover.
+        """
+        self.folder = folder
+        self.legs = legs
+        self.tickers = [f"T{number:04d}" for number in range(max(tickers, 1))]
+        self.accounts = [f"U{number:07d}" for number in range(max(accounts, 1))]
+        self.payees = [f"Payee {number:04d}" for number in range(max(accounts, 1))]
+        self.random = random.Random(seed)
+        self.date_min = date_min
+        self.date_max = date_max
+        self.days = pd.bdate_range(date_min, date_max)
+        self.transaction_id = 0
+
+    def get_dates(self, count):
+        """
+        Returns count business days of the period, sorted, as Timestamps.
+        """
+        return sorted(self.days[self.random.randrange(len(self.days))] for _ in range(count))
+
+    def get_amount(self, low, high):
+        return f"{self.random.uniform(low, high):.2f}"
+
+    def get_path(self, *parts):
+        path = os.path.join(self.folder, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def generate(self):
+        """
+        Writes every input, rules table and parser configuration.
+
+        Returns:
+        - dict: The config keys of the parser configurations ("Config_IBKR", "Config_n26", "Config_wise"), the
+          "priceFiles" folder, the "Tickers", "date_min" and "date_max" of a yFinance run reading them and the "legs"
+          generated per source.
+        """
+        legs = {source: int(self.legs * share) for source, share in SOURCE_SHARES.items()}
+        generated = {
+            "IBKR": self.write_IBKR(legs["IBKR"]),
+            "n26": self.write_n26(legs["n26"]),
+            "wise": self.write_wise(legs["wise"]),
+            "prices": self.write_prices(legs["prices"]),
+        }
+        return {
+            "Config_IBKR": self.write_config("IBKR", {"Name": "IBKR", "DefaultCurrency": "EUR",
+                                                      "SubAccounts": "Investment", "AccountSeparator": ":"}),
+            "Config_n26": self.write_config("n26", {"Name": "n26", "DefaultCurrency": "EUR",
+                                                    "SubAccounts": "Assets:Banks:n26:MainAccount",
+                                                    "UndefinedAccount": "Expenses:n26:Unregistered",
+                                                    "DateColumn": "Date", "DateFormat": "%Y-%m-%d",
+                                                    "separator": ","}),
+            "Config_wise": self.write_config("wise", {"Name": "wise", "DefaultCurrency": "EUR",
+                                                      "SubAccounts": "Assets:Banks:Wise:Cash",
+                                                      "UndefinedAccount": "Expenses:Wise:Unregistered",
+                                                      "DateColumn": "Date", "DateFormat": "%d-%m-%Y",
+                                                      "separator": ","}),
+            "priceFiles": os.path.join(self.folder, "input", "prices"),
+            "Tickers": [{"Ticker": ticker} for ticker in self.tickers] + [{"Ticker": "USD", "yTicker": "USDEUR"}],
+            "date_min": self.date_min,
+            "date_max": self.date_max,
+            "legs": generated,
+        }
+
+    def write_config(self, source, parser_config):
+        """
+        Writes the parser configuration of a source, with its input folder and, for the banks, its rules table. There
+        is no parse cache, so every run parses the statements.
+        """
+        parser_config["input"] = os.path.join(self.folder, "input", source)
+        if source != "IBKR":
+            rules_path = self.get_path("config", f"rules_{source}.csv")
+            rules = pd.DataFrame({
+                "Source": [payee.replace(" ", "").upper() for payee in self.payees],
+                "Account": [f"Expenses:{source}:Category{number % 20:02d}" for number in range(len(self.payees))],
+                "Exact": [False] * len(self.payees),
+            })
+            rules.to_csv(rules_path, sep=";", index=False)
+            parser_config.update({"RulesTable": rules_path, "RulesTable_Separator": ";"})
+
+        path = self.get_path("config", f"parser_{source}.json")
+        with open(path, "w") as config_file:
+            json.dump(parser_config, config_file, indent=4)
+        return path
+
+    def write_IBKR(self, legs):
+        """
+        Writes an IBKR Flex XML statement per year with about legs entries once parsed.
+
+        Returns:
+        - int: The number of legs generated.
+        """
+        weights = [weight for _, _, _, weight in IBKR_OBJECTS]
+        average = sum(object_legs * weight for _, _, object_legs, weight in IBKR_OBJECTS) / sum(weights)
+        objects = self.random.choices(IBKR_OBJECTS, weights, k=max(int(legs / average), 1))
+        dates = self.get_dates(len(objects))
+
+        # The dates are sorted, so the objects of a year follow each other
+        generated = 0
+        lines = []
+        for index, ((tag, kind, object_legs, _), date) in enumerate(zip(objects, dates)):
+            if not lines:
+                lines = ['<FlexQueryResponse queryName="benchmark" type="AF">', '<FlexStatements count="1">',
+                         f'<FlexStatement accountId="{self.accounts[0]}" fromDate="{date.year}-01-01" '
+                         f'toDate="{date.year}-12-31">']
+            lines.append(self.get_IBKRObject(tag, kind, date.strftime("%Y-%m-%d")))
+            generated += object_legs
+            if index + 1 == len(dates) or dates[index + 1].year != date.year:
+                lines += ["</FlexStatement>", "</FlexStatements>", "</FlexQueryResponse>"]
+                with open(self.get_path("input", "IBKR", f"{date.year}.xml"), "w") as xml_file:
+                    xml_file.write("\n".join(lines))
+                lines = []
+        return generated
+
+    def get_IBKRObject(self, tag, kind, date):
+        """
+        Returns the XML element of an IBKR statement object with the attributes parser_IBKR reads.
+        """
+        self.transaction_id += 1
+        symbol = self.random.choice(self.tickers)
+        attrs = {"accountId": self.random.choice(self.accounts), "currency": "USD", "symbol": symbol,
+                 "description": f"{symbol} SYNTHETIC", "reportDate": date, "transactionID": str(self.transaction_id),
+                 "multiplier": "1", "levelOfDetail": "DETAIL"}
+        if tag == "Trade":
+            quantity = self.random.randint(-50, 100) or 1
+            price = self.random.uniform(5, 500)
+            commission = self.random.uniform(0.5, 5)
+            attrs.update({"assetCategory": kind, "quantity": str(quantity), "tradePrice": f"{price:.4f}",
+                          "proceeds": f"{-quantity * price:.2f}", "taxes": "0", "ibCommission": f"{-commission:.2f}",
+                          "ibCommissionCurrency": "USD", "netCash": f"{-quantity * price - commission:.2f}",
+                          "cost": f"{quantity * price + commission:.2f}",
+                          "fifoPnlRealized": self.get_amount(-200, 200) if quantity < 0 else "0"})
+            if kind == "CASH":
+                attrs.update({"symbol": "EUR.USD", "description": "EUR.USD", "tradePrice": f"{price / 400:.5f}"})
+        elif tag == "CashTransaction":
+            sign = -1 if kind in ("Withholding Tax", "Other Fees", "Broker Interest Paid") else 1
+            amount = float(self.get_amount(1, 5000 if kind == "Deposits/Withdrawals" else 200)) * sign
+            attrs.update({"type": kind, "amount": f"{amount:.2f}",
+                          "currency": "EUR" if kind == "Deposits/Withdrawals" else "USD"})
+        elif tag == "Transfer":
+            attrs.update({"type": kind, "quantity": str(self.random.randint(1, 100)),
+                          "positionAmount": self.get_amount(100, 10000)})
+        else:
+            attrs.update({"type": kind, "quantity": str(self.random.randint(1, 100))})
+        return f"<{tag} " + " ".join(f'{name}="{value}"' for name, value in attrs.items()) + " />"
+
+    def write_n26(self, legs):
+        """
+        Writes about legs / 2 n26 transactions, the first half in the 2023 format and the rest in the 2024 format.
+
+        Returns:
+        - int: The number of legs generated.
+        """
+        rows = max(legs // 2, 1)
+        dates = self.get_dates(rows)
+        half = rows // 2
+
+        with open(self.get_path("input", "n26", "2023.csv"), "w", newline="") as n26_file:
+            n26_file.write(N26_HEADERS[2023])
+            writer = csv.writer(n26_file, quoting=csv.QUOTE_ALL)
+            for date in dates[:half]:
+                payee = self.random.choice(self.payees)
+                kind = self.random.choice(["Income", "Outgoing Transfer", "MasterCard Payment"])
+                amount = self.get_amount(1, 3000) if kind == "Income" else self.get_amount(-500, -1)
+                iban = "" if self.random.random() < 0.1 else f"DE{self.random.randrange(10 ** 18):018d}"
+                writer.writerow([date.strftime("%Y-%m-%d"), payee, iban, kind, f"Reference {self.random.randrange(100)}",
+                                 amount, "", "", ""])
+
+        with open(self.get_path("input", "n26", "2024.csv"), "w", newline="") as n26_file:
+            n26_file.write(N26_HEADERS[2024])
+            writer = csv.writer(n26_file, quoting=csv.QUOTE_ALL)
+            for date in dates[half:]:
+                payee = self.random.choice(self.payees)
+                kind = self.random.choice(["Credit Transfer", "Debit Transfer", "Presentment"])
+                amount = self.get_amount(1, 3000) if kind == "Credit Transfer" else self.get_amount(-500, -1)
+                iban = "" if self.random.random() < 0.1 else f"DE{self.random.randrange(10 ** 18):018d}"
+                writer.writerow([date.strftime("%Y-%m-%d"), date.strftime("%Y-%m-%d"), payee, iban, kind,
+                                 f"Reference {self.random.randrange(100)}", "Main Account", amount, "", "", ""])
+        return 2 * rows
+
+    def write_wise(self, legs):
+        """
+        Writes about legs / 2 Wise transactions, a file per year, a tenth of them currency exchanges.
+
+        Returns:
+        - int: The number of legs generated.
+        """
+        rows = max(legs // 2, 1)
+        dates = self.get_dates(rows)
+        files = {}
+        try:
+            for number, date in enumerate(dates):
+                if date.year not in files:
+                    wise_file = open(self.get_path("input", "wise", f"{date.year}.csv"), "w", newline="")
+                    files[date.year] = (wise_file, csv.writer(wise_file))
+                    files[date.year][1].writerow(WISE_COLUMNS)
+                amount = self.get_amount(-800, 1500)
+                if self.random.random() < 0.1:
+                    exchange = ["EUR", "USD", f"{-float(amount) * 1.08:.2f}"]
+                else:
+                    exchange = ["", "", ""]
+                files[date.year][1].writerow([f"TRANSFER-{number}", date.strftime("%d-%m-%Y"), amount, "EUR",
+                                              self.random.choice(self.payees)] + exchange)
+        finally:
+            for wise_file, _ in files.values():
+                wise_file.close()
+        return 2 * rows
+
+    def write_prices(self, legs):
+        """
+        Writes the price history of every ticker and of USD in EUR, about legs prices in all, as price files.
+
+        Returns:
+        - int: The number of prices generated.
+        """
+        histories = self.tickers + ["USDEUR"]
+        points = max(legs // len(histories), 2)
+        dates = self.days[::max(len(self.days) // points, 1)]
+        for ticker in histories:
+            start = 1.0 if ticker == "USDEUR" else self.random.uniform(10, 300)
+            steps = [self.random.gauss(0, 0.01) for _ in range(len(dates))]
+            closes = []
+            for step in steps:
+                start *= 1 + step
+                closes.append(round(start, 4))
+            pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "Close": closes}).to_csv(
+                self.get_path("input", "prices", f"{ticker}.csv"), sep=";", index=False)
+            with open(self.get_path("input", "prices", f"{ticker}.json"), "w") as metadata_file:
+                json.dump({"currency": "EUR" if ticker == "USDEUR" else "USD"}, metadata_file)
+        return len(dates) * len(histories)
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+import classes.data as data
+import classes.logger as logger
+
+LEDGER = """Date;Type;ID;Name;Account;Quantity;Quantity_Type;Cost;Cost_Type
+2024-01-02;Transaction;T1;;Assets:Bank;0.5;EUR;;
+2024-01-02;Transaction;T1;;Expenses:Food;-0.5;EUR;;
+2024-01-03;Transaction;T2;;Assets:Bank;2.25;EUR;;
+2024-01-03;Transaction;T2;;Income:Salary;-2.25;EUR;;
+2024-01-04;Transaction;T3;;Assets:Broker;1.125;VWCE;100.1;EUR
+2024-01-04;Transaction;T3;;Assets:Broker;-100.1;EUR;;
+2024-01-05;Transaction;T4;;Assets:Broker;0.29;USD;;
+2024-01-05;Transaction;T4;;Assets:Bank;-0.29;USD;;
+2024-01-06;PriceUpdate;;;;;VWCE;101.5;EUR
+"""
+
+FILTERS = [
+    [{"type": "Max", "column": "Quantity", "value": 1}],
+    [{"type": "Min", "column": "Quantity", "value": 0.29}],
+    [{"type": "Between", "column": "Quantity", "value": [0.3, 2.25]}],
+    [{"type": "Equals", "column": "Quantity", "value": 0.29}],
+    [{"type": "NotIn", "column": "Quantity", "value": [0.5, -0.5]}],
+    [{"type": "Max", "column": "Cost", "value": 100.1}],
+]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    path = tmp_path / "ledger.csv"
+    path.write_text(LEDGER)
+    yield path
+    logger.configure({})
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("streaming", [False, True])
+def test_filtered_balance_same_for_fixed_and_decimal(ledger, filters, streaming):
+    outputs = {}
+    for amounts in ["decimal", "fixed"]:
+        output = ledger.parent / f"balance_{amounts}.csv"
+        run = {"task": "balance", "input": str(ledger), "output": str(output), "filters": filters,
+               "amountStorage": amounts, "streaming": streaming, "chunkSize": 3}
+        data.command_balance(run, {"CSV_Separator": ";"})
+        outputs[amounts] = output.read_text()
+    assert outputs["fixed"] == outputs["decimal"]
+    assert len(outputs["decimal"].splitlines()) > 1
+
+
+def test_fixed_max_keeps_amounts_below_one(ledger):
+    output = ledger.parent / "balance.csv"
+    run = {"task": "balance", "input": str(ledger), "output": str(output), "amountStorage": "fixed",
+           "filters": [{"type": "Max", "column": "Quantity", "value": 1}, {"type": "Equals", "column": "Account",
+                                                                             "value": "Assets:Bank"}]}
+    data.command_balance(run, {"CSV_Separator": ";"})
+    balance = pd.read_csv(output, sep=";")
+    assert balance.set_index("Quantity_Type")["Change"].to_dict() == {"EUR": 0.5, "USD": -0.29}
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import classes.data as data
+import classes.logger as logger
+
+LEDGER = """Date;Type;ID;Name;Account;Quantity;Quantity_Type;Cost;Cost_Type
+2024-01-02;Transaction;T1;;Assets:Bank;10.5;EUR;;
+2024-01-02;Transaction;T1;;Income:Salary;-10.5;EUR;;
+2024-05-03;Transaction;T2;;Assets:Bank;-2.25;EUR;;
+2024-05-03;Transaction;T2;;Expenses:Food;2.25;EUR;;
+"""
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    path = tmp_path / "ledger.csv"
+    path.write_text(LEDGER)
+    yield path
+    logger.configure({})
+
+
+def compress(ledger, period, cutoff=None):
+    output = ledger.parent / "compressed.csv"
+    data.command_compress({"task": "compress", "input": str(ledger), "output": str(output), "period": period,
+                           "cutoffDate": cutoff}, {"CSV_Separator": ";"})
+    return output
+
+
+@pytest.mark.parametrize("period", ["week", "Year"])
+def test_invalid_period_writes_nothing(ledger, period):
+    assert not compress(ledger, period).exists()
+    logger.stop()
+    assert f"Invalid compress period: {period}" in (ledger.parent / "log.txt").read_text()
+
+
+def test_quarter_closing_entries(ledger):
+    compressed = pd.read_csv(compress(ledger, "quarter"), sep=";")
+    assert sorted(compressed["Date"].unique()) == ["2024-03-31", "2024-06-30"]
+
+
+def test_last_period_closes_on_the_cutoff_date(ledger):
+    compressed = pd.read_csv(compress(ledger, "quarter", "2024-05-03"), sep=";")
+    assert sorted(compressed["Date"].unique()) == ["2024-03-31", "2024-05-03"]
+
+    # Entries after the cutoff date are kept as they are, after the closing entries
+    compressed = pd.read_csv(compress(ledger, "year", "2024-04-30"), sep=";")
+    assert compressed["Date"].tolist() == ["2024-04-30", "2024-04-30", "2024-05-03", "2024-05-03"]
+    assert compressed["Name"].tolist()[:2] == ["End of period compression"] * 2
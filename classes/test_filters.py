@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import classes.filters as filter_engine
+import classes.logger as logger
+import classes.pandas as pandas
+
+
+@pytest.fixture(autouse=True)
+def log(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    yield
+    logger.configure({})
+
+
+@pytest.fixture
+def entries():
+    return pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-02", "2024-02-03", "2024-03-04", "2024-04-05", "2024-05-06"]),
+        "Account": ["Assets:Bank", "Expenses:Food (Shop)", "Assets:Broker", "Income:Salary", None],
+        "Quantity": [Decimal("0.5"), Decimal("-2.25"), Decimal("10"), Decimal("-100"), None],
+        "Quantity_Type": ["EUR", "EUR", "VWCE", "EUR", "USD"],
+    })
+
+
+def kept(entries, filters):
+    return filter_engine.compile_filters(filters).apply(entries).index.tolist()
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"type": "Min", "column": "Quantity", "value": 0.5}, [0, 2]),
+    ({"type": "Max", "column": "Quantity", "value": -2.25}, [1, 3]),
+    ({"type": "Min", "column": "Date", "value": "2024-03-04"}, [2, 3, 4]),
+    ({"type": "Between", "column": "Quantity", "value": [-2.25, 0.5]}, [0, 1]),
+    ({"type": "Between", "column": "Date", "value": ["2024-02-01", "2024-03-31"]}, [1, 2]),
+    ({"type": "Equals", "column": "Quantity", "value": 10}, [2]),
+    ({"type": "Equals", "column": "Quantity_Type", "value": "VWCE"}, [2]),
+    ({"type": "In", "column": "Quantity_Type", "value": ["VWCE", "USD"]}, [2, 4]),
+    ({"type": "In", "column": "Quantity_Type", "value": "USD"}, [4]),
+    ({"type": "NotIn", "column": "Account", "value": ["Assets:Bank"]}, [1, 2, 3, 4]),
+    ({"type": "StartsWith", "column": "Account", "value": "Assets:"}, [0, 2]),
+    ({"type": "StartsWith", "column": "Account", "value": ["Income", "Expenses"]}, [1, 3]),
+    ({"type": "Regex", "column": "Account", "value": "^(?:Assets|Income):"}, [0, 2, 3]),
+])
+def test_condition(entries, filter, expected):
+    assert kept(entries, [filter]) == expected
+
+
+def test_contains_matches_text_literally(entries):
+    assert kept(entries, [{"type": "Contains", "column": "Account", "value": "(Shop)"}]) == [1]
+    assert kept(entries, [{"type": "Contains", "column": "Account", "value": "."}]) == []
+    assert kept(entries, [{"type": "Regex", "column": "Account", "value": "."}]) == [0, 1, 2, 3]
+
+
+def test_min_or_max_without_value_filters_nothing(entries):
+    assert kept(entries, [{"type": "Min", "column": "Quantity"}]) == [0, 1, 2, 3, 4]
+
+
+def test_unknown_or_incomplete_filters_are_left_out(entries):
+    filters = [{"type": "Like", "column": "Account", "value": "Assets"},
+               {"type": "Between", "column": "Quantity", "value": 1}]
+    assert len(filter_engine.compile_filters(filters).filters) == 0
+    assert kept(entries, filters) == [0, 1, 2, 3, 4]
+
+
+def test_groups(entries):
+    assets = {"type": "StartsWith", "column": "Account", "value": "Assets"}
+    euros = {"type": "Equals", "column": "Quantity_Type", "value": "EUR"}
+    assert kept(entries, [{"type": "And", "filters": [assets, euros]}]) == [0]
+    assert kept(entries, [{"type": "Or", "filters": [assets, euros]}]) == [0, 1, 2, 3]
+    assert kept(entries, [{"type": "Not", "filters": [assets, euros]}]) == [1, 2, 3, 4]
+    assert kept(entries, [{"type": "Not", "filters": [{"type": "Or", "filters": [assets, euros]}]}]) == [4]
+
+
+@pytest.mark.parametrize("type", ["And", "Or", "Not"])
+def test_empty_groups_filter_nothing(entries, type):
+    unknown = {"type": "Like", "column": "Account", "value": "Assets"}
+    assert filter_engine.compile_filter({"type": type, "filters": []}) is None
+    assert kept(entries, [{"type": type, "filters": []}]) == [0, 1, 2, 3, 4]
+    assert kept(entries, [{"type": type, "filters": [unknown]}]) == [0, 1, 2, 3, 4]
+    assert kept(entries, [{"type": type}, {"type": "Equals", "column": "Quantity_Type", "value": "USD"}]) == [4]
+
+
+def test_later_conditions_only_look_at_kept_rows():
+    size = 1000
+    entries = pd.DataFrame({"Account": [f"Assets:{number % 10}" for number in range(size)],
+                            "Quantity": np.arange(size, dtype=float)})
+    compiled = filter_engine.compile_filters([{"type": "Equals", "column": "Account", "value": "Assets:3"},
+                                              {"type": "Min", "column": "Quantity", "value": 500}])
+    looked_at = []
+    condition = compiled.filters[1]
+    get_mask = condition.get_mask
+    condition.get_mask = lambda data, rows=None: looked_at.append(size if rows is None else len(rows)) or \
+        get_mask(data, rows)
+
+    result = compiled.apply(entries)
+    assert looked_at == [100]
+    expected = entries.loc[(entries["Account"] == "Assets:3") & (entries["Quantity"] >= 500)]
+    assert result.index.equals(expected.index)
+
+
+def test_sparse_rows_inside_nested_groups():
+    size = 1000
+    entries = pd.DataFrame({"Account": [f"Assets:{number % 10}" for number in range(size)],
+                            "Quantity": np.arange(size, dtype=float)})
+    filters = [{"type": "In", "column": "Account", "value": ["Assets:1", "Assets:2"]},
+               {"type": "Not", "filters": [{"type": "Or", "filters": [
+                   {"type": "Max", "column": "Quantity", "value": 100},
+                   {"type": "Regex", "column": "Account", "value": "2$"}]}]}]
+    expected = entries.loc[entries["Account"].isin(["Assets:1", "Assets:2"]) &
+                           ~((entries["Quantity"] <= 100) | entries["Account"].str.contains("2$"))]
+    assert kept(entries, filters) == expected.index.tolist()
+
+
+def test_fixed_point_amounts_compare_in_minor_units(entries):
+    fixed = pandas.to_fixedAmounts(entries)
+    for filter in [{"type": "Max", "column": "Quantity", "value": 1},
+                   {"type": "Equals", "column": "Quantity", "value": -2.25},
+                   {"type": "Between", "column": "Quantity", "value": [-2.25, 0.5]},
+                   {"type": "NotIn", "column": "Quantity", "value": [0.5, 10]}]:
+        assert kept(fixed, [filter]) == kept(entries, [filter])
@@ -0,0 +1,52 @@
+import io
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import classes.pandas as pandas
+
+
+def read_back(data):
+    """
+    Returns a frame written to a CSV and read back like read_file does.
+    """
+    buffer = io.StringIO()
+    data.to_csv(buffer, sep=";", index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer, sep=";", parse_dates=["Date"], date_format=pandas.DATE_FORMAT)
+
+
+@pytest.mark.parametrize("dtype", [object, "str"])
+def test_typed_frame_matches_csv_round_trip(dtype):
+    data = pd.DataFrame({
+        "Date": ["2024-01-02", "2024-01-03", "2024-01-04"],
+        "ID": ["001", "002", "010"],
+        "Name": ["Rent", "", None],
+        "Account": ["Assets:Bank", "Expenses:Rent", "Assets:Bank"],
+        "Code": ["1.5", "", "2"],
+    }).astype(dtype)
+    data["Quantity"] = [Decimal("1.50"), Decimal("-2"), None]
+    data["Count"] = [1, 2, 3]
+
+    typed = pandas.get_typedFrame(data)
+    expected = read_back(data)
+    pd.testing.assert_frame_equal(typed, expected, check_dtype=False)
+    for column in ["ID", "Count"]:
+        assert typed[column].dtype == np.int64
+    for column in ["Quantity", "Code"]:
+        assert typed[column].dtype == np.float64
+    assert typed["ID"].tolist() == [1, 2, 10]
+    assert typed["Name"].isna().tolist() == [False, True, True]
+
+
+@pytest.mark.parametrize("amounts", [["0.1", "0.2", "-0.3"], ["0.1", "0.2", "0.0000000000001"]])
+def test_running_total_is_exact(amounts):
+    entries = pd.DataFrame({"Date": pd.to_datetime(["2024-01-01", "2024-01-08", "2024-01-15"]),
+                            "Account": "Assets:Bank", "Quantity_Type": "EUR",
+                            "Quantity": [Decimal(amount) for amount in amounts]})
+    totals = pandas.get_runningTotal(entries, "2023-12-31", "2024-01-21", "W")["RunningTotal"].tolist()
+    expected = [Decimal(amounts[0]), Decimal(amounts[0]) + Decimal(amounts[1]), sum(map(Decimal, amounts))]
+    assert totals[1:] == expected
+    assert [str(total) for total in totals[:2]] == ["0.0", "0.1"]
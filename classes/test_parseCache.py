@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+import classes.logger as logger
+from classes.parseCache import ParseCache
+
+
+@pytest.fixture
+def folder(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    yield tmp_path
+    logger.configure({})
+
+
+def parse(path):
+    return pd.DataFrame({"File": [str(path)]})
+
+
+def test_clean_keeps_the_files_of_other_parsers(folder):
+    statement = folder / "statement.csv"
+    statement.write_text("1")
+    cache_folder = str(folder / "cache")
+
+    ibkr = ParseCache("IBKR", {"Cache": cache_folder})
+    ibkr.get_entries(str(statement), parse)
+    n26 = ParseCache("n26", {"Cache": cache_folder, "RulesTable": "rules.csv"})
+    n26.get_entries(str(statement), parse)
+    other = folder / "cache" / "prices.pkl"
+    other.write_bytes(b"")
+
+    # A new IBKR run that no longer reads the statement only removes its own entry
+    ParseCache("IBKR", {"Cache": cache_folder}).clean()
+    remaining = sorted(path.name for path in (folder / "cache").iterdir())
+    assert remaining == sorted([os.path.basename(n26.get_cachePath(str(statement))), "prices.pkl"])
+
+
+def test_unchanged_statement_is_read_from_the_cache(folder):
+    statement = folder / "statement.csv"
+    statement.write_text("1")
+    config = {"Cache": str(folder / "cache")}
+
+    ParseCache("IBKR", config).get_entries(str(statement), parse)
+    cache = ParseCache("IBKR", config)
+    entries = cache.get_entries(str(statement), lambda path: pytest.fail("parsed again"))
+    cache.clean()
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert entries["File"].tolist() == [str(statement)]
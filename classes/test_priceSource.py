@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+import pytest
+
+import classes.logger as logger
+from classes.priceSource import FileFetcher, NoStore, PriceStore
+
+
+class CountingFetcher(FileFetcher):
+    """
+    A FileFetcher counting how often it is asked for prices.
+    """
+
+    def __init__(self, folder):
+        super().__init__(folder)
+        self.fetches = []
+
+    def fetch(self, yticker, interval, start, end):
+        self.fetches.append((yticker, start))
+        return super().fetch(yticker, interval, start, end)
+
+
+@pytest.fixture(autouse=True)
+def log(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    yield
+    logger.configure({})
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    folder = tmp_path / "prices"
+    folder.mkdir()
+    (folder / "VWCE.DE.csv").write_text("Date;Close\n2024-01-02;100.5\n2024-01-03;101.25\n2024-01-04;99.75\n")
+    (folder / "VWCE.DE.json").write_text(json.dumps({"currency": "EUR"}))
+    return CountingFetcher(str(folder))
+
+
+def test_file_fetcher_reads_prices_between_dates(fetcher):
+    prices, currency = fetcher.fetch("VWCE.DE", "1d", pd.Timestamp("2024-01-03"), pd.Timestamp("2024-01-04"))
+    assert currency == "EUR"
+    assert prices["Date"].tolist() == [pd.Timestamp("2024-01-03")]
+    assert prices["Close"].tolist() == [101.25]
+
+
+def test_second_lookup_reads_the_store(fetcher, tmp_path):
+    store = PriceStore(str(tmp_path / "store"))
+    first, currency = store.get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    assert len(fetcher.fetches) == 1
+    assert currency == "EUR"
+    assert (tmp_path / "store" / "VWCE.DE_1d.csv").is_file()
+
+    # Fetched today already, so the stored prices are returned without fetching
+    second, currency = PriceStore(str(tmp_path / "store")).get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    assert len(fetcher.fetches) == 1
+    assert currency == "EUR"
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_stale_store_only_fetches_since_its_last_date(fetcher, tmp_path):
+    store = PriceStore(str(tmp_path / "store"))
+    store.get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    metadata_path = tmp_path / "store" / "VWCE.DE_1d.json"
+    metadata = json.loads(metadata_path.read_text())
+    metadata_path.write_text(json.dumps({**metadata, "fetched": "2024-01-04"}))
+
+    prices, _ = store.get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    assert fetcher.fetches[-1] == ("VWCE.DE", pd.Timestamp("2024-01-04"))
+    assert prices["Close"].tolist() == [100.5, 101.25, 99.75]
+
+
+def test_no_store_fetches_every_time(fetcher):
+    store = NoStore()
+    store.get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    store.get_prices(fetcher, "VWCE.DE", "1d", None, None)
+    assert len(fetcher.fetches) == 2
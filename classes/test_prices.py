@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+import classes.logger as logger
+from classes.prices import ConversionGraph, PriceIndex, to_nanoseconds
+
+# VWCE is priced in GBP and USD, but GBP only converts to EUR from June on
+PRICES = pd.DataFrame({
+    "Date": pd.to_datetime(["2024-01-02", "2024-01-02", "2024-01-02", "2024-06-03", "2024-07-01"]),
+    "Type": "PriceUpdate",
+    "Quantity_Type": ["VWCE", "VWCE", "USD", "GBP", "VWCE"],
+    "Cost": [Decimal("80"), Decimal("100"), Decimal("0.9"), Decimal("1.2"), Decimal("85")],
+    "Cost_Type": ["GBP", "USD", "EUR", "EUR", "GBP"],
+})
+
+
+@pytest.fixture(autouse=True)
+def log(tmp_path):
+    logger.configure({"LogFile": str(tmp_path / "log.txt"), "LogConsole": False})
+    yield
+    logger.configure({})
+
+
+def test_direct_and_same_currency_prices():
+    index = PriceIndex(PRICES)
+    assert index.get_LatestPrice("2024-03-01", "VWCE", "USD") == Decimal("100")
+    assert index.get_LatestPrice("2024-07-01", "VWCE", "GBP") == Decimal("85")
+    assert index.get_LatestPrice("2024-01-01", "VWCE", "USD") == 0
+    assert index.get_LatestPrice("2024-01-01", "EUR", "EUR") == 1
+
+
+def test_path_only_uses_edges_priced_on_the_date():
+    index = PriceIndex(PRICES)
+    # Before June only VWCE > USD > EUR has prices, afterwards VWCE > GBP > EUR comes first in the file
+    assert index.get_LatestPrice("2024-03-01", "VWCE", "EUR") == Decimal("90.0")
+    assert index.get_LatestPrice("2024-07-01", "VWCE", "EUR") == Decimal("102.0")
+    assert index.get_LatestPrice(None, "VWCE", "EUR") == Decimal("102.0")
+    assert index.get_LatestPrice("2024-01-01", "VWCE", "EUR") == 0
+
+
+def test_batch_prices_match_single_lookups():
+    index = PriceIndex(PRICES)
+    dates = ["2023-12-31", "2024-03-01", "2024-06-03", "2024-07-01", "2024-03-01"]
+    prices = index.get_LatestPrices_Path(to_nanoseconds(dates), "VWCE", "EUR")
+    assert list(prices) == [PriceIndex(PRICES).get_LatestPrice(date, "VWCE", "EUR") for date in dates]
+
+
+def test_unreachable_pair_is_zero():
+    index = PriceIndex(PRICES)
+    assert index.get_LatestPrice("2024-07-01", "EUR", "VWCE") == 0
+
+
+def test_graph_without_dates_uses_every_edge():
+    graph = ConversionGraph([("A", "B"), ("B", "C"), ("A", "D"), ("D", "C")], maxDepth=2)
+    assert graph.get_Path("A", "C") == [("A", "B"), ("B", "C")]
+    assert ConversionGraph([("A", "B"), ("B", "C")], maxDepth=1).get_Path("A", "C") is None
@@ -0,0 +1,102 @@
+import random
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+import classes.pandas as pandas
+from classes.functions import Functions as f
+
+
+def validate_Transaction(data: pd.DataFrame) -> bool:
+    """
+    Validates the legs of a single transaction one Quantity_Type at a time, the way transactions were validated
+    before get_transactionImbalances. Kept as the reference its results are checked against.
+    """
+    data = f.filter_data(data, "Equals", "Type", "Transaction")
+
+    if len(data["Quantity_Type"].unique()) == 1:
+        if round(data["Quantity"].sum(), 5) == 0.0:
+            return True
+        else:
+            return False
+    else:
+        qt_val = {}
+        invalid = {}
+        for quantity_type in data["Quantity_Type"].unique():
+            qt_data = f.filter_data(data, "Equals", "Quantity_Type", quantity_type)
+            qt_val[quantity_type] = qt_data["Quantity"].sum()
+            if qt_val[quantity_type] != 0.00:
+                invalid.update({quantity_type: qt_val[quantity_type]})
+
+        for q_t in invalid:
+            qt_data = f.filter_data(data, "Equals", "Cost_Type", q_t)
+            for index, row in qt_data.iterrows():
+                invalid[q_t] = invalid[q_t] + row["Cost"]
+                invalid[row["Quantity_Type"]] = invalid[row["Quantity_Type"]] - row["Quantity"]
+
+        out = True
+
+        for q_t in invalid:
+            invalid[q_t] = round(invalid[q_t], 5)
+            if invalid[q_t] != 0.0:
+                out = False
+
+    return out
+
+
+def get_ledger(seed):
+    """
+    Returns random transactions mixing balanced, unbalanced and cross-currency legs.
+    """
+    generator = random.Random(seed)
+    rows = []
+    for transaction in range(generator.randint(1, 8)):
+        for leg in range(generator.randint(1, 4)):
+            cost_type = generator.choice([None, "EUR", "USD", "X"])
+            rows.append({"Date": "2024-01-01", "Type": generator.choice(["Transaction"] * 5 + ["PriceUpdate"]),
+                         "ID": f"T{transaction}", "Name": "", "Account": "Assets:Bank",
+                         "Quantity": Decimal(generator.choice(["1", "-1", "2.5", "-2.5", "0", "0.000001",
+                                                               "-3.5", "1.000004"])),
+                         "Quantity_Type": generator.choice(["EUR", "USD", "X"]),
+                         "Cost": Decimal(generator.choice(["1", "-1", "2.5", "-2.5", "3.5"])) if cost_type else None,
+                         "Cost_Type": cost_type})
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_imbalances_match_validate_transaction(seed):
+    data = get_ledger(seed)
+    results, imbalances = pandas.get_transactionImbalances(data)
+
+    # The reference fails on a leg paid in an unbalanced Quantity_Type when its own Quantity_Type balances, those
+    # transactions are left out
+    transactions = data.loc[data["Type"] == "Transaction"]
+    expected = {}
+    for id in transactions["ID"].unique():
+        try:
+            expected[id] = validate_Transaction(transactions.loc[transactions["ID"] == id])
+        except KeyError:
+            pass
+    assert {id: results[id] for id in expected} == expected
+    unbalanced = set(imbalances.index.get_level_values("ID"))
+    assert {id for id in expected if id in unbalanced} == {id for id, valid in expected.items() if not valid}
+
+
+def test_tolerance_is_the_same_for_fixed_and_decimal_amounts():
+    # T1 and T3, through the cost of its VWCE leg, only balance within the 1e-5 tolerance, T2 is off by more
+    data = pd.DataFrame({
+        "Date": "2024-01-01", "Type": "Transaction", "Name": "", "Account": "Assets:Bank",
+        "ID": ["T1", "T1", "T2", "T2", "T3", "T3"],
+        "Quantity": [Decimal("10.000001"), Decimal("-10"), Decimal("10.0001"), Decimal("-10"), Decimal("2"),
+                     Decimal("-100.000004")],
+        "Quantity_Type": ["EUR", "EUR", "EUR", "EUR", "VWCE", "EUR"],
+        "Cost": [None, None, None, None, Decimal("100"), None],
+        "Cost_Type": [None, None, None, None, "EUR", None],
+    })
+    results, imbalances = pandas.get_transactionImbalances(data)
+    assert results.to_dict() == {"T1": True, "T2": False, "T3": True}
+
+    fixed_results, fixed_imbalances = pandas.get_transactionImbalances(pandas.to_fixedAmounts(data))
+    assert fixed_results.to_dict() == results.to_dict()
+    assert fixed_imbalances.to_dict() == imbalances.to_dict()
@@ -1,15 +1,13 @@
+import multiprocessing
 
 from classes.functions import Functions as f
-from classes.commands import Commands as commands
+from classes.pipeline import run_pipeline
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     f.log("Starting")
     config = f.import_json('Files/config/config.json')
     runs = f.import_json(config["Runs"])
-    for run in runs["Runs"]:
-        f.log(run)
-        commands.run_command(run, config)
+    run_pipeline(runs["Runs"], config)
     f.log("Done")
-
-